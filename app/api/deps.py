@@ -1,12 +1,17 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Callable, Generator, Optional
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.routing import APIRoute
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..core.database import get_db
+from starlette.concurrency import run_in_threadpool
+from ..core.cache import principal_cache
+from ..core.database import AsyncSessionLocal, SessionLocal, get_db, get_async_db
 from ..core.config import settings
-from ..core.security import verify_token
+from ..core.security import decode_token
 from ..crud.user import CRUDUser
 from ..models.user import UserRole
+from ..utils.pagination import decode_cursor
 
 security = HTTPBearer()
 
@@ -14,6 +19,88 @@ security = HTTPBearer()
 crud_user = CRUDUser()  # <-- AÑADE ESTO
 
 
+# Unidad de trabajo por request: los handlers llaman al CRUD con
+# commit=False y UnitOfWorkRoute hace un único commit al final.
+
+def get_uow_db(request: Request) -> Generator[Session, None, None]:
+    """
+    Session whose writes are committed once, after the handler returns
+    (routers built with route_class=UnitOfWorkRoute). Rolled back if the
+    handler raises.
+    """
+    db = SessionLocal()
+    request.state.uow = db
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def get_async_uow_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Async version of get_uow_db"""
+    async with AsyncSessionLocal() as db:
+        request.state.uow = db
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Commits the request's unit of work after the handler has built its
+    response and before it is sent. Dependencies with yield only close
+    once the response has gone out, too late to report a failed commit.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            response = await handler(request)
+            db = getattr(request.state, "uow", None)
+            if db is not None and response.status_code < 400:
+                if isinstance(db, AsyncSession):
+                    await db.commit()
+                else:
+                    await run_in_threadpool(db.commit)
+            return response
+
+        return route_handler
+
+
+def _principal_from_claims(
+    db: Session, user_id: int, payload: dict, credentials_exception: HTTPException
+) -> dict:
+    """
+    Build the principal from the token claims. Only the user's current
+    token_version is read, to reject tokens issued before a role change or
+    deactivation.
+    """
+    if not payload.get("is_active"):
+        raise credentials_exception
+    
+    token_version = crud_user.get_token_version(db, id=user_id)
+    if token_version is None or token_version != payload.get("ver"):
+        raise credentials_exception
+    
+    try:
+        role = UserRole(payload.get("role"))
+    except ValueError:
+        raise credentials_exception
+    
+    return {
+        "id": user_id,
+        "email": payload.get("email"),
+        "role": role,
+        "is_verified": bool(payload.get("is_verified"))
+    }
+
+
 def get_current_user(
     db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -25,20 +112,30 @@ def get_current_user(
     )
     
     token = credentials.credentials
-    user_id = verify_token(token)
-    if user_id is None:
+    payload = decode_token(token)
+    if payload is None:
         raise credentials_exception
+    user_id = int(payload["sub"])
     
-    user = crud_user.get(db, id=int(user_id))
+    if settings.AUTH_STATELESS_CLAIMS and "ver" in payload:
+        return _principal_from_claims(db, user_id, payload, credentials_exception)
+    
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return dict(principal)
+    
+    user = crud_user.get(db, id=user_id)
     if user is None or not user.is_active:
         raise credentials_exception
     
-    return {
+    principal = {
         "id": user.id,
         "email": user.email,
         "role": user.role,
         "is_verified": user.is_verified
     }
+    principal_cache.set(user.id, principal)
+    return dict(principal)
 
 
 def get_current_active_user(
@@ -72,4 +169,20 @@ def require_supervisor_or_admin(current_user: dict = Depends(get_current_active_
 
 def require_operator_or_higher(current_user: dict = Depends(get_current_active_user)) -> dict:
     # All roles are allowed
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def get_cursor(
+    cursor: Optional[str] = Query(
+        None, description="Opaque pagination cursor (X-Next-Cursor of the previous page)"
+    ),
+) -> Optional[str]:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    return cursor
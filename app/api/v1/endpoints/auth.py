@@ -4,9 +4,11 @@ from fastapi import APIRouter, Depends, HTTPException, status, Body
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from ...deps import get_db, get_current_user
+from ...deps import UnitOfWorkRoute, get_db, get_current_user, get_uow_db
+from ....core.cache import principal_cache
 from ....core.config import settings
-from ....core.security import create_access_token, verify_password, get_password_hash
+from ....core.database import after_commit
+from ....core.security import create_access_token, decode_token, revoke_token, verify_password, get_password_hash
 from ....crud.user import CRUDUser
 from ....schemas.user import (
     UserCreate, UserResponse, Token, 
@@ -16,7 +18,7 @@ from ....services.email import email_service, generate_verification_code, genera
 from ....services.auth import auth_service
 from fastapi import Header
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 crud_user = CRUDUser()
 
@@ -24,7 +26,7 @@ crud_user = CRUDUser()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     user_in: UserCreate,
 ) -> Any:
     """
@@ -39,28 +41,30 @@ def register(
         )
     
     # Create user
-    user = crud_user.create(db, obj_in=user_in)
+    user = crud_user.create(db, obj_in=user_in, commit=False)
     
     # Generate verification code
     verification_code = generate_verification_code()
     user.verification_code = verification_code
-    db.commit()
     
-    # Send verification email
-    email_service.send_verification_email(user.email, verification_code)
+    # Send verification email once the user is committed
+    after_commit(db, lambda: email_service.send_verification_email(user.email, verification_code))
     
     return user
 
 
 @router.post("/login", response_model=Token)
 def login(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = crud_user.authenticate(db, email=form_data.username, password=form_data.password)
+    # Un hash con parámetros viejos se renueva y se confirma con la respuesta
+    user = crud_user.authenticate(
+        db, email=form_data.username, password=form_data.password, commit=False
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,9 +78,11 @@ def login(
             detail="User is not verified",
         )
     
+    claims = crud_user.token_claims(user) if settings.AUTH_STATELESS_CLAIMS else None
     access_token = create_access_token(
         subject=str(user.id), 
-        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        claims=claims
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -84,7 +90,7 @@ def login(
 @router.post("/verify-email", response_model=UserResponse)
 def verify_email(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     verification_data: VerificationRequest,
 ) -> Any:
     """
@@ -109,10 +115,10 @@ def verify_email(
             detail="Invalid verification code",
         )
     
-    user.is_verified = True
-    user.verification_code = None
-    db.commit()
-    db.refresh(user)
+    user = crud_user.update(
+        db, db_obj=user, obj_in={"is_verified": True, "verification_code": None}, commit=False
+    )
+    after_commit(db, lambda: principal_cache.invalidate(user.id))
     
     return user
 
@@ -120,7 +126,7 @@ def verify_email(
 @router.post("/resend-verification")
 def resend_verification(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     email: str = Body(..., embed=True),
 ) -> Any:
     """
@@ -142,10 +148,9 @@ def resend_verification(
     # Generate new verification code
     verification_code = generate_verification_code()
     user.verification_code = verification_code
-    db.commit()
     
     # Send verification email
-    email_service.send_verification_email(user.email, verification_code)
+    after_commit(db, lambda: email_service.send_verification_email(user.email, verification_code))
     
     return {"message": "Verification email sent"}
 
@@ -185,27 +190,19 @@ def forgot_password(
 @router.post("/reset-password")
 def reset_password(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     reset_data: PasswordResetConfirm,
 ) -> Any:
     """
     Reset password with token.
     """
-    try:
-        payload = jwt.decode(
-            reset_data.token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid token",
-            )
-    except JWTError:
+    payload = decode_token(reset_data.token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid token",
         )
+    user_id: str = payload["sub"]
     
     user = crud_user.get(db, id=int(user_id))
     if not user:
@@ -216,7 +213,11 @@ def reset_password(
     
     # Update password
     user.hashed_password = get_password_hash(reset_data.new_password)
-    db.commit()
+    crud_user.bump_token_version(user)
+    after_commit(db, lambda: principal_cache.invalidate(user.id))
+    # El token de reseteo es de un solo uso: se revoca solo si la nueva
+    # contraseña quedó guardada, si no el usuario puede reintentar
+    after_commit(db, lambda: revoke_token(payload))
     
     return {"message": "Password updated successfully"}
 
@@ -239,11 +240,9 @@ def logout(
     """
     Logout user.
     
-    Since we use stateless JWT tokens, logout is handled client-side.
-    The client should delete the stored token from its storage.
-    
-    This endpoint provides a formal way to trigger logout and
-    can be extended later with token blacklisting if needed.
+    The token's jti is added to the revocation list until the token
+    expires, so it is rejected by every worker from now on.
+    The client should still delete the stored token from its storage.
     """
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
@@ -254,9 +253,15 @@ def logout(
     # Extract the token
     token = authorization.split(" ")[1]
     
-    # Note: In a production system with immediate token invalidation needs,
-    # you would add the token to a blacklist here.
-    # For now, we rely on client-side token deletion.
+    payload = decode_token(token)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    revoke_token(payload)
     
     return {
         "success": True,
@@ -267,4 +272,4 @@ def logout(
             "2. Clear user data from application state",
             "3. Redirect to login page"
         ]
-    }
\ No newline at end of file
+    }
@@ -1,82 +1,103 @@
+import mimetypes
+import os
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ...deps import get_db, require_admin, require_supervisor_or_admin, get_current_active_user, require_operator_or_higher
-from ....crud.incident import CRUDIncident
-from ....crud.user import CRUDUser
+from ...deps import get_db, get_cursor, require_admin, require_supervisor_or_admin, get_current_active_user, require_operator_or_higher
+from ...deps import UnitOfWorkRoute, get_async_uow_db, get_uow_db
+from ....core.config import settings
+from ....core.database import SessionLocal, after_commit
+from ....crud.incident import (
+    AUDIO_METADATA_FIELDS, DURATION_SORTS, AsyncCRUDIncident, CRUDIncident, audio_metadata_columns,
+    crud_incident_stats
+)
+from ....crud.user import AsyncCRUDUser, CRUDUser
 from ....models.incident import IncidentStatus
 from ....schemas.incident import (
     IncidentResponse, IncidentCreate, IncidentUpdate, 
-    IncidentWithUser, IncidentAudioUpload
+    IncidentWithUser, IncidentAudioUpload, AudioUploadRequest, AudioUploadTarget, IncidentStats,
+    IncidentBulkStatusUpdate, IncidentBulkStatusResult
+)
+from ....services.storage import StoredAudio, audio_storage
+from ....services.peaks import PEAKS_MIME_TYPE, peaks_worker
+from ....services.transcoding import transcoder
+from ....utils.export import csv_chunks, ndjson_chunks
+from ....utils.pagination import next_cursor
+from ....utils.responses import (
+    RangeFileResponse, etag_matches, model_list_response, not_modified, revalidation_headers
 )
-from ....services.storage import audio_storage
 from typing import Optional, List, Any
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
 from sqlalchemy.orm import Session
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+# Rango de /stats: por defecto los últimos 30 días, como máximo un año
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_DAYS = 366
 
 # Crear instancias del CRUD
 crud_incident = CRUDIncident()
 crud_user = CRUDUser()
+async_crud_incident = AsyncCRUDIncident()
+async_crud_user = AsyncCRUDUser()
 
 
 @router.get("/", response_model=List[IncidentWithUser])
 def read_incidents(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_supervisor_or_admin),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(get_cursor),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
     status: Optional[IncidentStatus] = Query(None, description="Filter by status"),
+    min_duration: Optional[float] = Query(None, ge=0, description="Minimum problem audio duration (seconds)"),
+    max_duration: Optional[float] = Query(None, ge=0, description="Maximum problem audio duration (seconds)"),
+    sort: Optional[str] = Query(None, pattern="^-?duration$", description="Sort by problem audio duration"),
 ) -> Any:
     """
     Retrieve incidents.
     Admin and supervisors can see all incidents.
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Sorting by duration pages with skip/limit instead of the cursor.
+    Answers 304 when If-None-Match still matches the page's ETag.
     """
+    if sort in DURATION_SORTS and cursor:
+        # `status` es el filtro de esta ruta, no el módulo de FastAPI
+        raise HTTPException(
+            status_code=400,
+            detail="cursor can't be combined with sort; use skip/limit",
+        )
     try:
-        # Obtener incidentes con filtros
-        incidents = crud_incident.get_multi_with_filters(
-            db, user_id=user_id, status=status, skip=skip, limit=limit
+        filters = dict(
+            user_id=user_id, status=status, min_duration=min_duration,
+            max_duration=max_duration, sort=sort, skip=skip, limit=limit, cursor=cursor
         )
+        # ETag y cursor con la consulta de versiones: un 304 no carga las filas.
+        # Ambas vienen de result_cache si no hubo escrituras desde entonces.
+        versions = crud_incident.get_versions_with_user(db, **filters)
+        headers = revalidation_headers([
+            (row["id"], row["created_at"], row["user_id"], row["version"], row["user_version"])
+            for row in versions
+        ])
+        cursor_next = next_cursor(versions, limit) if sort is None else None
+        if cursor_next:
+            headers["X-Next-Cursor"] = cursor_next
+        cached = not_modified(request, headers)
+        if cached is not None:
+            return cached
         
-        # Debug: verificar que se obtienen incidentes
-        print(f"Incidents found: {len(incidents)}")
-        if incidents:
-            print(f"First incident: {incidents[0].id}, user_id: {incidents[0].user_id}")
-        
-        # Construir respuesta
-        result = []
-        for incident in incidents:
-            # Obtener usuario
-            user = crud_user.get(db, id=incident.user_id)
-            if not user:
-                print(f"Warning: User {incident.user_id} not found for incident {incident.id}")
-                continue
-            
-            # Convertir incidente a esquema Pydantic v2
-            incident_dict = {
-                "id": incident.id,
-                "title": incident.title,
-                "problem_audio_path": incident.problem_audio_path,
-                "solution_audio_path": incident.solution_audio_path,
-                "observations": incident.observations,
-                "status": incident.status,
-                "is_resolved": incident.is_resolved,
-                "user_id": incident.user_id,
-                "created_at": incident.created_at,
-                "updated_at": incident.updated_at,
-                "user_name": user.name,
-                "user_lastname": user.lastname,
-                "user_email": user.email,
-                "user_role": user.role.value  # Asegúrate que role sea Enum o string
-            }
-            
-            incident_data = IncidentWithUser.model_validate(incident_dict)
-            result.append(incident_data)
-        
-        print(f"Returning {len(result)} incidents")
-        return result
+        # Incidentes y datos del usuario en una sola consulta
+        rows = crud_incident.get_page_with_user(db, **filters)
+        print(f"Returning {len(rows)} incidents")
+        # Filas de nuestra propia consulta: se serializan una sola vez, sin
+        # validarlas de nuevo contra response_model
+        return model_list_response(rows, IncidentWithUser, headers=headers)
         
     except Exception as e:
         print(f"Error in read_incidents: {str(e)}")
@@ -88,18 +109,55 @@ def read_incidents(
         )
 
 
+async def _stored_audio(
+    file: Optional[UploadFile], key: Optional[str], user_id: int, incident_id: Optional[int] = None
+) -> StoredAudio:
+    """Audio sent in the request body, or uploaded beforehand with a presigned URL"""
+    if (file is None) == (key is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send either the audio file or the key of an uploaded audio",
+        )
+    if key is not None:
+        return await audio_storage.stored_upload(key)
+    return await audio_storage.save_audio_file(file, user_id, incident_id)
+
+
+@router.post("/audio/uploads", response_model=AudioUploadTarget)
+def create_audio_upload(
+    upload_in: AudioUploadRequest,
+    current_user: dict = Depends(require_operator_or_higher),
+) -> Any:
+    """
+    Presigned URL to upload an audio directly to storage (S3 backend).
+    Send the returned headers with the PUT, then pass `key` as
+    problem_audio_key / solution_audio_key instead of the file.
+    """
+    return audio_storage.upload_target(
+        upload_in.sha256, size=upload_in.size, mime_type=upload_in.mime_type
+    )
+
+
+def _enqueue_audio_jobs(incident_id: int, audio_type: str) -> None:
+    transcoder.enqueue(incident_id, audio_type)
+    peaks_worker.enqueue(incident_id, audio_type)
+
+
 @router.post("/", response_model=IncidentResponse, status_code=status.HTTP_201_CREATED)
 async def create_incident(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_uow_db),
     current_user: dict = Depends(require_operator_or_higher),
     title: str = Form(...),
-    problem_audio: UploadFile = File(...),
+    problem_audio: Optional[UploadFile] = File(None),
+    problem_audio_key: Optional[str] = Form(None),
     observations: str = Form(None),
 ) -> Any:
     """
     Create new incident with problem audio.
     Only operators can create incidents.
+    The audio is either uploaded here or, with the S3 backend, uploaded
+    beforehand through /incidents/audio/uploads and referenced by key.
     """
     print(f"=== CREATE INCIDENT STARTED ===")
     
@@ -111,33 +169,33 @@ async def create_incident(
     
     # Save problem audio
     print("Saving audio file...")
-    problem_audio_path = await audio_storage.save_audio_file(
-        problem_audio, current_user["id"]
-    )
-    print(f"Audio saved at: {problem_audio_path}")
-    
-    # Create incident DIRECTAMENTE con el modelo
-    from ....models.incident import Incident
+    problem_audio = await _stored_audio(problem_audio, problem_audio_key, current_user["id"])
+    print(f"Audio saved at: {problem_audio.path}")
     
-    incident = Incident(
-        title=title,
-        problem_audio_path=problem_audio_path,
-        observations=observations,
-        user_id=current_user["id"],
-        status="initiated",  # String directamente
-        is_resolved=False
+    # La referencia al blob se toma antes de guardar el archivo y se
+    # confirma junto con el incidente
+    await audio_storage.acquire(db, problem_audio)
+    incident = await async_crud_incident.create_with_data(
+        db,
+        obj_in={
+            "title": title,
+            "problem_audio_path": problem_audio.path,
+            "problem_audio_sha256": problem_audio.sha256,
+            **audio_metadata_columns("problem", problem_audio.metadata),
+            "observations": observations,
+            "user_id": current_user["id"],
+            "status": IncidentStatus.initiated,
+            "is_resolved": False,
+        },
+        commit=False,
     )
     
-    print(f"Adding incident to DB: {incident.title}, user_id: {incident.user_id}")
-    
-    db.add(incident)
-    db.commit()
-    db.refresh(incident)
-    
     print(f"Incident created with ID: {incident.id}")
+    # Los workers leen el incidente de la base: se encolan tras el commit
+    after_commit(db, lambda: _enqueue_audio_jobs(incident.id, "problem"))
     
     # Get user info for response
-    user = crud_user.get(db, id=current_user["id"])
+    user = await async_crud_user.get(db, id=current_user["id"])
     
     # Build response using Pydantic model
     response = IncidentResponse(
@@ -152,7 +210,8 @@ async def create_incident(
         created_at=incident.created_at,
         updated_at=incident.updated_at,
         user_name=user.name,
-        user_lastname=user.lastname
+        user_lastname=user.lastname,
+        **{field: getattr(incident, field) for field in AUDIO_METADATA_FIELDS},
     )
     
     print("=== CREATE INCIDENT SUCCESS ===")
@@ -162,10 +221,11 @@ async def create_incident(
 @router.post("/{incident_id}/solution", response_model=IncidentResponse)
 async def add_solution_audio(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_uow_db),
     current_user: dict = Depends(get_current_active_user),
     incident_id: int,
-    solution_audio: UploadFile = File(...),
+    solution_audio: Optional[UploadFile] = File(None),
+    solution_audio_key: Optional[str] = Form(None),
     is_resolved: bool = Form(True),
     observations: str = Form(None),
 ) -> Any:
@@ -173,7 +233,7 @@ async def add_solution_audio(
     Add solution audio to incident.
     Only the creator can add solution audio.
     """
-    incident = crud_incident.get(db, id=incident_id)
+    incident = await async_crud_incident.get(db, id=incident_id)
     if not incident:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -195,25 +255,26 @@ async def add_solution_audio(
         )
     
     # Save solution audio
-    solution_audio_path = await audio_storage.save_audio_file(
-        solution_audio, current_user["id"], incident_id
+    solution_audio = await _stored_audio(
+        solution_audio, solution_audio_key, current_user["id"], incident_id
     )
     
     # Update incident
-    incident = crud_incident.add_solution_audio(
+    await audio_storage.acquire(db, solution_audio)
+    incident = await async_crud_incident.add_solution_audio(
         db, db_obj=incident, 
-        solution_audio_path=solution_audio_path,
-        is_resolved=is_resolved
+        solution_audio_path=solution_audio.path,
+        solution_audio_sha256=solution_audio.sha256,
+        solution_audio_metadata=solution_audio.metadata,
+        is_resolved=is_resolved,
+        observations=observations,
+        commit=False
     )
     
-    # Update observations if provided
-    if observations:
-        incident.observations = observations
-        db.commit()
-        db.refresh(incident)
+    after_commit(db, lambda: _enqueue_audio_jobs(incident.id, "solution"))
     
     # Get user info for response
-    user = crud_user.get(db, id=current_user["id"])
+    user = await async_crud_user.get(db, id=current_user["id"])
     
     # Construir respuesta manualmente
     response = IncidentResponse(
@@ -228,23 +289,160 @@ async def add_solution_audio(
         created_at=incident.created_at,
         updated_at=incident.updated_at,
         user_name=user.name,
-        user_lastname=user.lastname
+        user_lastname=user.lastname,
+        **{field: getattr(incident, field) for field in AUDIO_METADATA_FIELDS},
     )
     
     return response
 
 
+@router.patch("/bulk-status", response_model=IncidentBulkStatusResult)
+def bulk_update_status(
+    *,
+    db: Session = Depends(get_uow_db),
+    current_user: dict = Depends(require_supervisor_or_admin),
+    update_in: IncidentBulkStatusUpdate,
+) -> Any:
+    """
+    Set the status of many incidents at once, given their IDs or a filter.
+    Supervisors can only change incidents created by operators. Incidents
+    that do not exist, are not allowed or already have the status are
+    left out of the returned IDs.
+    """
+    if (update_in.ids is None) == (update_in.filter is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either ids or filter",
+        )
+    filters = update_in.filter.model_dump(exclude_none=True) if update_in.filter else {}
+    if update_in.filter is not None and not filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The filter needs at least one condition",
+        )
+    
+    ids = crud_incident.bulk_update_status(
+        db,
+        status=update_in.status,
+        ids=update_in.ids,
+        user_id=filters.get("user_id"),
+        current_status=filters.get("status"),
+        created_after=filters.get("created_after"),
+        created_before=filters.get("created_before"),
+        operators_only=current_user["role"] == "supervisor",
+        commit=False,
+    )
+    return IncidentBulkStatusResult(status=update_in.status, updated=len(ids), ids=ids)
+
+
+@router.get("/search", response_model=List[IncidentWithUser])
+def search_incidents(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_supervisor_or_admin),
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in title or observations"),
+    skip: int = 0,
+    limit: int = Query(50, le=200),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    incident_status: Optional[IncidentStatus] = Query(None, alias="status", description="Filter by status"),
+) -> Any:
+    """
+    Full-text search over incident titles and observations, best matches
+    first. Same access as listing incidents: admin and supervisors.
+    """
+    rows = crud_incident.search(
+        db, q, user_id=user_id, status=incident_status, skip=skip, limit=limit
+    )
+    return model_list_response(rows, IncidentWithUser)
+
+
+@router.get("/stats", response_model=IncidentStats)
+def read_incident_stats(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(require_supervisor_or_admin),
+    date_from: Optional[date] = Query(None, description="First creation day (default: 30 days before date_to)"),
+    date_to: Optional[date] = Query(None, description="Last creation day, inclusive (default: today, UTC)"),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+) -> Any:
+    """
+    Incident counts by current status, per creation day and per operator.
+    Served from the incident_daily_stats rollup, so the cost does not
+    grow with the number of incidents.
+    """
+    if date_to is None:
+        date_to = datetime.now(timezone.utc).date()
+    if date_from is None:
+        date_from = date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
+        )
+    if (date_to - date_from).days >= STATS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The range can span at most {STATS_MAX_DAYS} days",
+        )
+    return crud_incident_stats.get_summary(
+        db, date_from=date_from, date_to=date_to, user_id=user_id
+    )
+
+
+@router.get("/export")
+def export_incidents(
+    current_user: dict = Depends(require_supervisor_or_admin),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    incident_status: Optional[IncidentStatus] = Query(None, alias="status", description="Filter by status"),
+    min_duration: Optional[float] = Query(None, ge=0, description="Minimum problem audio duration (seconds)"),
+    max_duration: Optional[float] = Query(None, ge=0, description="Maximum problem audio duration (seconds)"),
+) -> Any:
+    """
+    Export every incident matching the list filters as NDJSON or CSV,
+    newest first, with the same fields as IncidentWithUser.
+    The rows are streamed from a server-side cursor: memory use does not
+    depend on how many incidents are exported.
+    """
+    filters = {
+        "user_id": user_id, "status": incident_status,
+        "min_duration": min_duration, "max_duration": max_duration,
+    }
+    
+    def rows():
+        # Sesión propia: la respuesta se sigue enviando después de que
+        # terminan las dependencias de la ruta
+        db = SessionLocal()
+        try:
+            yield from crud_incident.iter_with_user(db, **filters)
+        finally:
+            db.close()
+    
+    if export_format == "csv":
+        body = csv_chunks(rows(), fieldnames=list(IncidentWithUser.model_fields))
+        media_type = "text/csv"
+    else:
+        body = ndjson_chunks(rows())
+        media_type = "application/x-ndjson"
+    filename = f"incidents-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{incident_id}", response_model=IncidentWithUser)
 def read_incident(
     incident_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ) -> Any:
     """
     Get incident by ID.
+    Answers 304 when If-None-Match still matches its ETag.
     """
-    incident = crud_incident.get(db, id=incident_id)
-    if not incident:
+    version = crud_incident.get_version_with_user(db, id=incident_id)
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Incident not found",
@@ -252,32 +450,26 @@ def read_incident(
     
     # Check permissions
     if current_user["role"] in ["operator"]:
-        if incident.user_id != current_user["id"]:
+        if version.user_id != current_user["id"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not enough permissions",
             )
     
-    user = crud_user.get(db, id=incident.user_id)
-    response = IncidentWithUser.from_orm(incident)
-    response.user_name = user.name
-    response.user_lastname = user.lastname
-    response.user_email = user.email
-    response.user_role = user.role.value
+    headers = revalidation_headers(version)
+    cached = not_modified(request, headers)
+    if cached is not None:
+        return cached
+    response.headers.update(headers)
     
-    return response
+    # Incidente y datos del usuario en una sola consulta
+    return crud_incident.get_with_user(db, id=incident_id)
 
 
-@router.get("/{incident_id}/audio/{audio_type}")
-def get_audio_url(
-    incident_id: int,
-    audio_type: str,
-    current_user: dict = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-) -> Any:
+def _get_audio_path(db: Session, incident_id: int, audio_type: str, current_user: dict) -> str:
     """
-    Get audio file URL.
-    audio_type: 'problem' or 'solution'
+    Resolve the stored path of an incident's audio, applying the same
+    permission checks for every way the audio is served.
     """
     incident = crud_incident.get(db, id=incident_id)
     if not incident:
@@ -308,22 +500,126 @@ def get_audio_url(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid audio type. Use 'problem' or 'solution'",
         )
+    return audio_path
+
+
+@router.get("/{incident_id}/audio/{audio_type}")
+def get_audio_url(
+    incident_id: int,
+    audio_type: str,
+    current_user: dict = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get audio file URL.
+    audio_type: 'problem' or 'solution'
+    stream_url requires the same bearer token and supports Range requests.
+    With the S3 backend audio_url is a short-lived presigned URL.
+    """
+    audio_path = _get_audio_path(db, incident_id, audio_type, current_user)
     
     audio_url = audio_storage.get_audio_url(audio_path)
-    return {"audio_url": f"/{audio_url}"}
+    if not audio_storage.backend.supports_presigned_urls:
+        audio_url = f"/{audio_url}"
+    return {
+        "audio_url": audio_url,
+        "stream_url": f"{settings.API_V1_PREFIX}/incidents/{incident_id}/audio/{audio_type}/stream",
+    }
+
+
+@router.api_route("/{incident_id}/audio/{audio_type}/stream", methods=["GET", "HEAD"])
+def stream_audio(
+    incident_id: int,
+    audio_type: str,
+    request: Request,
+    current_user: dict = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Stream the audio file after checking permissions.
+    Supports Range (206 Partial Content), ETag/If-None-Match and
+    Last-Modified/If-Modified-Since.
+    With the S3 backend the client is redirected to a presigned URL and
+    downloads straight from the store.
+    """
+    audio_path = _get_audio_path(db, incident_id, audio_type, current_user)
+    media_type = mimetypes.guess_type(audio_path)[0] or "application/octet-stream"
+    
+    local_path = audio_storage.backend.local_path(audio_path)
+    if local_path is None:
+        url = audio_storage.backend.presigned_get_url(
+            audio_path, settings.S3_PRESIGN_EXPIRES, content_type=media_type
+        )
+        return RedirectResponse(
+            url, status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+            headers={"cache-control": "private, no-store"},
+        )
+    
+    if not os.path.isfile(local_path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found",
+        )
+    
+    return RangeFileResponse(
+        local_path,
+        request.headers,
+        method=request.method,
+        media_type=media_type,
+        headers={"cache-control": "private, max-age=0, must-revalidate"},
+    )
+
+
+@router.get("/{incident_id}/audio/{audio_type}/peaks")
+def get_audio_peaks(
+    incident_id: int,
+    audio_type: str,
+    request: Request,
+    current_user: dict = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Waveform peaks of the audio in audiowaveform binary format (v1, 8-bit
+    min/max pairs). Peaks never change for a given audio file, so they are
+    cacheable for a long time; the ETag changes if the audio is replaced.
+    404 with Retry-After while they are still being generated.
+    """
+    audio_path = _get_audio_path(db, incident_id, audio_type, current_user)
+    peaks_path = audio_storage.peaks_path(audio_path)
+    etag = f'"{os.path.basename(peaks_path)}"'
+    headers = {
+        "cache-control": "private, max-age=31536000, immutable",
+        "etag": etag,
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    info = audio_storage.backend.head(peaks_path)
+    if info is None:
+        peaks_worker.enqueue(incident_id, audio_type)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Waveform peaks are not ready yet",
+            headers={"Retry-After": "5"},
+        )
+    peaks = audio_storage.backend.read_range(peaks_path, 0, info["size"])
+    return Response(content=peaks, media_type=PEAKS_MIME_TYPE, headers=headers)
 
 
 @router.get("/user/{user_id}", response_model=List[IncidentResponse])
 def read_user_incidents(
     user_id: int,
+    request: Request,
     current_user: dict = Depends(require_supervisor_or_admin),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(get_cursor),
 ) -> Any:
     """
     Get incidents for a specific user.
     Admin and supervisors only.
+    The cursor for the next page is returned in the X-Next-Cursor header.
     """
     # Check if user exists
     user = crud_user.get(db, id=user_id)
@@ -341,16 +637,23 @@ def read_user_incidents(
                 detail="Supervisors can only view operator incidents",
             )
     
+    versions = crud_incident.get_versions_by_user(
+        db, user_id=user_id, skip=skip, limit=limit, cursor=cursor
+    )
+    headers = revalidation_headers(user.id, user.updated_at, versions)
+    cursor_next = next_cursor(versions, limit)
+    if cursor_next:
+        headers["X-Next-Cursor"] = cursor_next
+    cached = not_modified(request, headers)
+    if cached is not None:
+        return cached
+    
     incidents = crud_incident.get_multi_by_user(
-        db, user_id=user_id, skip=skip, limit=limit
+        db, user_id=user_id, skip=skip, limit=limit, cursor=cursor
     )
     
     # Add user info for response
-    result = []
-    for incident in incidents:
-        response = IncidentResponse.from_orm(incident)
-        response.user_name = user.name
-        response.user_lastname = user.lastname
-        result.append(response)
-    
-    return result
\ No newline at end of file
+    return model_list_response(
+        incidents, IncidentResponse, headers=headers,
+        user_name=user.name, user_lastname=user.lastname,
+    )
\ No newline at end of file
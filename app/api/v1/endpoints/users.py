@@ -1,23 +1,29 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
-from ...deps import get_db, require_admin, require_supervisor_or_admin, get_current_active_user
-from ...deps import get_db, get_current_active_user, require_admin
+from ...deps import UnitOfWorkRoute, get_current_active_user, get_cursor, get_db, get_uow_db, require_admin, require_supervisor_or_admin
+from ....core.cache import principal_cache
+from ....core.database import after_commit
+from ....crud.incident import CRUDIncident
 from ....crud.user import CRUDUser
 from ....models.user import UserRole
 from ....schemas.user import UserResponse, UserUpdate, UserCreate
-from ....crud.incident import CRUDIncident
 
 from ....schemas.incident import IncidentResponse
+from ....utils.pagination import next_cursor
+from ....utils.responses import model_list_response, not_modified, revalidation_headers
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
-# Crear instancia del CRUD
+# Crear instancias del CRUD
 crud_user = CRUDUser()
+crud_incident = CRUDIncident()
 
 
 @router.get("/", response_model=List[UserResponse])
 def read_users(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: dict = Depends(require_supervisor_or_admin),
     skip: int = 0,
@@ -26,26 +32,25 @@ def read_users(
 ) -> Any:
     """
     Retrieve users.
+    Answers 304 when If-None-Match still matches the page's ETag.
     """
-    if current_user["role"] == UserRole.admin:
-        if role:
-            users = db.query(crud_user.model).filter(
-                crud_user.model.role == role,
-                crud_user.model.is_active == True
-            ).offset(skip).limit(limit).all()
-        else:
-            users = crud_user.get_multi(db, skip=skip, limit=limit)
-    else:  # Supervisor
+    if current_user["role"] != UserRole.admin:
         # Supervisors can only see operators
-        users = crud_user.get_operators(db, skip=skip, limit=limit)
+        role = UserRole.operator
+    
+    headers = revalidation_headers(crud_user.get_list_versions(db, role=role, skip=skip, limit=limit))
+    cached = not_modified(request, headers)
+    if cached is not None:
+        return cached
     
-    return users
+    users = crud_user.get_list(db, role=role, skip=skip, limit=limit)
+    return model_list_response(users, UserResponse, headers=headers)
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def create_user(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     current_user: dict = Depends(require_admin),
     user_in: UserCreate,
     role: UserRole = UserRole.operator,
@@ -60,11 +65,8 @@ def create_user(
             detail="A user with this email already exists",
         )
     
-    user = crud_user.create(db, obj_in=user_in)
-    user.role = role
-    user.is_verified = True  # Admin created users are auto-verified
-    db.commit()
-    db.refresh(user)
+    # Admin created users are auto-verified
+    user = crud_user.create(db, obj_in=user_in, role=role, is_verified=True, commit=False)
     
     return user
 
@@ -72,14 +74,17 @@ def create_user(
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user_by_id(
     user_id: int,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(require_supervisor_or_admin),
     db: Session = Depends(get_db),
 ) -> Any:
     """
     Get a specific user by id.
+    Answers 304 when If-None-Match still matches its ETag.
     """
-    user = crud_user.get(db, id=user_id)
-    if not user:
+    version = crud_user.get_version(db, id=user_id)
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
@@ -87,19 +92,25 @@ def read_user_by_id(
     
     # Check permissions
     if current_user["role"] == UserRole.supervisor:
-        if user.role != UserRole.operator:
+        if version.role != UserRole.operator:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Supervisors can only view operators",
             )
     
-    return user
+    headers = revalidation_headers(version)
+    cached = not_modified(request, headers)
+    if cached is not None:
+        return cached
+    response.headers.update(headers)
+    
+    return crud_user.get(db, id=user_id)
 
 
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     current_user: dict = Depends(require_supervisor_or_admin),
     user_id: int,
     user_in: UserUpdate,
@@ -128,14 +139,17 @@ def update_user(
                 detail="Supervisors cannot change user roles",
             )
     
-    user = crud_user.update(db, db_obj=user, obj_in=user_in)
+    user = crud_user.update(db, db_obj=user, obj_in=user_in, commit=False)
+    after_commit(db, lambda: principal_cache.invalidate(user.id))
+    # Las páginas de incidentes en caché llevan nombre, email y rol del usuario
+    crud_incident.invalidate_pages(db)
     return user
 
 
 @router.delete("/{user_id}", response_model=UserResponse)
 def delete_user(
     *,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_uow_db),
     current_user: dict = Depends(require_supervisor_or_admin),
     user_id: int,
 ) -> Any:
@@ -157,52 +171,46 @@ def delete_user(
                 detail="Supervisors can only delete operators",
             )
     
-    # Soft delete (deactivate)
-    user.is_active = False
-    db.commit()
-    db.refresh(user)
+    # Soft delete (deactivate); update() bumps token_version
+    user = crud_user.update(db, db_obj=user, obj_in={"is_active": False}, commit=False)
+    after_commit(db, lambda: principal_cache.invalidate(user.id))
     
     return user
 
 
 @router.get("/me/incidents", response_model=List[IncidentResponse])
 def get_my_incidents(
+    request: Request,
     current_user: dict = Depends(get_current_active_user),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Depends(get_cursor),
 ) -> Any:
     """
     Get incidents for the current user.
+    The cursor for the next page is returned in the X-Next-Cursor header.
     """
-    # Usar el CRUD de incidents para obtener los incidentes del usuario
-    from ....crud.incident import CRUDIncident
-    crud_incident = CRUDIncident()
+    # Obtener información del usuario
+    user = crud_user.get(db, id=current_user["id"])
     
-    incidents = crud_incident.get_multi_by_user(
-        db, user_id=current_user["id"], skip=skip, limit=limit
+    versions = crud_incident.get_versions_by_user(
+        db, user_id=current_user["id"], skip=skip, limit=limit, cursor=cursor
     )
+    headers = revalidation_headers(user.id, user.updated_at, versions)
+    cursor_next = next_cursor(versions, limit)
+    if cursor_next:
+        headers["X-Next-Cursor"] = cursor_next
+    cached = not_modified(request, headers)
+    if cached is not None:
+        return cached
     
-    # Obtener información del usuario
-    user = crud_user.get(db, id=current_user["id"])
+    incidents = crud_incident.get_multi_by_user(
+        db, user_id=current_user["id"], skip=skip, limit=limit, cursor=cursor
+    )
     
     # Convertir a IncidentResponse
-    result = []
-    for incident in incidents:
-        response = IncidentResponse(
-            id=incident.id,
-            title=incident.title,
-            problem_audio_path=incident.problem_audio_path,
-            solution_audio_path=incident.solution_audio_path,
-            observations=incident.observations,
-            status=incident.status,
-            is_resolved=incident.is_resolved,
-            user_id=incident.user_id,
-            created_at=incident.created_at,
-            updated_at=incident.updated_at,
-            user_name=user.name,
-            user_lastname=user.lastname
-        )
-        result.append(response)
-    
-    return result
\ No newline at end of file
+    return model_list_response(
+        incidents, IncidentResponse, headers=headers,
+        user_name=user.name, user_lastname=user.lastname,
+    )
\ No newline at end of file
@@ -0,0 +1,246 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+from .config import settings
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry TTL and LRU eviction.
+    A ttl or maxsize of 0 disables caching.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+class ResultCacheBackend:
+    """Storage for ResultCache: entries plus one generation counter per namespace"""
+    
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+    
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+    
+    def generation(self, namespace: str) -> int:
+        raise NotImplementedError
+    
+    def bump(self, namespace: str) -> None:
+        raise NotImplementedError
+
+
+class LocalResultBackend(ResultCacheBackend):
+    """In-process LRU. Writes made by other workers are only seen after the TTL."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        self._entries.set(key, value)
+    
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+    
+    def bump(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            # Las entradas de generaciones anteriores ya no se pueden leer
+            self._entries.clear()
+    
+    def stats(self) -> dict:
+        stats = self._entries.stats()
+        return {"size": stats["size"], "maxsize": stats["maxsize"], "ttl": stats["ttl"]}
+
+
+class RedisResultBackend(ResultCacheBackend):
+    """
+    Redis-protocol backend shared by all workers: entries are pickled and
+    expire after `ttl`, generations are INCR counters. Old generations are
+    never deleted, they just stop being read and expire.
+    `client` is any redis-py compatible client (redis.Redis, fakeredis, ...).
+    """
+    
+    def __init__(self, client, ttl: float, prefix: str = "results:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+    
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisResultBackend":
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+    
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+    
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(
+            self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=max(1, int(self.ttl))
+        )
+    
+    def generation(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}gen:{namespace}") or 0)
+    
+    def bump(self, namespace: str) -> None:
+        self.client.incr(f"{self.prefix}gen:{namespace}")
+    
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, "shared_backend": True}
+
+
+class ResultCache:
+    """
+    Query results keyed by (namespace, generation, key). Writers bump the
+    namespace's generation after they commit, so every entry read before
+    the write stops matching at once without listing or deleting keys.
+    A failing backend is counted and skipped: reads fall back to the query.
+    """
+    
+    def __init__(self, backend: ResultCacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bumps = 0
+        self.errors = 0
+    
+    def get_or_set(self, namespace: str, key: str, compute: Callable[[], Any]) -> Any:
+        """Cached value for key, or compute() stored under the current generation"""
+        if not self.enabled:
+            return compute()
+        try:
+            # La generación se lee antes de consultar: si una escritura la
+            # sube mientras tanto, el resultado queda en una clave que ya
+            # nadie lee
+            full_key = f"{namespace}:{self.backend.generation(namespace)}:{key}"
+            value = self.backend.get(full_key)
+        except Exception as e:
+            print(f"Result cache unavailable: {e}")
+            self._count("errors")
+            return compute()
+        if value is not None:
+            self._count("hits")
+            return value
+        self._count("misses")
+        value = compute()
+        try:
+            self.backend.set(full_key, value)
+        except Exception as e:
+            print(f"Result cache unavailable: {e}")
+            self._count("errors")
+        return value
+    
+    def bump(self, namespace: str) -> None:
+        """Invalidate every cached result of the namespace"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.bump(namespace)
+            self._count("bumps")
+        except Exception as e:
+            print(f"Result cache unavailable: {e}")
+            self._count("errors")
+    
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.bumps,
+                "errors": self.errors,
+            }
+        stats.update(self.backend.stats())
+        return stats
+
+
+# Principal (id, email, role, is_verified) of authenticated users, by user id
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Pages of GET /incidents/ (see CRUDIncident.get_multi_with_user)
+result_cache = ResultCache(
+    backend=(
+        RedisResultBackend.from_url(
+            settings.RESULT_CACHE_REDIS_URL, ttl=settings.RESULT_CACHE_TTL_SECONDS
+        )
+        if settings.RESULT_CACHE_REDIS_URL
+        else LocalResultBackend(
+            maxsize=settings.RESULT_CACHE_MAX_SIZE, ttl=settings.RESULT_CACHE_TTL_SECONDS
+        )
+    ),
+    enabled=settings.RESULT_CACHE_TTL_SECONDS > 0 and (
+        settings.RESULT_CACHE_MAX_SIZE > 0 or bool(settings.RESULT_CACHE_REDIS_URL)
+    ),
+)
@@ -17,16 +17,78 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Argon2 cost and the process pool that runs it (0 workers = inline)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 10.0
+    
+    # Embed role/is_verified/is_active/token_version claims in access tokens
+    # so get_current_user only needs a token_version lookup
+    AUTH_STATELESS_CLAIMS: bool = False
+    
+    # Token revocation (/auth/logout). Without a Redis URL revocations
+    # stay local to the worker that received them.
+    REVOCATION_REDIS_URL: Optional[str] = None
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    
+    # Principal cache used by get_current_user (0 disables it)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    
+    # Result cache for incident listings (0 disables it). Without a Redis URL
+    # each worker keeps its own LRU, and writes handled by another worker
+    # show up there only after the TTL.
+    RESULT_CACHE_TTL_SECONDS: int = 60
+    RESULT_CACHE_MAX_SIZE: int = 1000
+    RESULT_CACHE_REDIS_URL: Optional[str] = None
+    
     # Email
     SMTP_HOST: Optional[str] = None
     SMTP_PORT: Optional[int] = None
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     EMAILS_FROM_EMAIL: Optional[str] = "noreply@agent-api.com"
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_BATCH_SIZE: int = 20
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_DELAY: float = 2.0  # seconds, doubles on each retry
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 60.0  # close the pooled connection after this
     
     # File upload
     MAX_AUDIO_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_AUDIO_TYPES: List[str] = ["audio/mpeg", "audio/wav", "audio/ogg"]
+    # Public /static mount. Turn off once clients use the authenticated
+    # /incidents/{id}/audio/{type}/stream endpoint.
+    SERVE_STATIC_AUDIO: bool = True
+    # Uploads in progress (local backend). Must stay outside static/ so the
+    # public mount never serves a partial or unchecked file.
+    AUDIO_STAGING_DIR: str = "storage/staging"
+    
+    # Audio storage: "local" (disk/shared volume) or "s3" (any S3-compatible store)
+    STORAGE_BACKEND: str = "local"
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://minio:9000
+    S3_REGION: Optional[str] = "us-east-1"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_KEY_PREFIX: str = "audio"
+    S3_PRESIGN_EXPIRES: int = 900  # seconds
+    
+    # Background transcoding of uploads to Opus/OGG (needs ffmpeg with libopus)
+    TRANSCODE_ENABLED: bool = True
+    TRANSCODE_WORKERS: int = 2
+    TRANSCODE_BITRATE: str = "32k"
+    TRANSCODE_FFMPEG: str = "ffmpeg"
+    TRANSCODE_TIMEOUT: float = 300.0  # seconds per file
+    
+    # Waveform peaks for /incidents/{id}/audio/{type}/peaks (100 points per second by default)
+    PEAKS_ENABLED: bool = True
+    PEAKS_WORKERS: int = 1
+    PEAKS_SAMPLE_RATE: int = 8000
+    PEAKS_SAMPLES_PER_PIXEL: int = 80
     
     @validator("DATABASE_URL")
     def validate_database_url(cls, v):
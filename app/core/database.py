@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
+from typing import Callable, Union
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
 
 engine = create_engine(
@@ -11,14 +15,100 @@ engine = create_engine(
     max_overflow=20
 )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Como en AsyncSessionLocal, los objetos no se expiran al hacer commit: las
+# escrituras del CRUD ya traen la fila completa con RETURNING y no hace
+# falta volver a leerla.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 Base = declarative_base()
 
+# SQLite guarda CURRENT_TIMESTAMP como texto "YYYY-MM-DD HH:MM:SS" y compara
+# texto: los datetime que enlaza SQLAlchemy usan ese mismo formato (sin
+# microsegundos), si no `created_at = :cursor` nunca coincide con la fila
+# del cursor. En PostgreSQL es un timestamptz normal.
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def after_commit(db: Union[Session, AsyncSession], callback: Callable[[], None]) -> None:
+    """
+    Run callback once the session's current transaction commits (queue
+    jobs, send emails, invalidate caches). Nothing runs on rollback.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    
+    def on_commit(_session):
+        event.remove(session, "after_rollback", on_rollback)
+        callback()
+    
+    def on_rollback(_session):
+        event.remove(session, "after_commit", on_commit)
+    
+    event.listen(session, "after_commit", on_commit, once=True)
+    event.listen(session, "after_rollback", on_rollback, once=True)
+
+
+def after_rollback(db: Union[Session, AsyncSession], callback: Callable[[], None]) -> None:
+    """
+    Run callback if the session's current transaction ends without
+    committing, rolled back or closed (undo side effects made for it,
+    such as stored files). Nothing runs on commit.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    
+    def on_end(_session, _transaction):
+        event.remove(session, "after_commit", on_commit)
+        callback()
+    
+    def on_commit(_session):
+        event.remove(session, "after_transaction_end", on_end)
+    
+    event.listen(session, "after_commit", on_commit, once=True)
+    event.listen(session, "after_transaction_end", on_end, once=True)
+
+
+def _async_engine_options(database_url: str):
+    """
+    Translate the sync DATABASE_URL into its async driver equivalent
+    (psycopg2 -> asyncpg, pysqlite -> aiosqlite) plus engine kwargs.
+    """
+    url = make_url(database_url.replace("postgres://", "postgresql://", 1))
+    options = {"pool_pre_ping": True, "pool_recycle": 300}
+    
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+        # asyncpg no entiende sslmode=..., usa ssl=...
+        if "sslmode" in url.query:
+            options["connect_args"] = {"ssl": url.query["sslmode"]}
+            url = url.difference_update_query(["sslmode"])
+        options.update(pool_size=10, max_overflow=20)
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    
+    return url, options
+
+
+_async_url, _async_options = _async_engine_options(settings.DATABASE_URL)
+
+async_engine = create_async_engine(_async_url, **_async_options)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
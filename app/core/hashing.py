@@ -0,0 +1,112 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+from fastapi import HTTPException
+
+# Estas funciones corren en los procesos del pool: no deben importar settings
+# ni nada del resto de la app.
+
+
+def _hash_in_worker(password: str, params: Dict[str, int], submitted_at: float) -> Tuple[str, float]:
+    started_at = time.time()
+    return PasswordHasher(**params).hash(password), started_at
+
+
+def _verify_in_worker(
+    hashed_password: str, plain_password: str, params: Dict[str, int], submitted_at: float
+) -> Tuple[bool, float]:
+    started_at = time.time()
+    try:
+        return PasswordHasher(**params).verify(hashed_password, plain_password), started_at
+    except VerifyMismatchError:
+        return False, started_at
+    except Exception:
+        return False, started_at
+
+
+class PasswordHashPool:
+    """
+    Runs Argon2 in a bounded process pool so hashing neither holds the GIL
+    nor ties up the request threads.
+
+    At most `max_pending` hashes are queued or running; callers beyond that
+    wait up to `queue_timeout` seconds and then get a 503. With workers=0
+    hashing runs inline (useful for tests and scripts).
+    """
+
+    def __init__(self, params: Dict[str, int], workers: int, max_pending: int, queue_timeout: float):
+        self.params = params
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: el proceso de la API tiene hilos (uvicorn, pub/sub), no es seguro hacer fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _run(self, fn: Callable[..., Tuple[Any, float]], *args) -> Any:
+        if self.workers <= 0:
+            result, _ = fn(*args, self.params, time.time())
+            return result
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            submitted_at = time.time()
+            result, started_at = self._get_executor().submit(fn, *args, self.params, submitted_at).result()
+        finally:
+            self._slots.release()
+
+        queue_time = max(0.0, started_at - submitted_at)
+        with self._lock:
+            self.completed += 1
+            self.queue_time_total += queue_time
+            self.queue_time_max = max(self.queue_time_max, queue_time)
+        return result
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_in_worker, password)
+
+    def verify(self, hashed_password: str, plain_password: str) -> bool:
+        return self._run(_verify_in_worker, hashed_password, plain_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_time_avg": self.queue_time_total / self.completed if self.completed else 0.0,
+                "queue_time_max": self.queue_time_max,
+                **self.params,
+            }
@@ -0,0 +1,186 @@
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from .config import settings
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter. Answers "definitely not present" without
+    false negatives; sized for `capacity` items at `error_rate`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationBackend:
+    """Shared store that propagates revocations between workers"""
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        raise NotImplementedError
+
+    def load(self) -> Iterable[Tuple[str, float]]:
+        """Revocations that are still live, to warm up a new worker"""
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[str, float], None]) -> None:
+        """Call callback(jti, expires_at) for revocations made by other workers"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class RedisRevocationBackend(RevocationBackend):
+    """
+    Redis-protocol backend: one key per revoked jti (expiring with the
+    token) plus a pub/sub channel to notify the other workers.
+    `client` is any redis-py compatible client (redis.Redis, fakeredis, ...).
+    """
+
+    def __init__(self, client, prefix: str = "revoked:", channel: str = "token-revocations"):
+        self.client = client
+        self.prefix = prefix
+        self.channel = channel
+        self._pubsub_thread = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisRevocationBackend":
+        import redis
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        ttl = max(1, int(math.ceil(expires_at - time.time())))
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + jti, str(expires_at), ex=ttl)
+        pipe.publish(self.channel, f"{jti}:{expires_at}")
+        pipe.execute()
+
+    def load(self) -> Iterable[Tuple[str, float]]:
+        for key in self.client.scan_iter(match=self.prefix + "*", count=1000):
+            value = self.client.get(key)
+            if value is not None:
+                yield _as_str(key)[len(self.prefix):], float(value)
+
+    def subscribe(self, callback: Callable[[str, float], None]) -> None:
+        def handler(message):
+            jti, _, expires_at = _as_str(message["data"]).rpartition(":")
+            if jti:
+                callback(jti, float(expires_at))
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: handler})
+        self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def close(self) -> None:
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+            self._pubsub_thread = None
+
+
+def _as_str(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RevocationStore:
+    """
+    Revoked token ids (jti) until their expiry.
+
+    Lookups are answered from memory: a Bloom filter rejects the common
+    not-revoked case, and only filter hits consult the expiring set. An
+    optional backend shares revocations between workers.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[RevocationBackend] = None,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+    ):
+        self.backend = backend
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._revoked: Dict[str, float] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._next_purge = time.monotonic() + 60
+
+    def start(self) -> None:
+        if self.backend is None:
+            return
+        for jti, expires_at in self.backend.load():
+            self._add_local(jti, expires_at)
+        self.backend.subscribe(self._add_local)
+
+    def stop(self) -> None:
+        if self.backend is not None:
+            self.backend.close()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        self._add_local(jti, expires_at)
+        if self.backend is not None:
+            self.backend.revoke(jti, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        with self._lock:
+            expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _add_local(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._bloom.add(jti)
+            if time.monotonic() >= self._next_purge or len(self._revoked) > self.capacity:
+                self._purge()
+
+    def _purge(self) -> None:
+        """Drop expired entries and rebuild the filter (lock held)"""
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._bloom = BloomFilter(max(self.capacity, len(self._revoked) * 2), self.error_rate)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+        self._next_purge = time.monotonic() + 60
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "revoked": len(self._revoked),
+                "bloom_bits": self._bloom.num_bits,
+                "bloom_hashes": self._bloom.num_hashes,
+                "shared_backend": self.backend is not None,
+            }
+
+
+revocation_store = RevocationStore(
+    backend=(
+        RedisRevocationBackend.from_url(settings.REVOCATION_REDIS_URL)
+        if settings.REVOCATION_REDIS_URL else None
+    ),
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+)
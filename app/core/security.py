@@ -1,17 +1,34 @@
+import uuid
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Union
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
 from .config import settings
+from .hashing import PasswordHashPool
+from .revocation import revocation_store
+
+argon2_params = {
+    "time_cost": settings.ARGON2_TIME_COST,
+    "memory_cost": settings.ARGON2_MEMORY_COST,
+    "parallelism": settings.ARGON2_PARALLELISM,
+}
 
 # Para compatibilidad con Passlib (usaremos Argon2 directamente)
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-argon2_hasher = PasswordHasher()
+argon2_hasher = PasswordHasher(**argon2_params)
+
+password_hash_pool = PasswordHashPool(
+    params=argon2_params,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT,
+)
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -19,7 +36,12 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        **(claims or {}),
+        "exp": expire,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+    }
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -27,27 +49,47 @@ def create_access_token(
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    try:
-        argon2_hasher.verify(hashed_password, plain_password)
-        return True
-    except VerifyMismatchError:
-        return False
-    except Exception:
-        return False
+    return password_hash_pool.verify(hashed_password, plain_password)
 
 
 def get_password_hash(password: str) -> str:
-    return argon2_hasher.hash(password)
+    return password_hash_pool.hash(password)
 
 
-def verify_token(token: str) -> Optional[str]:
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with different Argon2 parameters"""
+    try:
+        return argon2_hasher.check_needs_rehash(hashed_password)
+    except Exception:
+        return False
+
+
+def decode_token(token: str) -> Optional[Dict[str, Any]]:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    if payload.get("sub") is None:
+        return None
+    jti = payload.get("jti")
+    if jti and revocation_store.is_revoked(jti):
+        return None
+    return payload
+
+
+def revoke_token(payload: Dict[str, Any]) -> bool:
+    """Revoke a decoded token until it expires. Returns False if it has no jti."""
+    jti = payload.get("jti")
+    if not jti:
+        return False
+    revocation_store.revoke(jti, float(payload["exp"]))
+    return True
+
+
+def verify_token(token: str) -> Optional[str]:
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload["sub"]
\ No newline at end of file
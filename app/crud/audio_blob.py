@@ -0,0 +1,99 @@
+from typing import Optional
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.audio_blob import AudioBlob
+from .base import AsyncCRUDBase, CRUDBase, dialect_insert
+
+
+class _AudioBlobQueries:
+    """
+    Reference counting for content-addressed audio. No method commits:
+    the caller commits together with the incident that takes or drops
+    the reference.
+    """
+    
+    def _acquire_stmt(self, db, *, sha256: str, path: str, mime_type: str, size: int):
+        stmt = dialect_insert(db, AudioBlob).values(
+            sha256=sha256, path=path, mime_type=mime_type, size=size, ref_count=1
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[AudioBlob.sha256],
+            set_={"ref_count": AudioBlob.ref_count + 1},
+        )
+    
+    def _release_stmt(self, sha256: str):
+        return (
+            update(AudioBlob)
+            .where(AudioBlob.sha256 == sha256)
+            .values(ref_count=AudioBlob.ref_count - 1)
+            .returning(AudioBlob.ref_count, AudioBlob.path)
+        )
+    
+    def _delete_unreferenced_stmt(self, sha256: str):
+        return delete(AudioBlob).where(AudioBlob.sha256 == sha256, AudioBlob.ref_count <= 0)
+    
+    def _lock_stmt(self, db, *, sha256: str, path: str):
+        # Sin fila se inserta una con ref_count 0: un acquire concurrente
+        # espera a esta transacción en lugar de crear la suya
+        stmt = dialect_insert(db, AudioBlob).values(
+            sha256=sha256, path=path, mime_type="application/octet-stream", size=0, ref_count=0
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[AudioBlob.sha256],
+            set_={"ref_count": AudioBlob.ref_count},
+        ).returning(AudioBlob.ref_count)
+
+
+class CRUDAudioBlob(_AudioBlobQueries, CRUDBase):
+    def __init__(self):
+        super().__init__(AudioBlob)
+    
+    def get_by_path(self, db: Session, path: str) -> Optional[AudioBlob]:
+        return db.query(AudioBlob).filter(AudioBlob.path == path).first()
+    
+    def get_by_sha256(self, db: Session, sha256: str) -> Optional[AudioBlob]:
+        return db.get(AudioBlob, sha256)
+    
+    def acquire(self, db: Session, *, sha256: str, path: str, mime_type: str, size: int) -> None:
+        """Register a reference to the blob, creating its row if needed"""
+        db.execute(self._acquire_stmt(db, sha256=sha256, path=path, mime_type=mime_type, size=size))
+    
+    def release(self, db: Session, *, sha256: str) -> Optional[str]:
+        """
+        Drop a reference. Returns the blob path when it was the last one
+        (the row is deleted; the caller unlinks the file after commit).
+        """
+        row = db.execute(self._release_stmt(sha256)).first()
+        if row is None or row.ref_count > 0:
+            return None
+        db.execute(self._delete_unreferenced_stmt(sha256))
+        return row.path
+    
+    def lock_unreferenced(self, db: Session, *, sha256: str, path: str) -> bool:
+        """
+        Lock the blob's row, creating a placeholder if it is gone, before
+        unlinking its file. True when nobody references the blob; call
+        delete_unreferenced() and commit once the file is removed.
+        """
+        return db.execute(self._lock_stmt(db, sha256=sha256, path=path)).scalar_one() <= 0
+    
+    def delete_unreferenced(self, db: Session, *, sha256: str) -> None:
+        db.execute(self._delete_unreferenced_stmt(sha256))
+
+
+class AsyncCRUDAudioBlob(_AudioBlobQueries, AsyncCRUDBase):
+    def __init__(self):
+        super().__init__(AudioBlob)
+    
+    async def acquire(
+        self, db: AsyncSession, *, sha256: str, path: str, mime_type: str, size: int
+    ) -> None:
+        await db.execute(self._acquire_stmt(db, sha256=sha256, path=path, mime_type=mime_type, size=size))
+    
+    async def release(self, db: AsyncSession, *, sha256: str) -> Optional[str]:
+        row = (await db.execute(self._release_stmt(sha256))).first()
+        if row is None or row.ref_count > 0:
+            return None
+        await db.execute(self._delete_unreferenced_stmt(sha256))
+        return row.path
@@ -1,19 +1,113 @@
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..utils.pagination import decode_cursor
 
 
-class CRUDBase:
+def dialect_insert(db: Union[Session, AsyncSession], model: Type[Any]):
+    """
+    INSERT construct of the session's dialect, which provides
+    on_conflict_do_update / on_conflict_do_nothing for upserts.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(model)
+
+
+def row_version(model: Type[Any]):
+    """
+    When a row last changed: coalesce(updated_at, created_at). Used for
+    ETags, compared for equality only (SQLite stores whole seconds).
+    """
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+class _CRUDCommon:
     def __init__(self, model: Type[Any]):
         """
-        CRUD object with default methods to Create, Read, Update, Delete.
+        Query helpers shared by the sync and async CRUD objects.
         
         Args:
             model: A SQLAlchemy model class
         """
         self.model = model
 
+    def _apply_keyset(self, query, cursor: Optional[str] = None):
+        """
+        Order by (created_at, id) descending and, if a cursor is given,
+        continue right after the row it points to.
+        Works on both legacy Query objects and select() statements.
+        """
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    self.model.created_at < created_at,
+                    and_(self.model.created_at == created_at, self.model.id < last_id),
+                )
+            )
+        return query.order_by(self.model.created_at.desc(), self.model.id.desc())
+
+    def _update_data(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.dict(exclude_unset=True)
+
+    def _create_data(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return jsonable_encoder(obj_in)
+
+    def _column_values(self, update_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Only the fields that are attributes of the model"""
+        return {field: value for field, value in update_data.items() if hasattr(self.model, field)}
+
+    # Escrituras con RETURNING: cada sentencia devuelve la fila completa, así
+    # no hace falta un SELECT (refresh) después de escribir.
+
+    def _insert_stmt(self):
+        """
+        Multi-row INSERT ... RETURNING for a list of parameter dicts; the
+        objects come back in the same order as the dicts.
+        """
+        return insert(self.model).returning(self.model, sort_by_parameter_order=True)
+
+    def _returning(self, stmt):
+        """
+        ORM objects for the rows an UPDATE/DELETE ... RETURNING touched.
+        Objects already in the session are refreshed in place.
+        """
+        return (
+            select(self.model)
+            .from_statement(stmt.returning(self.model))
+            .execution_options(populate_existing=True)
+        )
+
+    def _update_stmt(self, ids: Sequence[Any], values: Dict[str, Any]):
+        return self._returning(update(self.model).where(self.model.id.in_(ids)).values(values))
+
+    def _delete_stmt(self, ids: Sequence[Any]):
+        return self._returning(delete(self.model).where(self.model.id.in_(ids)))
+
+
+class CRUDBase(_CRUDCommon):
+    def __init__(self, model: Type[Any]):
+        """
+        CRUD object with default methods to Create, Read, Update, Delete.
+        
+        Args:
+            model: A SQLAlchemy model class
+        """
+        super().__init__(model)
+
     def get(self, db: Session, id: Any) -> Optional[Any]:
         """
         Get a single record by ID.
@@ -28,57 +122,228 @@ class CRUDBase:
         """
         return db.query(self.model).offset(skip).limit(limit).all()
 
-    def create(self, db: Session, *, obj_in: BaseModel) -> Any:
+    def get_multi_keyset(
+        self, db: Session, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> List[Any]:
+        """
+        Get multiple records with keyset pagination on (created_at, id).
+        """
+        return self._apply_keyset(db.query(self.model), cursor).limit(limit).all()
+
+    def _commit(self, db: Session, commit: bool) -> None:
+        """
+        Commit, or only flush when the caller owns the transaction
+        (commit=False, e.g. the request's unit of work in api/deps.py).
+        """
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+
+    def create(self, db: Session, *, obj_in: BaseModel, commit: bool = True) -> Any:
         """
         Create a new record.
         """
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.create_with_data(db, obj_in=self._create_data(obj_in), commit=commit)
 
-    def create_with_data(self, db: Session, *, obj_in: Dict[str, Any]) -> Any:
+    def create_with_data(self, db: Session, *, obj_in: Dict[str, Any], commit: bool = True) -> Any:
         """
         Create a new record from a dictionary.
         """
-        db_obj = self.model(**obj_in)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(self._insert_stmt(), [obj_in]).one()
+        self._commit(db, commit)
         return db_obj
 
+    def create_many(
+        self, db: Session, *, objs_in: Sequence[Union[BaseModel, Dict[str, Any]]],
+        commit: bool = True
+    ) -> List[Any]:
+        """
+        Create several records with multi-row INSERT ... RETURNING.
+        Returns them in the order given.
+        """
+        rows = [self._create_data(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        db_objs = db.scalars(self._insert_stmt(), rows).all()
+        self._commit(db, commit)
+        return list(db_objs)
+
     def update(
         self,
         db: Session,
         *,
         db_obj: Any,
-        obj_in: Union[BaseModel, Dict[str, Any]]
+        obj_in: Union[BaseModel, Dict[str, Any]],
+        commit: bool = True
     ) -> Any:
         """
-        Update a record.
+        Update a record. db_obj is refreshed from the UPDATE's RETURNING.
         """
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        
-        for field in update_data:
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, update_data[field])
+        values = self._column_values(self._update_data(obj_in))
+        if not values:
+            return db_obj
+        db.scalars(self._update_stmt([db_obj.id], values)).all()
+        self._commit(db, commit)
+        return db_obj
+
+    def update_many(
+        self, db: Session, *, ids: Sequence[Any], obj_in: Union[BaseModel, Dict[str, Any]],
+        commit: bool = True
+    ) -> List[Any]:
+        """
+        Apply the same changes to several records in one UPDATE ... RETURNING.
+        Returns the records that exist, updated.
+        """
+        values = self._column_values(self._update_data(obj_in))
+        if not ids or not values:
+            return []
+        db_objs = db.scalars(self._update_stmt(ids, values)).all()
+        self._commit(db, commit)
+        return list(db_objs)
+
+    def remove(self, db: Session, *, id: int, commit: bool = True) -> Any:
+        """
+        Remove a record by ID.
+        """
+        removed = self.remove_many(db, ids=[id], commit=commit)
+        return removed[0] if removed else None
+
+    def remove_many(self, db: Session, *, ids: Sequence[Any], commit: bool = True) -> List[Any]:
+        """
+        Remove several records in one DELETE ... RETURNING.
+        Returns the removed records (detached from the session).
+        """
+        if not ids:
+            return []
+        db_objs = db.scalars(self._delete_stmt(ids)).all()
+        for db_obj in db_objs:
+            db.expunge(db_obj)
+        self._commit(db, commit)
+        return list(db_objs)
+
+
+class AsyncCRUDBase(_CRUDCommon):
+    def __init__(self, model: Type[Any]):
+        """
+        Async CRUD object for AsyncSession, mirroring CRUDBase.
         
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        Args:
+            model: A SQLAlchemy model class
+        """
+        super().__init__(model)
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[Any]:
+        """
+        Get a single record by ID.
+        """
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[Any]:
+        """
+        Get multiple records with pagination.
+        """
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def get_multi_keyset(
+        self, db: AsyncSession, *, cursor: Optional[str] = None, limit: int = 100
+    ) -> List[Any]:
+        """
+        Get multiple records with keyset pagination on (created_at, id).
+        """
+        stmt = self._apply_keyset(select(self.model), cursor).limit(limit)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def _commit(self, db: AsyncSession, commit: bool) -> None:
+        """Commit, or only flush when the caller owns the transaction"""
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+
+    async def create(self, db: AsyncSession, *, obj_in: BaseModel, commit: bool = True) -> Any:
+        """
+        Create a new record.
+        """
+        return await self.create_with_data(db, obj_in=self._create_data(obj_in), commit=commit)
+
+    async def create_with_data(
+        self, db: AsyncSession, *, obj_in: Dict[str, Any], commit: bool = True
+    ) -> Any:
+        """
+        Create a new record from a dictionary.
+        """
+        db_obj = (await db.scalars(self._insert_stmt(), [obj_in])).one()
+        await self._commit(db, commit)
+        return db_obj
+
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[Union[BaseModel, Dict[str, Any]]],
+        commit: bool = True
+    ) -> List[Any]:
+        """
+        Create several records with multi-row INSERT ... RETURNING.
+        """
+        rows = [self._create_data(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        db_objs = (await db.scalars(self._insert_stmt(), rows)).all()
+        await self._commit(db, commit)
+        return list(db_objs)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Any,
+        obj_in: Union[BaseModel, Dict[str, Any]],
+        commit: bool = True
+    ) -> Any:
+        """
+        Update a record. db_obj is refreshed from the UPDATE's RETURNING.
+        """
+        values = self._column_values(self._update_data(obj_in))
+        if not values:
+            return db_obj
+        (await db.scalars(self._update_stmt([db_obj.id], values))).all()
+        await self._commit(db, commit)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> Any:
+    async def update_many(
+        self, db: AsyncSession, *, ids: Sequence[Any], obj_in: Union[BaseModel, Dict[str, Any]],
+        commit: bool = True
+    ) -> List[Any]:
+        """
+        Apply the same changes to several records in one UPDATE ... RETURNING.
+        """
+        values = self._column_values(self._update_data(obj_in))
+        if not ids or not values:
+            return []
+        db_objs = (await db.scalars(self._update_stmt(ids, values))).all()
+        await self._commit(db, commit)
+        return list(db_objs)
+
+    async def remove(self, db: AsyncSession, *, id: int, commit: bool = True) -> Any:
         """
         Remove a record by ID.
         """
-        obj = db.query(self.model).filter(self.model.id == id).first()
-        if obj:
-            db.delete(obj)
-            db.commit()
-        return obj
\ No newline at end of file
+        removed = await self.remove_many(db, ids=[id], commit=commit)
+        return removed[0] if removed else None
+
+    async def remove_many(
+        self, db: AsyncSession, *, ids: Sequence[Any], commit: bool = True
+    ) -> List[Any]:
+        """
+        Remove several records in one DELETE ... RETURNING.
+        """
+        if not ids:
+            return []
+        db_objs = (await db.scalars(self._delete_stmt(ids))).all()
+        for db_obj in db_objs:
+            db.expunge(db_obj)
+        await self._commit(db, commit)
+        return list(db_objs)
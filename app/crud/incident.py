@@ -1,58 +1,718 @@
-from typing import Optional, List
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, List, Sequence, Tuple
+from sqlalchemy import ARRAY, Integer, any_, bindparam, column, func, literal_column, or_, select, table, text, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..core.cache import result_cache
+from ..core.database import after_commit
 from ..models.incident import Incident, IncidentStatus
+from ..models.user import User, UserRole
 from ..schemas.incident import IncidentCreate, IncidentUpdate
-from .base import CRUDBase
+from ..utils.audio_metadata import AudioMetadata
+from .base import AsyncCRUDBase, CRUDBase, row_version
+from .incident_stats import AsyncCRUDIncidentStats, CRUDIncidentStats, incident_day
 
+# Orden alternativo de los listados (el default es keyset por created_at)
+DURATION_SORTS = ("duration", "-duration")
 
-class CRUDIncident(CRUDBase):
+AUDIO_METADATA_FIELDS = tuple(
+    f"{audio_type}_audio_{name}"
+    for audio_type in ("problem", "solution")
+    for name in ("duration", "codec", "sample_rate", "bitrate", "size")
+)
+
+
+def audio_metadata_columns(audio_type: str, metadata: Optional[AudioMetadata]) -> Dict[str, Any]:
+    """Incident column values for the metadata of the problem/solution audio"""
+    if metadata is None:
+        return {}
+    return {
+        f"{audio_type}_audio_duration": metadata.duration,
+        f"{audio_type}_audio_codec": metadata.codec,
+        f"{audio_type}_audio_sample_rate": metadata.sample_rate,
+        f"{audio_type}_audio_bitrate": metadata.bitrate,
+        f"{audio_type}_audio_size": metadata.size,
+    }
+
+
+# Rollup de estadísticas, actualizado en la misma transacción que cada escritura
+crud_incident_stats = CRUDIncidentStats()
+async_crud_incident_stats = AsyncCRUDIncidentStats()
+
+# Namespace de result_cache con las páginas de get_page_with_user y sus versiones
+INCIDENT_PAGES = "incident-pages"
+
+
+class _IncidentQueries:
+    """Statement builders shared by CRUDIncident and AsyncCRUDIncident"""
+    
+    def invalidate_pages(self, db) -> None:
+        """
+        Drop the cached incident pages once the current transaction
+        commits. Called by every write that changes what the pages show.
+        """
+        after_commit(db, lambda: result_cache.bump(INCIDENT_PAGES))
+    
+    def _apply_filters(
+        self, query, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+    ):
+        if user_id:
+            query = query.filter(Incident.user_id == user_id)
+        
+        if status:
+            query = query.filter(Incident.status == status)
+        
+        # Duración del audio del problema, en segundos
+        if min_duration is not None:
+            query = query.filter(Incident.problem_audio_duration >= min_duration)
+        if max_duration is not None:
+            query = query.filter(Incident.problem_audio_duration <= max_duration)
+        
+        return query
+    
+    def _apply_order(self, query, *, sort: Optional[str] = None, cursor: Optional[str] = None):
+        """Keyset order by created_at, or offset pagination by audio duration"""
+        if sort in DURATION_SORTS:
+            duration = Incident.problem_audio_duration
+            if sort == "-duration":
+                return query.order_by(duration.desc().nulls_last(), Incident.id.desc())
+            return query.order_by(duration.asc().nulls_last(), Incident.id.asc())
+        return self._apply_keyset(query, cursor)
+    
+    def _with_user_select(self):
+        """Incident columns plus the owner's, shaped like IncidentWithUser"""
+        return select(
+            Incident.id,
+            Incident.title,
+            Incident.problem_audio_path,
+            Incident.solution_audio_path,
+            Incident.observations,
+            Incident.status,
+            Incident.is_resolved,
+            Incident.user_id,
+            Incident.created_at,
+            Incident.updated_at,
+            Incident.problem_audio_duration,
+            Incident.problem_audio_codec,
+            Incident.problem_audio_sample_rate,
+            Incident.problem_audio_bitrate,
+            Incident.problem_audio_size,
+            Incident.solution_audio_duration,
+            Incident.solution_audio_codec,
+            Incident.solution_audio_sample_rate,
+            Incident.solution_audio_bitrate,
+            Incident.solution_audio_size,
+            User.name.label("user_name"),
+            User.lastname.label("user_lastname"),
+            User.email.label("user_email"),
+            User.role.label("user_role"),
+        ).join(User, User.id == Incident.user_id)
+    
+    def _with_user_stmt(
+        self, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ):
+        stmt = self._with_user_select()
+        stmt = self._apply_filters(
+            stmt, user_id=user_id, status=status,
+            min_duration=min_duration, max_duration=max_duration,
+        )
+        return self._apply_order(stmt, sort=sort, cursor=cursor).offset(skip).limit(limit)
+    
+    def _versions_stmt(self, stmt):
+        """
+        Same rows as a _with_user_select() statement (filters, order, page),
+        reduced to what identifies their current version: enough for an
+        ETag and for the next cursor.
+        """
+        return stmt.with_only_columns(
+            Incident.id,
+            Incident.created_at,
+            Incident.user_id,
+            row_version(Incident).label("version"),
+            row_version(User).label("user_version"),
+        )
+
+    def _export_stmt(
+        self, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None
+    ):
+        """Every incident matching the list filters, newest first, no pagination"""
+        stmt = self._apply_filters(
+            self._with_user_select(), user_id=user_id, status=status,
+            min_duration=min_duration, max_duration=max_duration,
+        )
+        return self._apply_keyset(stmt)
+    
+    def _search_stmt(
+        self, dialect: str, q: str, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ):
+        """
+        Full-text search over title and observations, best matches first
+        (title weighs more). PostgreSQL uses the generated search_vector
+        column and its GIN index; SQLite the incidents_fts FTS5 table.
+        Returns None when q has nothing searchable.
+        """
+        stmt = self._with_user_select()
+        if dialect == "postgresql":
+            query = func.websearch_to_tsquery("simple", q)
+            vector = literal_column("incidents.search_vector")
+            stmt = stmt.where(vector.op("@@")(query))
+            rank = func.ts_rank_cd(vector, query).desc()
+        elif dialect == "sqlite":
+            # Cada palabra como frase entre comillas: sin operadores FTS5 del usuario
+            terms = re.findall(r"\w+", q)
+            if not terms:
+                return None
+            match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            fts = table("incidents_fts", column("rowid"))
+            stmt = stmt.join(fts, fts.c.rowid == Incident.id).where(
+                text("incidents_fts MATCH :match").bindparams(match=match)
+            )
+            rank = text("bm25(incidents_fts, 2.0, 1.0)")
+        else:
+            raise NotImplementedError(f"Search is not supported on {dialect}")
+        stmt = self._apply_filters(stmt, user_id=user_id, status=status)
+        return (
+            stmt.order_by(rank, Incident.created_at.desc(), Incident.id.desc())
+            .offset(skip).limit(limit)
+        )
+    
+    def _bulk_target_stmt(
+        self, dialect: str, *, status: IncidentStatus,
+        ids: Optional[Sequence[int]] = None,
+        user_id: Optional[int] = None,
+        current_status: Optional[IncidentStatus] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        operators_only: bool = False
+    ):
+        """
+        Incidents a bulk status update applies to: those matching the
+        ids/filters and the permission rule that are not already in
+        `status`, locked, with their current status, operator and day.
+        """
+        target = (
+            select(Incident.id, Incident.status, Incident.user_id, incident_day().label("day"))
+            .join(User, User.id == Incident.user_id)
+            .where(Incident.status != status)
+        )
+        if ids is not None:
+            if dialect == "postgresql":
+                # Un solo parámetro array: mismo plan para cualquier cantidad de IDs
+                target = target.where(Incident.id == any_(bindparam("ids", list(ids), type_=ARRAY(Integer))))
+            else:
+                target = target.where(Incident.id.in_(ids))
+        target = self._apply_filters(target, user_id=user_id, status=current_status)
+        if created_after is not None:
+            target = target.where(Incident.created_at >= created_after)
+        if created_before is not None:
+            target = target.where(Incident.created_at < created_before)
+        if operators_only:
+            target = target.where(User.role == UserRole.operator)
+        return target.with_for_update(of=Incident)
+    
+    def _locked_status_stmt(self, incident_id: int):
+        """
+        Current status of one incident, with the row locked until commit
+        (like _bulk_target_stmt). The rollup delta must come from this, not
+        from db_obj.status: two concurrent changes would both subtract from
+        the same old bucket.
+        """
+        return select(Incident.status).where(Incident.id == incident_id).with_for_update()
+    
+    def _status_values(self, status: IncidentStatus) -> Dict[str, Any]:
+        return {"status": status, "is_resolved": status == IncidentStatus.resolved}
+    
+    def _audio_columns(self, audio_type: str):
+        if audio_type == "problem":
+            return Incident.problem_audio_path, Incident.problem_audio_sha256
+        if audio_type == "solution":
+            return Incident.solution_audio_path, Incident.solution_audio_sha256
+        raise ValueError(f"Invalid audio type: {audio_type}")
+    
+    def _solution_values(
+        self, *, solution_audio_path: str, is_resolved: bool,
+        solution_audio_sha256: Optional[str] = None,
+        solution_audio_metadata: Optional[AudioMetadata] = None,
+        observations: Optional[str] = None
+    ) -> Dict[str, Any]:
+        values = {
+            "solution_audio_path": solution_audio_path,
+            "solution_audio_sha256": solution_audio_sha256,
+            **audio_metadata_columns("solution", solution_audio_metadata),
+            **self._status_values(IncidentStatus.resolved if is_resolved else IncidentStatus.unresolved),
+        }
+        if observations:
+            values["observations"] = observations
+        return values
+
+
+class CRUDIncident(_IncidentQueries, CRUDBase):
     def __init__(self):
         super().__init__(Incident)
     
+    def create_with_data(self, db: Session, *, obj_in: Dict[str, Any], commit: bool = True) -> Incident:
+        """Create an incident and count it in the stats rollup"""
+        db_obj = db.scalars(self._insert_stmt(), [obj_in]).one()
+        crud_incident_stats.bump(db, incident_id=db_obj.id, status=db_obj.status)
+        self.invalidate_pages(db)
+        self._commit(db, commit)
+        return db_obj
+    
     def get_multi_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Incident]:
-        return db.query(Incident).filter(
-            Incident.user_id == user_id
-        ).offset(skip).limit(limit).all()
+        query = db.query(Incident).filter(Incident.user_id == user_id)
+        return self._apply_keyset(query, cursor).offset(skip).limit(limit).all()
     
     def get_multi_with_filters(
         self, db: Session, *, 
         user_id: Optional[int] = None,
         status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
         skip: int = 0, 
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Incident]:
-        query = db.query(Incident)
-        
-        if user_id:
-            query = query.filter(Incident.user_id == user_id)
-        
-        if status:
-            query = query.filter(Incident.status == status)
-        
-        return query.order_by(Incident.created_at.desc()).offset(skip).limit(limit).all()
+        query = self._apply_filters(
+            db.query(Incident), user_id=user_id, status=status,
+            min_duration=min_duration, max_duration=max_duration,
+        )
+        return self._apply_order(query, sort=sort, cursor=cursor).offset(skip).limit(limit).all()
+    
+    def get_multi_with_user(
+        self, db: Session, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Same filters as get_multi_with_filters, but joins the owner in the
+        same statement and returns rows shaped like IncidentWithUser.
+        """
+        stmt = self._with_user_stmt(
+            user_id=user_id, status=status, min_duration=min_duration,
+            max_duration=max_duration, sort=sort, skip=skip, limit=limit, cursor=cursor
+        )
+        return [dict(row._mapping) for row in db.execute(stmt)]
+    
+    def get_page_with_user(
+        self, db: Session, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        get_multi_with_user rows served from result_cache until the next
+        incident write. The rows may be shared between requests: don't
+        modify them.
+        """
+        filters = dict(
+            user_id=user_id, status=status, min_duration=min_duration,
+            max_duration=max_duration, sort=sort, skip=skip, limit=limit, cursor=cursor
+        )
+        stmt = self._with_user_stmt(**filters)
+        return result_cache.get_or_set(
+            INCIDENT_PAGES, "rows:" + repr(sorted(filters.items())),
+            lambda: [dict(row._mapping) for row in db.execute(stmt)],
+        )
+    
+    def get_with_user(self, db: Session, *, id: int) -> Optional[Dict[str, Any]]:
+        """One incident shaped like IncidentWithUser, or None"""
+        row = db.execute(self._with_user_select().where(Incident.id == id)).first()
+        return dict(row._mapping) if row else None
+    
+    def get_versions_with_user(
+        self, db: Session, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        (id, created_at, user_id, version, user_version) of the
+        get_page_with_user page: its ETag and next cursor without loading
+        the rows. Cached like the page itself.
+        """
+        filters = dict(
+            user_id=user_id, status=status, min_duration=min_duration,
+            max_duration=max_duration, sort=sort, skip=skip, limit=limit, cursor=cursor
+        )
+        stmt = self._versions_stmt(self._with_user_stmt(**filters))
+        return result_cache.get_or_set(
+            INCIDENT_PAGES, "versions:" + repr(sorted(filters.items())),
+            lambda: [dict(row._mapping) for row in db.execute(stmt)],
+        )
+    
+    def get_version_with_user(self, db: Session, *, id: int) -> Optional[Row]:
+        """(id, created_at, user_id, version, user_version) of one incident, or None"""
+        stmt = self._versions_stmt(self._with_user_select().where(Incident.id == id))
+        return db.execute(stmt).first()
+    
+    def get_versions_by_user(
+        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Row]:
+        """(id, created_at, version) of the get_multi_by_user page"""
+        stmt = select(Incident.id, Incident.created_at, row_version(Incident).label("version"))
+        stmt = stmt.where(Incident.user_id == user_id)
+        return db.execute(self._apply_keyset(stmt, cursor).offset(skip).limit(limit)).all()
+    
+    def iter_with_user(
+        self, db: Session, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream rows shaped like IncidentWithUser for exports. The rows come
+        from a server-side cursor, batch_size at a time, so memory does not
+        grow with the number of incidents. The session stays busy until
+        the iterator is exhausted or closed.
+        """
+        stmt = self._export_stmt(
+            user_id=user_id, status=status, min_duration=min_duration, max_duration=max_duration
+        ).execution_options(yield_per=batch_size)
+        for row in db.execute(stmt).mappings():
+            yield dict(row)
+    
+    def search(
+        self, db: Session, q: str, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Ranked full-text search, rows shaped like IncidentWithUser"""
+        stmt = self._search_stmt(
+            db.get_bind().dialect.name, q, user_id=user_id, status=status, skip=skip, limit=limit
+        )
+        if stmt is None:
+            return []
+        return [dict(row._mapping) for row in db.execute(stmt)]
+    
+    def swap_audio(
+        self, db: Session, *, incident_id: int, audio_type: str,
+        old_path: str, new_path: str, new_sha256: Optional[str],
+        metadata: Optional[AudioMetadata] = None
+    ) -> bool:
+        """
+        Point the incident at a new audio file only if it still references
+        old_path (compare-and-swap). Does not commit. Returns False when
+        the incident changed or disappeared in the meantime.
+        """
+        path_col, sha_col = self._audio_columns(audio_type)
+        result = db.execute(
+            update(Incident)
+            .where(Incident.id == incident_id, path_col == old_path)
+            .values({
+                path_col: new_path, sha_col: new_sha256,
+                **audio_metadata_columns(audio_type, metadata),
+            })
+        )
+        if result.rowcount != 1:
+            return False
+        self.invalidate_pages(db)
+        return True
+    
+    def get_audio_not_matching(
+        self, db: Session, *, extension: str, after_id: int = 0, limit: int = 1000
+    ) -> List[Tuple[int, str]]:
+        """(incident_id, audio_type) pairs whose audio file lacks the extension, by id"""
+        suffix = f"%.{extension}"
+        rows = (
+            db.query(Incident.id, Incident.problem_audio_path, Incident.solution_audio_path)
+            .filter(Incident.id > after_id)
+            .filter(or_(
+                Incident.problem_audio_path.notlike(suffix),
+                Incident.solution_audio_path.notlike(suffix),
+            ))
+            .order_by(Incident.id)
+            .limit(limit)
+            .all()
+        )
+        pending = []
+        for incident_id, problem_path, solution_path in rows:
+            if not problem_path.endswith(suffix[1:]):
+                pending.append((incident_id, "problem"))
+            if solution_path and not solution_path.endswith(suffix[1:]):
+                pending.append((incident_id, "solution"))
+        return pending
+    
+    def set_audio_metadata(
+        self, db: Session, *, incident_id: int, audio_type: str,
+        audio_path: str, metadata: AudioMetadata
+    ) -> bool:
+        """Store metadata if the incident still points at audio_path. Does not commit."""
+        path_col, _ = self._audio_columns(audio_type)
+        result = db.execute(
+            update(Incident)
+            .where(Incident.id == incident_id, path_col == audio_path)
+            .values(audio_metadata_columns(audio_type, metadata))
+        )
+        if result.rowcount != 1:
+            return False
+        self.invalidate_pages(db)
+        return True
+    
+    def get_missing_audio_metadata(
+        self, db: Session, *, after_id: int = 0, limit: int = 500
+    ) -> List[Tuple[int, str, str]]:
+        """(incident_id, audio_type, path) of audio without metadata, by id"""
+        rows = (
+            db.query(Incident.id, Incident.problem_audio_path, Incident.solution_audio_path,
+                     Incident.problem_audio_size, Incident.solution_audio_size)
+            .filter(Incident.id > after_id)
+            .filter(or_(
+                Incident.problem_audio_size.is_(None),
+                (Incident.solution_audio_path.isnot(None) & Incident.solution_audio_size.is_(None)),
+            ))
+            .order_by(Incident.id)
+            .limit(limit)
+            .all()
+        )
+        missing = []
+        for incident_id, problem_path, solution_path, problem_size, solution_size in rows:
+            if problem_size is None:
+                missing.append((incident_id, "problem", problem_path))
+            if solution_path and solution_size is None:
+                missing.append((incident_id, "solution", solution_path))
+        return missing
     
     def update_status(
-        self, db: Session, *, db_obj: Incident, status: IncidentStatus, is_resolved: bool
+        self, db: Session, *, db_obj: Incident, status: IncidentStatus, is_resolved: bool,
+        commit: bool = True
     ) -> Incident:
-        db_obj.status = status
-        db_obj.is_resolved = is_resolved
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        old_status = db.execute(self._locked_status_stmt(db_obj.id)).scalar_one()
+        crud_incident_stats.status_changed(
+            db, incident_id=db_obj.id, old_status=old_status, new_status=status
+        )
+        db.scalars(self._update_stmt([db_obj.id], {"status": status, "is_resolved": is_resolved})).all()
+        self.invalidate_pages(db)
+        self._commit(db, commit)
         return db_obj
     
+    def bulk_update_status(
+        self, db: Session, *, status: IncidentStatus,
+        ids: Optional[Sequence[int]] = None,
+        user_id: Optional[int] = None,
+        current_status: Optional[IncidentStatus] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        operators_only: bool = False,
+        commit: bool = True
+    ) -> List[int]:
+        """
+        Set the status of many incidents in one statement and move their
+        stats counters in the same transaction. Incidents that are
+        missing, not allowed or already in that status are skipped.
+        Returns the IDs that changed.
+        """
+        dialect = db.get_bind().dialect.name
+        target = self._bulk_target_stmt(
+            dialect, status=status, ids=ids, user_id=user_id,
+            current_status=current_status, created_after=created_after,
+            created_before=created_before, operators_only=operators_only,
+        )
+        if dialect == "postgresql":
+            # UPDATE ... FROM (SELECT ... FOR UPDATE) ... RETURNING: un solo
+            # viaje, y el estado anterior sale de la subconsulta
+            target = target.subquery()
+            rows = db.execute(
+                update(Incident)
+                .where(Incident.id == target.c.id)
+                .values(self._status_values(status))
+                .returning(Incident.id, target.c.status, target.c.user_id, target.c.day)
+            ).all()
+        else:
+            # SQLite no deja leer la subconsulta desde RETURNING: se leen las
+            # filas y se actualizan en la misma transacción (un solo escritor)
+            rows = db.execute(target).all()
+            if rows:
+                db.execute(
+                    update(Incident)
+                    .where(Incident.id.in_(target.with_only_columns(Incident.id).scalar_subquery()))
+                    .values(self._status_values(status))
+                )
+        
+        # (id, estado anterior, operador, día) -> deltas del rollup
+        deltas = Counter()
+        for _, old_status, row_user_id, day in rows:
+            deltas[(day, row_user_id, IncidentStatus(old_status))] -= 1
+            deltas[(day, row_user_id, status)] += 1
+        crud_incident_stats.apply_deltas(db, deltas)
+        if rows:
+            self.invalidate_pages(db)
+        self._commit(db, commit)
+        return sorted(row[0] for row in rows)
+    
     def add_solution_audio(
-        self, db: Session, *, db_obj: Incident, solution_audio_path: str, is_resolved: bool
+        self, db: Session, *, db_obj: Incident, solution_audio_path: str, is_resolved: bool,
+        solution_audio_sha256: Optional[str] = None,
+        solution_audio_metadata: Optional[AudioMetadata] = None,
+        observations: Optional[str] = None,
+        commit: bool = True
     ) -> Incident:
-        db_obj.solution_audio_path = solution_audio_path
-        if is_resolved:
-            db_obj.status = IncidentStatus.resolved
-        else:
-            db_obj.status = IncidentStatus.unresolved
-        db_obj.is_resolved = is_resolved
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
\ No newline at end of file
+        values = self._solution_values(
+            solution_audio_path=solution_audio_path, is_resolved=is_resolved,
+            solution_audio_sha256=solution_audio_sha256,
+            solution_audio_metadata=solution_audio_metadata, observations=observations
+        )
+        old_status = db.execute(self._locked_status_stmt(db_obj.id)).scalar_one()
+        crud_incident_stats.status_changed(
+            db, incident_id=db_obj.id, old_status=old_status, new_status=values["status"]
+        )
+        db.scalars(self._update_stmt([db_obj.id], values)).all()
+        self.invalidate_pages(db)
+        self._commit(db, commit)
+        return db_obj
+
+
+class AsyncCRUDIncident(_IncidentQueries, AsyncCRUDBase):
+    def __init__(self):
+        super().__init__(Incident)
+    
+    async def create_with_data(
+        self, db: AsyncSession, *, obj_in: Dict[str, Any], commit: bool = True
+    ) -> Incident:
+        db_obj = (await db.scalars(self._insert_stmt(), [obj_in])).one()
+        await async_crud_incident_stats.bump(db, incident_id=db_obj.id, status=db_obj.status)
+        self.invalidate_pages(db)
+        await self._commit(db, commit)
+        return db_obj
+    
+    async def get_multi_by_user(
+        self, db: AsyncSession, *, user_id: int, skip: int = 0, limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Incident]:
+        stmt = select(Incident).filter(Incident.user_id == user_id)
+        stmt = self._apply_keyset(stmt, cursor).offset(skip).limit(limit)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def get_multi_with_filters(
+        self, db: AsyncSession, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Incident]:
+        stmt = self._apply_filters(
+            select(Incident), user_id=user_id, status=status,
+            min_duration=min_duration, max_duration=max_duration,
+        )
+        stmt = self._apply_order(stmt, sort=sort, cursor=cursor).offset(skip).limit(limit)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def get_multi_with_user(
+        self, db: AsyncSession, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        sort: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        stmt = self._with_user_stmt(
+            user_id=user_id, status=status, min_duration=min_duration,
+            max_duration=max_duration, sort=sort, skip=skip, limit=limit, cursor=cursor
+        )
+        result = await db.execute(stmt)
+        return [dict(row._mapping) for row in result]
+    
+    async def search(
+        self, db: AsyncSession, q: str, *,
+        user_id: Optional[int] = None,
+        status: Optional[IncidentStatus] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        stmt = self._search_stmt(
+            db.get_bind().dialect.name, q, user_id=user_id, status=status, skip=skip, limit=limit
+        )
+        if stmt is None:
+            return []
+        result = await db.execute(stmt)
+        return [dict(row._mapping) for row in result]
+    
+    async def update_status(
+        self, db: AsyncSession, *, db_obj: Incident, status: IncidentStatus, is_resolved: bool,
+        commit: bool = True
+    ) -> Incident:
+        old_status = (await db.execute(self._locked_status_stmt(db_obj.id))).scalar_one()
+        await async_crud_incident_stats.status_changed(
+            db, incident_id=db_obj.id, old_status=old_status, new_status=status
+        )
+        (await db.scalars(self._update_stmt([db_obj.id], {"status": status, "is_resolved": is_resolved}))).all()
+        self.invalidate_pages(db)
+        await self._commit(db, commit)
+        return db_obj
+    
+    async def add_solution_audio(
+        self, db: AsyncSession, *, db_obj: Incident, solution_audio_path: str, is_resolved: bool,
+        solution_audio_sha256: Optional[str] = None,
+        solution_audio_metadata: Optional[AudioMetadata] = None,
+        observations: Optional[str] = None,
+        commit: bool = True
+    ) -> Incident:
+        values = self._solution_values(
+            solution_audio_path=solution_audio_path, is_resolved=is_resolved,
+            solution_audio_sha256=solution_audio_sha256,
+            solution_audio_metadata=solution_audio_metadata, observations=observations
+        )
+        old_status = (await db.execute(self._locked_status_stmt(db_obj.id))).scalar_one()
+        await async_crud_incident_stats.status_changed(
+            db, incident_id=db_obj.id, old_status=old_status, new_status=values["status"]
+        )
+        (await db.scalars(self._update_stmt([db_obj.id], values))).all()
+        self.invalidate_pages(db)
+        await self._commit(db, commit)
+        return db_obj
@@ -0,0 +1,190 @@
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from sqlalchemy import Date, Integer, String, delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.incident import Incident, IncidentStatus
+from ..models.incident_stats import IncidentDailyStats
+from ..models.user import User
+from .base import AsyncCRUDBase, CRUDBase, dialect_insert
+
+STATUS_NAMES = tuple(status.value for status in IncidentStatus)
+
+# Filas por INSERT multi-fila en apply_deltas (SQLite admite ~32k parámetros)
+DELTA_BATCH_SIZE = 500
+
+
+def incident_day():
+    """Creation day of an incident, in the database time zone (UTC in the containers)"""
+    return func.date(Incident.created_at, type_=Date)
+
+
+def _pivot(rows, key_fields) -> List[Dict[str, Any]]:
+    """(key..., status, count) rows -> one dict per key with a count per status"""
+    grouped: Dict[tuple, Dict[str, Any]] = {}
+    for row in rows:
+        key = tuple(getattr(row, field) for field in key_fields)
+        entry = grouped.get(key)
+        if entry is None:
+            entry = dict(zip(key_fields, key))
+            entry.update({name: 0 for name in STATUS_NAMES}, total=0)
+            grouped[key] = entry
+        entry[IncidentStatus(row.status).value] += row.count
+        entry["total"] += row.count
+    return list(grouped.values())
+
+
+class _IncidentStatsQueries:
+    """
+    Incremental maintenance of incident_daily_stats. Nothing here commits:
+    the deltas go out in the same transaction as the incident write.
+    """
+
+    def _bump_stmt(
+        self, db: Union[Session, AsyncSession], *, incident_id: int,
+        status: Union[IncidentStatus, str], delta: int
+    ):
+        """
+        Add delta to the (day, operator, status) bucket of one incident.
+        Day and operator are read from the incident row itself, so this is
+        a single INSERT ... SELECT ... ON CONFLICT DO UPDATE.
+        """
+        source = select(
+            incident_day(),
+            Incident.user_id,
+            literal(IncidentStatus(status).value, String),
+            literal(delta, Integer),
+        ).where(Incident.id == incident_id)
+        stmt = dialect_insert(db, IncidentDailyStats).from_select(
+            ["day", "user_id", "status", "count"], source
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[IncidentDailyStats.day, IncidentDailyStats.user_id, IncidentDailyStats.status],
+            set_={"count": IncidentDailyStats.count + stmt.excluded.count},
+        )
+
+    def _deltas_stmt(self, db, deltas: List[Tuple[Tuple[date, int, Any], int]]):
+        stmt = dialect_insert(db, IncidentDailyStats).values([
+            {"day": day, "user_id": user_id, "status": IncidentStatus(status), "count": delta}
+            for (day, user_id, status), delta in deltas
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=[IncidentDailyStats.day, IncidentDailyStats.user_id, IncidentDailyStats.status],
+            set_={"count": IncidentDailyStats.count + stmt.excluded.count},
+        )
+
+    def _status_change_stmts(self, db, *, incident_id: int, old_status, new_status) -> list:
+        if old_status is None or IncidentStatus(old_status) == IncidentStatus(new_status):
+            return []
+        return [
+            self._bump_stmt(db, incident_id=incident_id, status=old_status, delta=-1),
+            self._bump_stmt(db, incident_id=incident_id, status=new_status, delta=1),
+        ]
+
+    def _filtered(self, stmt, *, date_from: date, date_to: date, user_id: Optional[int] = None):
+        stmt = stmt.where(IncidentDailyStats.day >= date_from, IncidentDailyStats.day <= date_to)
+        if user_id:
+            stmt = stmt.where(IncidentDailyStats.user_id == user_id)
+        return stmt
+
+    def _by_day_stmt(self, **filters):
+        count = func.sum(IncidentDailyStats.count).label("count")
+        stmt = select(IncidentDailyStats.day, IncidentDailyStats.status, count)
+        return (
+            self._filtered(stmt, **filters)
+            .group_by(IncidentDailyStats.day, IncidentDailyStats.status)
+            .order_by(IncidentDailyStats.day)
+        )
+
+    def _by_operator_stmt(self, **filters):
+        count = func.sum(IncidentDailyStats.count).label("count")
+        stmt = select(
+            IncidentDailyStats.user_id,
+            User.name.label("user_name"),
+            User.lastname.label("user_lastname"),
+            IncidentDailyStats.status,
+            count,
+        ).join(User, User.id == IncidentDailyStats.user_id)
+        return (
+            self._filtered(stmt, **filters)
+            .group_by(IncidentDailyStats.user_id, User.name, User.lastname, IncidentDailyStats.status)
+            .order_by(IncidentDailyStats.user_id)
+        )
+
+
+class CRUDIncidentStats(_IncidentStatsQueries, CRUDBase):
+    def __init__(self):
+        super().__init__(IncidentDailyStats)
+
+    def bump(self, db: Session, *, incident_id: int, status: IncidentStatus, delta: int = 1) -> None:
+        db.execute(self._bump_stmt(db, incident_id=incident_id, status=status, delta=delta))
+
+    def status_changed(self, db: Session, *, incident_id: int, old_status, new_status) -> None:
+        for stmt in self._status_change_stmts(
+            db, incident_id=incident_id, old_status=old_status, new_status=new_status
+        ):
+            db.execute(stmt)
+
+    def apply_deltas(self, db: Session, deltas: Mapping[Tuple[date, int, Any], int]) -> None:
+        """Add precomputed {(day, user_id, status): delta} counts (bulk updates)"""
+        items = [(key, delta) for key, delta in deltas.items() if delta]
+        for start in range(0, len(items), DELTA_BATCH_SIZE):
+            db.execute(self._deltas_stmt(db, items[start:start + DELTA_BATCH_SIZE]))
+
+    def get_summary(
+        self, db: Session, *, date_from: date, date_to: date, user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Counts by status per day and per operator between two days
+        (inclusive). Reads only the rollup, so the cost depends on the
+        number of days and operators, not on the number of incidents.
+        """
+        filters = {"date_from": date_from, "date_to": date_to, "user_id": user_id}
+        by_day = _pivot(db.execute(self._by_day_stmt(**filters)), ("day",))
+        by_operator = _pivot(
+            db.execute(self._by_operator_stmt(**filters)), ("user_id", "user_name", "user_lastname")
+        )
+        totals = {name: sum(entry[name] for entry in by_day) for name in STATUS_NAMES}
+        totals["total"] = sum(totals.values())
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "totals": totals,
+            "by_day": by_day,
+            "by_operator": by_operator,
+        }
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute the whole rollup from the incidents table. Does not
+        commit. On PostgreSQL the rollup is locked against concurrent
+        deltas until the caller commits. Returns the number of rows.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            db.execute(text("LOCK TABLE incident_daily_stats IN SHARE ROW EXCLUSIVE MODE"))
+        db.execute(delete(IncidentDailyStats))
+        day = incident_day()
+        source = (
+            select(day, Incident.user_id, Incident.status, func.count())
+            .group_by(day, Incident.user_id, Incident.status)
+        )
+        result = db.execute(
+            insert(IncidentDailyStats).from_select(["day", "user_id", "status", "count"], source)
+        )
+        return result.rowcount
+
+
+class AsyncCRUDIncidentStats(_IncidentStatsQueries, AsyncCRUDBase):
+    def __init__(self):
+        super().__init__(IncidentDailyStats)
+
+    async def bump(
+        self, db: AsyncSession, *, incident_id: int, status: IncidentStatus, delta: int = 1
+    ) -> None:
+        await db.execute(self._bump_stmt(db, incident_id=incident_id, status=status, delta=delta))
+
+    async def status_changed(self, db: AsyncSession, *, incident_id: int, old_status, new_status) -> None:
+        for stmt in self._status_change_stmts(
+            db, incident_id=incident_id, old_status=old_status, new_status=new_status
+        ):
+            await db.execute(stmt)
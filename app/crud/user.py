@@ -1,9 +1,25 @@
+import asyncio
 from typing import Optional, List
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..core.security import get_password_hash
+from ..core.security import get_password_hash, password_needs_rehash
 from ..models.user import User, UserRole
 from ..schemas.user import UserCreate, UserUpdate
-from .base import CRUDBase
+from .base import AsyncCRUDBase, CRUDBase, row_version
+
+
+def _with_token_bump(db_obj: User, update_data: dict) -> dict:
+    """
+    Add a token_version increment to update_data when it changes the role
+    or the active flag, so tokens carrying the old claims are rejected.
+    """
+    for field in ("role", "is_active"):
+        if field in update_data and update_data[field] is not None \
+                and update_data[field] != getattr(db_obj, field):
+            return {**update_data, "token_version": User.token_version + 1}
+    return update_data
 
 class CRUDUser(CRUDBase):
     def __init__(self):
@@ -12,29 +28,48 @@ class CRUDUser(CRUDBase):
     def get_by_email(self, db: Session, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
     
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            name=obj_in.name,
-            lastname=obj_in.lastname,
-            hashed_password=get_password_hash(obj_in.password),
-            is_verified=False
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    def create(
+        self, db: Session, *, obj_in: UserCreate,
+        role: UserRole = UserRole.operator, is_verified: bool = False, commit: bool = True
+    ) -> User:
+        return self.create_with_data(db, obj_in={
+            "email": obj_in.email,
+            "name": obj_in.name,
+            "lastname": obj_in.lastname,
+            "hashed_password": get_password_hash(obj_in.password),
+            "role": role,
+            "is_verified": is_verified
+        }, commit=commit)
     
     def update(
-        self, db: Session, *, db_obj: User, obj_in: UserUpdate
+        self, db: Session, *, db_obj: User, obj_in: UserUpdate, commit: bool = True
     ) -> User:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        return super().update(
+            db, db_obj=db_obj, obj_in=_with_token_bump(db_obj, update_data), commit=commit
+        )
+    
+    def bump_token_version(self, db_obj: User) -> None:
+        """Invalidate tokens issued with the current claims (caller commits)"""
+        db_obj.token_version = User.token_version + 1
     
-    def authenticate(self, db: Session, email: str, password: str) -> Optional[User]:
+    def get_token_version(self, db: Session, id: int) -> Optional[int]:
+        return db.query(User.token_version).filter(User.id == id).scalar()
+    
+    def token_claims(self, user: User) -> dict:
+        """Claims embedded in access tokens when AUTH_STATELESS_CLAIMS is on"""
+        return {
+            "email": user.email,
+            "role": user.role.value,
+            "is_verified": user.is_verified,
+            "is_active": user.is_active,
+            "ver": user.token_version,
+        }
+    
+    def authenticate(self, db: Session, email: str, password: str, commit: bool = True) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
             return None
@@ -43,8 +78,36 @@ class CRUDUser(CRUDBase):
         from ..core.security import verify_password
         if not verify_password(password, user.hashed_password):
             return None
+        # Re-hash with the current Argon2 parameters while we have the password
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = get_password_hash(password)
+            self._commit(db, commit)
         return user
     
+    def _list_stmt(self, columns, *, role: Optional[UserRole] = None, skip: int = 0, limit: int = 100):
+        """Users listing: every user, or the active users with a role"""
+        stmt = select(*columns)
+        if role is not None:
+            stmt = stmt.where(User.role == role, User.is_active == True)
+        return stmt.offset(skip).limit(limit)
+    
+    def get_list(
+        self, db: Session, *, role: Optional[UserRole] = None, skip: int = 0, limit: int = 100
+    ) -> List[User]:
+        return list(db.scalars(self._list_stmt([User], role=role, skip=skip, limit=limit)))
+    
+    def get_list_versions(
+        self, db: Session, *, role: Optional[UserRole] = None, skip: int = 0, limit: int = 100
+    ) -> List[Row]:
+        """(id, version) of the get_list page, for its ETag"""
+        columns = [User.id, row_version(User).label("version")]
+        return db.execute(self._list_stmt(columns, role=role, skip=skip, limit=limit)).all()
+    
+    def get_version(self, db: Session, id: int) -> Optional[Row]:
+        """(id, role, version) of one user, or None"""
+        stmt = select(User.id, User.role, row_version(User).label("version")).where(User.id == id)
+        return db.execute(stmt).first()
+    
     def get_operators(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         return db.query(User).filter(
             User.role == UserRole.operator,
@@ -61,4 +124,43 @@ class CRUDUser(CRUDBase):
         return user.is_active
     
     def is_superuser(self, user: User) -> bool:
-        return user.role == UserRole.admin
\ No newline at end of file
+        return user.role == UserRole.admin
+
+
+class AsyncCRUDUser(AsyncCRUDBase):
+    def __init__(self):
+        super().__init__(User)
+    
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        result = await db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
+    
+    async def create(
+        self, db: AsyncSession, *, obj_in: UserCreate,
+        role: UserRole = UserRole.operator, is_verified: bool = False, commit: bool = True
+    ) -> User:
+        # get_password_hash waits on the hashing pool; keep it off the event loop
+        hashed_password = await asyncio.to_thread(get_password_hash, obj_in.password)
+        return await self.create_with_data(db, obj_in={
+            "email": obj_in.email,
+            "name": obj_in.name,
+            "lastname": obj_in.lastname,
+            "hashed_password": hashed_password,
+            "role": role,
+            "is_verified": is_verified
+        }, commit=commit)
+    
+    async def update(
+        self, db: AsyncSession, *, db_obj: User, obj_in: UserUpdate, commit: bool = True
+    ) -> User:
+        update_data = _with_token_bump(db_obj, self._update_data(obj_in))
+        return await super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
+    
+    async def get_operators(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+        result = await db.execute(
+            select(User).filter(
+                User.role == UserRole.operator,
+                User.is_active == True
+            ).offset(skip).limit(limit)
+        )
+        return list(result.scalars().all())
@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from .core.cache import principal_cache, result_cache
 from .core.config import settings
+from .core.revocation import revocation_store
+from .core.security import password_hash_pool
+from .services.email import email_service
+from .services.peaks import peaks_worker
+from .services.transcoding import transcoder
+from .api.deps import require_admin
 from .api.v1.api import api_router
 
 app = FastAPI(
@@ -19,13 +26,32 @@ if settings.ALLOWED_HOSTS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files (sin autorización; ver SERVE_STATIC_AUDIO)
+if settings.SERVE_STATIC_AUDIO:
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+
+
+@app.on_event("startup")
+def startup():
+    revocation_store.start()
+    email_service.start()
+    transcoder.start()
+    peaks_worker.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    peaks_worker.stop()
+    transcoder.stop()
+    email_service.stop()
+    revocation_store.stop()
+    password_hash_pool.shutdown()
 
 
 @app.get("/")
@@ -38,5 +64,19 @@ def root():
 
 
 @app.get("/health")
-def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+async def health_check():
+    return {"status": "healthy"}
+
+
+@app.get("/metrics")
+def metrics(current_user: dict = Depends(require_admin)):
+    # Solo admins: muestra la carga de logins, colas y tamaños de caché
+    return {
+        "principal_cache": principal_cache.stats(),
+        "result_cache": result_cache.stats(),
+        "token_revocation": revocation_store.stats(),
+        "password_hashing": password_hash_pool.stats(),
+        "email_outbox": email_service.outbox.stats(),
+        "transcoding": transcoder.stats(),
+        "waveform_peaks": peaks_worker.stats(),
+    }
@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from ..core.database import Base
+
+
+class AudioBlob(Base):
+    """Stored audio file, addressed by the SHA-256 of its content"""
+    __tablename__ = "audio_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    mime_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Incidentes que referencian este archivo; se borra al llegar a 0
+    ref_count = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
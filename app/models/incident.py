@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import DDL, BigInteger, Column, Float, Integer, String, Text, Boolean, ForeignKey, Enum, Index, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
-from ..core.database import Base
+from ..core.database import Base, Timestamp
+from .audio_blob import AudioBlob  # registra audio_blobs para las FK
 
 
 class IncidentStatus(str, enum.Enum):
@@ -18,6 +19,19 @@ class Incident(Base):
     title = Column(String, nullable=False, index=True)
     problem_audio_path = Column(String, nullable=False)
     solution_audio_path = Column(String, nullable=True)
+    problem_audio_sha256 = Column(String(64), ForeignKey("audio_blobs.sha256"), nullable=True)
+    solution_audio_sha256 = Column(String(64), ForeignKey("audio_blobs.sha256"), nullable=True)
+    # Metadatos leídos de las cabeceras del archivo al guardarlo (ver migración 005)
+    problem_audio_duration = Column(Float, nullable=True)
+    problem_audio_codec = Column(String(32), nullable=True)
+    problem_audio_sample_rate = Column(Integer, nullable=True)
+    problem_audio_bitrate = Column(Integer, nullable=True)
+    problem_audio_size = Column(BigInteger, nullable=True)
+    solution_audio_duration = Column(Float, nullable=True)
+    solution_audio_codec = Column(String(32), nullable=True)
+    solution_audio_sample_rate = Column(Integer, nullable=True)
+    solution_audio_bitrate = Column(Integer, nullable=True)
+    solution_audio_size = Column(BigInteger, nullable=True)
     observations = Column(Text, nullable=True)
     status = Column(Enum(IncidentStatus), default=IncidentStatus.initiated, nullable=False)
     is_resolved = Column(Boolean, default=False, nullable=False)
@@ -26,8 +40,56 @@ class Incident(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
     
     # Relationships
-    user = relationship("User", back_populates="incidents")
\ No newline at end of file
+    user = relationship("User", back_populates="incidents")
+    
+    # Access paths for the list queries (see migration 002)
+    __table_args__ = (
+        Index("ix_incidents_created_at", created_at.desc(), id.desc()),
+        Index("ix_incidents_user_id_created_at", user_id, created_at.desc(), id.desc()),
+        Index("ix_incidents_status_created_at", status, created_at.desc(), id.desc()),
+        Index(
+            "ix_incidents_unresolved_created_at",
+            created_at.desc(), id.desc(),
+            postgresql_where=text("is_resolved = false"),
+            sqlite_where=text("is_resolved = 0"),
+        ),
+        Index("ix_incidents_problem_audio_duration", problem_audio_duration, id),
+    )
+
+
+# Búsqueda de texto completo sobre title + observations (ver migración 006).
+# La columna generada / tabla FTS no se mapean en el modelo: se crean con
+# DDL propio de cada motor, también cuando las tablas salen de create_all().
+SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE incidents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(observations, '')), 'B')) STORED",
+        "CREATE INDEX ix_incidents_search_vector ON incidents USING GIN (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE incidents_fts USING fts5("
+        "title, observations, content='incidents', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER incidents_fts_ai AFTER INSERT ON incidents BEGIN "
+        "INSERT INTO incidents_fts(rowid, title, observations) "
+        "VALUES (new.id, new.title, new.observations); END",
+        "CREATE TRIGGER incidents_fts_ad AFTER DELETE ON incidents BEGIN "
+        "INSERT INTO incidents_fts(incidents_fts, rowid, title, observations) "
+        "VALUES ('delete', old.id, old.title, old.observations); END",
+        "CREATE TRIGGER incidents_fts_au AFTER UPDATE OF title, observations ON incidents BEGIN "
+        "INSERT INTO incidents_fts(incidents_fts, rowid, title, observations) "
+        "VALUES ('delete', old.id, old.title, old.observations); "
+        "INSERT INTO incidents_fts(rowid, title, observations) "
+        "VALUES (new.id, new.title, new.observations); END",
+    ],
+}
+
+for _dialect, _statements in SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Incident.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, Enum, ForeignKey, Integer
+from ..core.database import Base
+from .incident import IncidentStatus
+
+
+class IncidentDailyStats(Base):
+    """
+    Rollup of incidents by creation day, operator and current status.
+    Kept up to date by the incident CRUD in the same transaction as each
+    write (see migration 007); rebuilt with scripts/rebuild_incident_stats.py.
+    """
+    __tablename__ = "incident_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # String en la base, como incidents.status (ver migración 001)
+    status = Column(Enum(IncidentStatus, native_enum=False, length=20), primary_key=True)
+    count = Column(Integer, default=0, server_default="0", nullable=False)
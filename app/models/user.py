@@ -1,8 +1,8 @@
-from sqlalchemy import Boolean, Column, Integer, String, Enum, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, Enum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
-from ..core.database import Base
+from ..core.database import Base, Timestamp
 
 class UserRole(str, enum.Enum):
     admin = "admin"
@@ -28,8 +28,10 @@ class User(Base):
     is_verified = Column(Boolean, default=False, nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     verification_code = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Se incrementa al cambiar rol/estado para invalidar tokens con claims
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
     
     # Relationships
     incidents = relationship("Incident", back_populates="user")
\ No newline at end of file
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from ..models.incident import IncidentStatus
 
 class IncidentBase(BaseModel):
@@ -28,6 +28,16 @@ class IncidentInDB(IncidentBase):
     user_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    problem_audio_duration: Optional[float] = None
+    problem_audio_codec: Optional[str] = None
+    problem_audio_sample_rate: Optional[int] = None
+    problem_audio_bitrate: Optional[int] = None
+    problem_audio_size: Optional[int] = None
+    solution_audio_duration: Optional[float] = None
+    solution_audio_codec: Optional[str] = None
+    solution_audio_sample_rate: Optional[int] = None
+    solution_audio_bitrate: Optional[int] = None
+    solution_audio_size: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -48,4 +58,64 @@ class IncidentWithUser(IncidentResponse):
         from_attributes = True 
 
 class IncidentAudioUpload(BaseModel):
-    is_solution: bool = False
\ No newline at end of file
+    is_solution: bool = False
+
+
+class AudioUploadRequest(BaseModel):
+    sha256: str = Field(..., pattern="^[0-9a-f]{64}$")
+    size: int = Field(..., gt=0)
+    mime_type: str
+
+
+class AudioUploadTarget(BaseModel):
+    key: str
+    url: str
+    method: str
+    headers: Dict[str, str]
+    expires_in: int
+
+
+class IncidentBulkFilter(BaseModel):
+    user_id: Optional[int] = None
+    status: Optional[IncidentStatus] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class IncidentBulkStatusUpdate(BaseModel):
+    """Target status for the incidents in `ids`, or for those matching `filter`"""
+    status: IncidentStatus
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    filter: Optional[IncidentBulkFilter] = None
+
+
+class IncidentBulkStatusResult(BaseModel):
+    status: IncidentStatus
+    updated: int
+    ids: List[int]
+
+
+class IncidentStatusCounts(BaseModel):
+    initiated: int = 0
+    resolved: int = 0
+    unresolved: int = 0
+    total: int = 0
+
+
+class IncidentDayStats(IncidentStatusCounts):
+    day: date
+
+
+class IncidentOperatorStats(IncidentStatusCounts):
+    user_id: int
+    user_name: str
+    user_lastname: str
+
+
+class IncidentStats(BaseModel):
+    """Incidents created between date_from and date_to, by current status"""
+    date_from: date
+    date_to: date
+    totals: IncidentStatusCounts
+    by_day: List[IncidentDayStats]
+    by_operator: List[IncidentOperatorStats]
@@ -0,0 +1,140 @@
+import multiprocessing
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, Set, Tuple
+from ..core.database import SessionLocal
+from ..crud.incident import CRUDIncident
+from .storage import AudioStorageService
+
+crud_incident = CRUDIncident()
+
+
+class AudioJobWorker:
+    """
+    Background jobs over an incident's audio (transcoding, peaks, ...).
+
+    Jobs (incident_id, audio_type) are queued in memory, deduplicated, and
+    run by `workers` threads; each thread hands the CPU-heavy part to a
+    process pool through submit(). Jobs still queued when the process
+    stops are lost: they must be re-triggered on demand or by a script
+    (see scripts/transcode_backfill.py).
+    """
+
+    name = "audio-job"
+
+    def __init__(
+        self,
+        storage: AudioStorageService,
+        workers: int = 1,
+        ffmpeg: str = "ffmpeg",
+        timeout: float = 300.0,
+        enabled: bool = True,
+    ):
+        self.storage = storage
+        self.workers = workers
+        self.ffmpeg = ffmpeg
+        self.timeout = timeout
+        self.enabled = enabled
+        self._queue: "queue.Queue[Optional[Tuple[int, str]]]" = queue.Queue()
+        self._queued: Set[Tuple[int, str]] = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        if not self.enabled or self.running or self.workers <= 0:
+            return
+        if shutil.which(self.ffmpeg) is None:
+            print(f"{self.name} desactivado: no se encontró {self.ffmpeg}")
+            return
+        # spawn: el proceso de la API tiene hilos, no es seguro hacer fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def enqueue(self, incident_id: int, audio_type: str) -> None:
+        if not self.running:
+            return
+        job = (incident_id, audio_type)
+        with self._lock:
+            if job in self._queued:
+                return
+            self._queued.add(job)
+        self._queue.put(job)
+
+    def submit(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) in the process pool and wait for the result"""
+        return self._executor.submit(fn, *args).result()
+
+    def current_audio_path(self, incident_id: int, audio_type: str) -> Optional[str]:
+        """Path the incident references now (None if it has no such audio)"""
+        db = SessionLocal()
+        try:
+            incident = crud_incident.get(db, id=incident_id)
+            if incident is None:
+                return None
+            if audio_type == "problem":
+                return incident.problem_audio_path
+            return incident.solution_audio_path
+        finally:
+            db.close()
+
+    def process(self, incident_id: int, audio_type: str) -> bool:
+        """Run one job. Returns False when there was nothing to do."""
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            # Sale del conjunto al empezar: si se vuelve a pedir mientras
+            # corre (p. ej. el audio cambió), se ejecuta otra vez después
+            with self._lock:
+                self._queued.discard(job)
+            try:
+                done = self.process(*job)
+                with self._lock:
+                    if done:
+                        self.completed += 1
+                    else:
+                        self.skipped += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"Error en {self.name} para incidente {job[0]} ({job[1]}): {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "workers": self.workers,
+                "queued": len(self._queued),
+                "completed": self.completed,
+                "failed": self.failed,
+                "skipped": self.skipped,
+            }
@@ -1,11 +1,190 @@
+import heapq
+import itertools
+import queue
 import smtplib
+import threading
+import time
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional, Tuple
 import secrets
 from ..core.config import settings
 
 
+class EmailOutbox:
+    """
+    In-process outbox drained by a background thread.
+
+    The worker keeps one SMTP connection open and reuses it across messages,
+    sends queued messages in batches, and retries failures with exponential
+    backoff. Messages still queued when the process dies are lost.
+    """
+    
+    def __init__(
+        self,
+        host: str,
+        port: Optional[int],
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        batch_size: int = 20,
+        max_attempts: int = 5,
+        retry_base_delay: float = 2.0,
+        idle_timeout: float = 60.0,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.idle_timeout = idle_timeout
+        
+        self._queue: "queue.Queue[Optional[Message]]" = queue.Queue()
+        # (next_attempt_at, seq, attempts, message)
+        self._retries: List[Tuple[float, int, int, Message]] = []
+        self._seq = itertools.count()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self) -> None:
+        if self.running:
+            return
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+    
+    def enqueue(self, msg: Message) -> None:
+        self._queue.put(msg)
+    
+    def deliver_now(self, msg: Message) -> bool:
+        """Synchronous delivery, used when the worker is not running"""
+        try:
+            self._send(msg)
+            return True
+        except Exception as e:
+            print(f"Error sending email: {e}")
+            self._disconnect()
+            return False
+        finally:
+            if not self.running:
+                self._disconnect()
+    
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retries),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+    
+    def _run(self) -> None:
+        stopping = False
+        while not stopping or self._retries_due(force=True):
+            batch: List[Tuple[int, Message]] = []
+            
+            # Bloquea hasta que haya un mensaje o venza un reintento
+            if not stopping:
+                try:
+                    item = self._queue.get(timeout=self._wait_time())
+                    if item is None:
+                        stopping = True
+                    else:
+                        batch.append((0, item))
+                except queue.Empty:
+                    pass
+            
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append((0, item))
+            
+            now = time.time()
+            while self._retries and len(batch) < self.batch_size \
+                    and (stopping or self._retries[0][0] <= now):
+                _, _, attempts, msg = heapq.heappop(self._retries)
+                batch.append((attempts, msg))
+            
+            if batch:
+                self._send_batch(batch, final=stopping)
+            elif self._smtp is not None and time.time() - self._last_used > self.idle_timeout:
+                self._disconnect()
+        
+        self._disconnect()
+    
+    def _retries_due(self, force: bool = False) -> bool:
+        return bool(self._retries) and (force or self._retries[0][0] <= time.time())
+    
+    def _wait_time(self) -> float:
+        if self._retries:
+            return max(0.0, min(1.0, self._retries[0][0] - time.time()))
+        return 1.0
+    
+    def _send_batch(self, batch: List[Tuple[int, Message]], final: bool = False) -> None:
+        for attempts, msg in batch:
+            try:
+                self._send(msg)
+            except Exception as e:
+                self._disconnect()
+                attempts += 1
+                if final or attempts >= self.max_attempts:
+                    self.failed += 1
+                    print(f"Error sending email to {msg['To']} (giving up after {attempts} attempts): {e}")
+                    continue
+                self.retried += 1
+                delay = self.retry_base_delay * (2 ** (attempts - 1))
+                heapq.heappush(self._retries, (time.time() + delay, next(self._seq), attempts, msg))
+    
+    def _send(self, msg: Message) -> None:
+        smtp = self._connection()
+        try:
+            smtp.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped the idle connection: reconnect once
+            self._disconnect()
+            self._connection().send_message(msg)
+        self._last_used = time.time()
+        self.sent += 1
+    
+    def _connection(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=30)
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+            self._smtp = smtp
+        return self._smtp
+    
+    def _disconnect(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+
 class EmailService:
     def __init__(self):
         self.smtp_host = settings.SMTP_HOST
@@ -13,6 +192,24 @@ class EmailService:
         self.smtp_user = settings.SMTP_USER
         self.smtp_password = settings.SMTP_PASSWORD
         self.emails_from_email = settings.EMAILS_FROM_EMAIL
+        self.outbox = EmailOutbox(
+            host=self.smtp_host,
+            port=self.smtp_port,
+            user=self.smtp_user,
+            password=self.smtp_password,
+            batch_size=settings.EMAIL_BATCH_SIZE,
+            max_attempts=settings.EMAIL_MAX_ATTEMPTS,
+            retry_base_delay=settings.EMAIL_RETRY_BASE_DELAY,
+            idle_timeout=settings.EMAIL_SMTP_IDLE_TIMEOUT,
+        )
+    
+    def start(self) -> None:
+        """Start the outbox worker (no-op without SMTP or with the outbox disabled)"""
+        if self.smtp_host and settings.EMAIL_OUTBOX_ENABLED:
+            self.outbox.start()
+    
+    def stop(self) -> None:
+        self.outbox.stop()
     
     def send_email(
         self, 
@@ -38,15 +235,12 @@ class EmailService:
             part2 = MIMEText(body_html, "html")
             msg.attach(part2)
         
-        try:
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                if self.smtp_user and self.smtp_password:
-                    server.login(self.smtp_user, self.smtp_password)
-                server.send_message(msg)
+        # Con el outbox activo solo se encola; el envío ocurre en segundo plano
+        if self.outbox.running:
+            self.outbox.enqueue(msg)
             return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
+        
+        return self.outbox.deliver_now(msg)
     
     def send_verification_email(self, email_to: str, verification_code: str) -> bool:
         subject = "Verify your email - Agent API"
@@ -0,0 +1,67 @@
+from ..core.config import settings
+from ..utils.waveform import compute_peaks
+from .audio_jobs import AudioJobWorker
+from .storage import AudioStorageService, audio_storage
+
+PEAKS_MIME_TYPE = "application/octet-stream"
+
+
+class PeaksWorker(AudioJobWorker):
+    """
+    Computes waveform peaks for new audio in the background so players
+    don't have to download and decode the whole file to draw it.
+
+    Peaks are stored next to the audio (AudioStorageService.peaks_path).
+    Audio paths are content addresses, so a peaks file never changes once
+    written. Missing peaks are queued again when a client asks for them.
+    """
+
+    name = "peaks"
+
+    def __init__(
+        self, storage: AudioStorageService, sample_rate: int = 8000,
+        samples_per_pixel: int = 80, **kwargs
+    ):
+        super().__init__(storage, **kwargs)
+        self.sample_rate = sample_rate
+        self.samples_per_pixel = samples_per_pixel
+
+    def process(self, incident_id: int, audio_type: str) -> bool:
+        audio_path = self.current_audio_path(incident_id, audio_type)
+        if not audio_path:
+            return False
+        peaks_path = self.storage.peaks_path(audio_path)
+        if self.storage.backend.head(peaks_path) is not None:
+            return False
+
+        with self.storage.backend.local_copy(audio_path) as src_path:
+            peaks = self.submit(
+                compute_peaks, src_path, self.sample_rate, self.samples_per_pixel,
+                self.ffmpeg, self.timeout,
+            )
+        self.storage.backend.put_bytes(peaks, peaks_path, PEAKS_MIME_TYPE)
+        if self.storage.backend.head(audio_path) is None:
+            # El audio se soltó mientras tanto (p. ej. lo reemplazó el
+            # transcoder): sin esto quedaría un .peaks.dat huérfano
+            self.storage.backend.delete(peaks_path)
+            return False
+        return True
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            "sample_rate": self.sample_rate,
+            "samples_per_pixel": self.samples_per_pixel,
+        })
+        return stats
+
+
+peaks_worker = PeaksWorker(
+    audio_storage,
+    sample_rate=settings.PEAKS_SAMPLE_RATE,
+    samples_per_pixel=settings.PEAKS_SAMPLES_PER_PIXEL,
+    workers=settings.PEAKS_WORKERS,
+    ffmpeg=settings.TRANSCODE_FFMPEG,
+    timeout=settings.TRANSCODE_TIMEOUT,
+    enabled=settings.PEAKS_ENABLED,
+)
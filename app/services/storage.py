@@ -1,112 +1,258 @@
+import asyncio
+import hashlib
 import os
-import uuid
-from datetime import datetime
+import re
+import tempfile
+from dataclasses import dataclass
 from typing import Optional
 import aiofiles
 from fastapi import UploadFile, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 import magic  # python-magic
 from ..core.config import settings
+from ..core.database import SessionLocal, after_commit, after_rollback
+from ..crud.audio_blob import AsyncCRUDAudioBlob, CRUDAudioBlob
+from ..utils.audio_metadata import HEAD_SIZE, TAIL_SIZE, AudioHeaderReader, AudioMetadata, parse_audio_metadata
+from .storage_backends import StorageBackend, build_storage_backend
+
+# Tamaño de lectura del stream de subida y bytes usados para detectar el tipo
+CHUNK_SIZE = 64 * 1024
+SNIFF_SIZE = 2048
+
+_BLOB_NAME_RE = re.compile(r"^([0-9a-f]{64})\.([a-z0-9]+)$")
+
+crud_audio_blob = CRUDAudioBlob()
+async_crud_audio_blob = AsyncCRUDAudioBlob()
+
+
+@dataclass
+class StoredAudio:
+    """Result of save_audio_file: where the blob lives and what it is"""
+    path: str
+    sha256: str
+    size: int
+    mime_type: str
+    metadata: Optional[AudioMetadata] = None
+    # Subida aún en staging: acquire() la pone en `path`
+    staged_path: Optional[str] = None
 
 
 class AudioStorageService:
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or build_storage_backend()
         self.audio_dir = "static/audio"
-        os.makedirs(self.audio_dir, exist_ok=True)
+        # Archivos direccionados por contenido: <prefijo>/blobs/ab/cd/<sha256>.<ext>
+        # En disco local el prefijo es static/audio, así las rutas guardadas
+        # no cambian; en S3 es S3_KEY_PREFIX.
+        prefix = self.audio_dir if self.backend.name == "local" else settings.S3_KEY_PREFIX.strip("/")
+        self.blob_dir = f"{prefix}/blobs"
     
-    def _validate_audio_file(self, file: UploadFile) -> None:
-        """Validate audio file size and type"""
-        # Check file size
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to beginning
-        
-        if file_size > settings.MAX_AUDIO_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Max size is {settings.MAX_AUDIO_FILE_SIZE // (1024*1024)}MB"
-            )
-        
-        # Check file type using magic
+    def blob_path(self, sha256: str, extension: str) -> str:
+        return f"{self.blob_dir}/{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}"
+    
+    def peaks_path(self, audio_path: str) -> str:
+        """Waveform peaks (.dat) stored next to the audio file"""
+        return os.path.splitext(audio_path)[0] + ".peaks.dat"
+    
+    def copy_peaks(self, src_audio_path: str, dst_audio_path: str) -> bool:
+        try:
+            return self.backend.copy(self.peaks_path(src_audio_path), self.peaks_path(dst_audio_path))
+        except Exception as e:
+            print(f"Error copiando picos de {src_audio_path}: {e}")
+            return False
+    
+    def _detect_mime_type(self, head: bytes) -> str:
+        """Sniff the MIME type from the first bytes of the upload"""
         allowed_types = settings.ALLOWED_AUDIO_TYPES
         
-        # Read first bytes to detect type
-        file_content = file.file.read(2048)
-        file.file.seek(0)  # Reset to beginning
-        
         try:
-            mime_type = magic.from_buffer(file_content, mime=True)
-            
-            if mime_type not in allowed_types:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid file type: {mime_type}. Allowed types: {', '.join(allowed_types)}"
-                )
+            mime_type = magic.from_buffer(head[:SNIFF_SIZE], mime=True)
         except Exception as e:
             raise HTTPException(
                 status_code=400,
                 detail=f"Could not determine file type: {str(e)}"
             )
-    
-    async def save_audio_file(self, file: UploadFile, user_id: int, incident_id: Optional[int] = None) -> str:
-        """Save uploaded audio file and return its path"""
-        print(f"DEBUG: Validando archivo: {file.filename}")
-        self._validate_audio_file(file)
-        
-        # Generate unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # Determine file extension from MIME type
-        file_content = await file.read(2048)
-        await file.seek(0)  # Reset to beginning
+        if mime_type not in allowed_types:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type: {mime_type}. Allowed types: {', '.join(allowed_types)}"
+            )
+        return mime_type
+    
+    async def save_audio_file(self, file: UploadFile, user_id: int, incident_id: Optional[int] = None) -> StoredAudio:
+        """
+        Save uploaded audio file as a content-addressed blob.
         
-        print(f"DEBUG: Bytes leídos: {len(file_content)}")
+        The upload is streamed in CHUNK_SIZE pieces into a temporary file:
+        the type is sniffed once from the first chunk, the size limit is
+        enforced, the SHA-256 computed and the container headers kept for
+        the metadata (duration, codec, ...) while reading. The file stays
+        staged until acquire() registers the reference in the caller's
+        transaction and stores it under its content address, so identical
+        uploads share one object.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.backend.staging_dir(), prefix=".upload-", suffix=".part")
+        os.close(fd)
         
+        mime_type = None
+        size = 0
+        digest = hashlib.sha256()
+        headers = AudioHeaderReader()
         try:
-            mime_type = magic.from_buffer(file_content, mime=True)
-            print(f"DEBUG: MIME type detectado: {mime_type}")
+            async with aiofiles.open(tmp_path, 'wb') as out_file:
+                while True:
+                    chunk = await file.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if mime_type is None:
+                        mime_type = self._detect_mime_type(chunk)
+                    size += len(chunk)
+                    if size > settings.MAX_AUDIO_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File too large. Max size is {settings.MAX_AUDIO_FILE_SIZE // (1024*1024)}MB"
+                        )
+                    digest.update(chunk)
+                    headers.feed(chunk)
+                    await out_file.write(chunk)
+            
+            if mime_type is None:
+                raise HTTPException(status_code=400, detail="Empty audio file")
+            
+            sha256 = digest.hexdigest()
+            file_extension = self._get_file_extension(mime_type, file.filename)
+            file_path = self.blob_path(sha256, file_extension)
+        except HTTPException:
+            self._discard(tmp_path)
+            raise
         except Exception as e:
-            print(f"DEBUG: Error detectando MIME: {e}")
+            print(f"Error guardando audio: {e}")
+            self._discard(tmp_path)
             raise HTTPException(
-                status_code=400,
-                detail=f"Could not determine file type: {str(e)}"
+                status_code=500,
+                detail=f"Failed to save file: {str(e)}"
             )
         
-        file_extension = self._get_file_extension(mime_type, file.filename)
-        print(f"DEBUG: Extensión: {file_extension}")
-        
-        filename = f"{user_id}_{timestamp}_{uuid.uuid4().hex[:8]}.{file_extension}"
-        print(f"DEBUG: Nombre archivo: {filename}")
-        
-        # Create user directory if it doesn't exist
-        user_dir = os.path.join(self.audio_dir, str(user_id))
-        print(f"DEBUG: Directorio usuario: {user_dir}")
-        
-        os.makedirs(user_dir, exist_ok=True)
-        
-        file_path = os.path.join(user_dir, filename)
-        print(f"DEBUG: Ruta completa: {file_path}")
-        
-        # Save file
+        return StoredAudio(
+            path=file_path, sha256=sha256, size=size, mime_type=mime_type,
+            metadata=headers.metadata(), staged_path=tmp_path,
+        )
+    
+    async def acquire(self, db: AsyncSession, audio: StoredAudio) -> None:
+        """
+        Register a reference to the audio in the caller's transaction, then
+        store the staged upload. The blob's row is held from that point,
+        so a concurrent release cannot unlink the file once it is in
+        place. If the transaction rolls back, the blob is discarded again
+        unless something else references it.
+        """
         try:
-            async with aiofiles.open(file_path, 'wb') as out_file:
-                content = await file.read()
-                print(f"DEBUG: Contenido a escribir: {len(content)} bytes")
-                await out_file.write(content)
-            print(f"DEBUG: Archivo guardado exitosamente")
+            await async_crud_audio_blob.acquire(
+                db, sha256=audio.sha256, path=audio.path,
+                mime_type=audio.mime_type, size=audio.size
+            )
+            loop = asyncio.get_running_loop()
+            after_rollback(db, lambda: loop.run_in_executor(
+                None, self.discard_unreferenced, audio.sha256, audio.path
+            ))
+            if audio.staged_path is not None:
+                if self.backend.local_path(audio.path) is not None:
+                    self.backend.put_file(audio.staged_path, audio.path, audio.mime_type)
+                else:
+                    await asyncio.to_thread(self.backend.put_file, audio.staged_path, audio.path, audio.mime_type)
+            elif await asyncio.to_thread(self.backend.head, audio.path) is None:
+                # Subida directa borrada por una liberación anterior a esta referencia
+                raise HTTPException(status_code=400, detail="Audio has not been uploaded")
+        except HTTPException:
+            raise
         except Exception as e:
-            print(f"DEBUG: Error escribiendo archivo: {e}")
-            # Try to delete partially written file
-            try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            except:
-                pass
+            print(f"Error guardando audio: {e}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to save file: {str(e)}"
             )
+        finally:
+            if audio.staged_path is not None:
+                self._discard(audio.staged_path)
+    
+    def probe(self, file_path: str, size: Optional[int] = None) -> AudioMetadata:
+        """
+        Metadata of a stored file from its first and last bytes only
+        (ranged reads on object storage).
+        """
+        if size is None:
+            size = self.backend.head(file_path)["size"]
+        head = self.backend.read_range(file_path, 0, HEAD_SIZE)
+        tail_offset = max(0, size - TAIL_SIZE)
+        tail = head[tail_offset:] if size <= HEAD_SIZE else self.backend.read_range(file_path, tail_offset, TAIL_SIZE)
+        return parse_audio_metadata(head, tail, size)
+    
+    def upload_target(self, sha256: str, size: int, mime_type: str) -> dict:
+        """
+        Presigned PUT for a client-side upload of a blob whose SHA-256 the
+        client already computed. Only for backends with presigned URLs.
+        """
+        if not self.backend.supports_presigned_urls:
+            raise HTTPException(
+                status_code=501,
+                detail="Direct uploads are not supported by the configured storage backend"
+            )
+        if mime_type not in settings.ALLOWED_AUDIO_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid file type: {mime_type}. Allowed types: {', '.join(settings.ALLOWED_AUDIO_TYPES)}"
+            )
+        if size > settings.MAX_AUDIO_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Max size is {settings.MAX_AUDIO_FILE_SIZE // (1024*1024)}MB"
+            )
+        key = self.blob_path(sha256, self._get_file_extension(mime_type))
+        target = self.backend.presigned_put(
+            key, content_type=mime_type, size=size, sha256=sha256,
+            expires_in=settings.S3_PRESIGN_EXPIRES,
+        )
+        return {"key": key, "expires_in": settings.S3_PRESIGN_EXPIRES, **target}
+    
+    async def stored_upload(self, key: str) -> StoredAudio:
+        """
+        Check a blob uploaded directly to the backend (see upload_target)
+        and describe it like save_audio_file does. The content address
+        comes from the key; the store verified the checksum on upload.
+        """
+        if not self.backend.supports_presigned_urls:
+            raise HTTPException(
+                status_code=501,
+                detail="Direct uploads are not supported by the configured storage backend"
+            )
+        name = key.rsplit("/", 1)[-1]
+        match = _BLOB_NAME_RE.match(name)
+        if not match or key != self.blob_path(match.group(1), match.group(2)):
+            raise HTTPException(status_code=400, detail="Invalid audio key")
         
-        return file_path
+        info = await asyncio.to_thread(self.backend.head, key)
+        if info is None:
+            raise HTTPException(status_code=400, detail="Audio has not been uploaded")
+        mime_type = info["content_type"]
+        if mime_type not in settings.ALLOWED_AUDIO_TYPES:
+            raise HTTPException(status_code=400, detail=f"Invalid file type: {mime_type}")
+        if info["size"] > settings.MAX_AUDIO_FILE_SIZE:
+            raise HTTPException(status_code=413, detail="File too large")
+        metadata = await asyncio.to_thread(self.probe, key, info["size"])
+        return StoredAudio(
+            path=key, sha256=match.group(1), size=info["size"], mime_type=mime_type,
+            metadata=metadata,
+        )
+    
+    def _discard(self, path: str) -> None:
+        """Remove a partially written file, ignoring errors"""
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
     
     def _get_file_extension(self, mime_type: str, original_filename: Optional[str] = None) -> str:
         """Map MIME type to file extension"""
@@ -138,21 +284,61 @@ class AudioStorageService:
     
     def get_audio_url(self, file_path: str) -> str:
         """Get URL for audio file"""
+        if self.backend.supports_presigned_urls:
+            return self.backend.presigned_get_url(file_path, settings.S3_PRESIGN_EXPIRES)
         # Remove 'static/' prefix for URL
         if file_path.startswith('static/'):
             return file_path[7:]  # Remove 'static/'
         return file_path
     
-    def delete_audio_file(self, file_path: str) -> bool:
-        """Delete audio file"""
+    def delete_audio_file(self, db: Session, file_path: str, commit: bool = True) -> bool:
+        """
+        Drop one reference to an audio file. Returns True when it was the
+        last one: the file (and its waveform peaks) is then unlinked after
+        the commit, unless the blob was acquired again in between. Files
+        saved before the content-addressed layout have no blob row and are
+        deleted after the commit.
+        """
+        last = True
+        blob = crud_audio_blob.get_by_path(db, file_path)
+        if blob is None:
+            after_commit(db, lambda: self._delete_files(file_path))
+        else:
+            sha256 = blob.sha256
+            unreferenced_path = crud_audio_blob.release(db, sha256=sha256)
+            last = unreferenced_path is not None
+            if last:
+                after_commit(db, lambda: self.discard_unreferenced(sha256, unreferenced_path))
+        if commit:
+            db.commit()
+        return last
+    
+    def discard_unreferenced(self, sha256: str, file_path: str) -> bool:
+        """
+        Unlink a blob (and its peaks) if no incident references it. Runs
+        in its own transaction holding the blob's row, so an upload of the
+        same content waits for it and then stores the file again.
+        """
+        db = SessionLocal()
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
-        except Exception:
+            if not crud_audio_blob.lock_unreferenced(db, sha256=sha256, path=file_path):
+                db.rollback()
+                return False
+            deleted = self._delete_files(file_path)
+            crud_audio_blob.delete_unreferenced(db, sha256=sha256)
+            db.commit()
+            return deleted
+        except Exception as e:
+            print(f"Error borrando audio {file_path}: {e}")
+            db.rollback()
             return False
+        finally:
+            db.close()
+    
+    def _delete_files(self, file_path: str) -> bool:
+        self.backend.delete(self.peaks_path(file_path))
+        return self.backend.delete(file_path)
 
 
 # Crear instancia global
-audio_storage = AudioStorageService()
\ No newline at end of file
+audio_storage = AudioStorageService()
@@ -0,0 +1,299 @@
+import base64
+import contextlib
+import errno
+import os
+import shutil
+import tempfile
+from typing import Dict, Iterator, Optional
+from ..core.config import settings
+
+
+class StorageBackend:
+    """
+    Where audio blobs live. Keys are slash-separated object names; the
+    service decides the layout and the backend only moves bytes.
+    """
+
+    name = "base"
+    # Clients can upload/download directly with presigned URLs
+    supports_presigned_urls = False
+
+    def staging_dir(self) -> str:
+        """Directory for temporary files handed to put_file()"""
+        return tempfile.gettempdir()
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        """Store a local file under key. The local file is consumed."""
+        raise NotImplementedError
+
+    def put_bytes(self, data: bytes, key: str, content_type: str) -> None:
+        """Store a small object (peaks, ...) from memory"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.staging_dir(), prefix=".put-", suffix=".part")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        try:
+            self.put_file(tmp_path, key, content_type)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def copy(self, src_key: str, dst_key: str) -> bool:
+        """Copy an object; False if the source does not exist"""
+        raise NotImplementedError
+
+    def head(self, key: str) -> Optional[Dict[str, object]]:
+        """{"size", "content_type"} of a stored object, None if missing"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        """Up to `length` bytes starting at `offset`"""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path when the object is on local disk"""
+        return None
+
+    @contextlib.contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """Path to a local file with the object's bytes (for workers)"""
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def presigned_get_url(self, key: str, expires_in: int, content_type: Optional[str] = None) -> Optional[str]:
+        return None
+
+    def presigned_put(
+        self, key: str, content_type: str, size: int, sha256: str, expires_in: int
+    ) -> Optional[Dict[str, object]]:
+        return None
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Files on the local disk (or a volume shared by every API node). Keys
+    are paths relative to the working directory, e.g. static/audio/...
+    """
+
+    name = "local"
+
+    def __init__(self, staging_dir: Optional[str] = None):
+        # Fuera de static/: el montaje público no debe servir subidas a medias
+        self._staging_dir = staging_dir or settings.AUDIO_STAGING_DIR
+
+    def staging_dir(self) -> str:
+        # En el mismo sistema de archivos que los blobs os.replace es atómico
+        os.makedirs(self._staging_dir, exist_ok=True)
+        return self._staging_dir
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        # Si el blob ya existe se reemplaza por un contenido idéntico: no
+        # ocupa más espacio y lo restaura si una liberación concurrente
+        # acaba de borrarlo.
+        directory = os.path.dirname(key)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            os.replace(local_path, key)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Staging en otro volumen: se copia junto al destino (ya
+            # completo) y se renombra, así el blob aparece de una vez.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".put-", suffix=".part")
+            os.close(fd)
+            try:
+                shutil.copyfile(local_path, tmp_path)
+                os.replace(tmp_path, key)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            os.remove(local_path)
+
+    def copy(self, src_key: str, dst_key: str) -> bool:
+        if not os.path.isfile(src_key):
+            return False
+        fd, tmp_path = tempfile.mkstemp(dir=self.staging_dir(), prefix=".copy-", suffix=".part")
+        os.close(fd)
+        shutil.copyfile(src_key, tmp_path)
+        self.put_file(tmp_path, dst_key, "application/octet-stream")
+        return True
+
+    def head(self, key: str) -> Optional[Dict[str, object]]:
+        try:
+            size = os.path.getsize(key)
+        except OSError:
+            return None
+        return {"size": size, "content_type": None}
+
+    def delete(self, key: str) -> bool:
+        try:
+            if os.path.exists(key):
+                os.remove(key)
+                return True
+            return False
+        except Exception:
+            return False
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        with open(key, "rb") as stored_file:
+            stored_file.seek(offset)
+            return stored_file.read(length)
+
+    def local_path(self, key: str) -> Optional[str]:
+        return key
+
+    @contextlib.contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        yield key
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    S3-compatible object storage (AWS S3, MinIO, ...). Every API node sees
+    the same bucket, and clients move audio with presigned URLs instead
+    of through the API process.
+    """
+
+    name = "s3"
+    supports_presigned_urls = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        client=None,
+    ):
+        self.bucket = bucket
+        if client is None:
+            import boto3
+            from botocore.config import Config
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                region_name=region,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+                # MinIO y otros compatibles no resuelven buckets como subdominio
+                config=Config(
+                    signature_version="s3v4",
+                    s3={"addressing_style": "path" if endpoint_url else "auto"},
+                ),
+            )
+        self.client = client
+
+    def put_file(self, local_path: str, key: str, content_type: str) -> None:
+        try:
+            self.client.upload_file(
+                local_path, self.bucket, key, ExtraArgs={"ContentType": content_type}
+            )
+        finally:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+
+    def copy(self, src_key: str, dst_key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.copy_object(
+                Bucket=self.bucket, Key=dst_key, CopySource={"Bucket": self.bucket, "Key": src_key}
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def head(self, key: str) -> Optional[Dict[str, object]]:
+        from botocore.exceptions import ClientError
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": response["ContentLength"], "content_type": response.get("ContentType")}
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            print(f"Error borrando {key} de S3: {e}")
+            return False
+
+    def read_range(self, key: str, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={offset}-{offset + length - 1}"
+        )
+        return response["Body"].read()
+
+    @contextlib.contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        suffix = os.path.splitext(key)[1]
+        fd, path = tempfile.mkstemp(prefix=".download-", suffix=suffix)
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def presigned_get_url(self, key: str, expires_in: int, content_type: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": key}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+    def presigned_put(
+        self, key: str, content_type: str, size: int, sha256: str, expires_in: int
+    ) -> Optional[Dict[str, object]]:
+        """
+        Presigned PUT for exactly this content: type, length and SHA-256
+        checksum are part of the signature, so the store rejects any other
+        body under the blob's content address.
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=expires_in,
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(size),
+                "x-amz-checksum-sha256": checksum,
+            },
+        }
+
+
+def build_storage_backend() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "s3":
+        if not settings.S3_BUCKET:
+            raise ValueError("S3_BUCKET must be set when STORAGE_BACKEND=s3")
+        return S3StorageBackend(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+        )
+    if settings.STORAGE_BACKEND != "local":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+    return LocalStorageBackend()
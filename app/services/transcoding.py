@@ -0,0 +1,121 @@
+import os
+import tempfile
+from typing import Optional
+from ..core.config import settings
+from ..core.database import SessionLocal, after_commit, after_rollback
+from ..utils.audio_metadata import probe_file
+from ..utils.transcode import transcode_to_opus
+from .audio_jobs import AudioJobWorker, crud_incident
+from .peaks import peaks_worker
+from .storage import AudioStorageService, audio_storage, crud_audio_blob
+
+TRANSCODED_EXTENSION = "ogg"
+TRANSCODED_MIME_TYPE = "audio/ogg"
+
+
+class TranscodeWorker(AudioJobWorker):
+    """
+    Re-encodes uploaded audio to Opus/OGG in the background.
+
+    Only uploads enqueued by the create/solution endpoints are processed;
+    existing incidents go through scripts/transcode_backfill.py. ffmpeg
+    runs in the process pool. The new file is stored as its own blob and
+    the incident is switched to it with a compare-and-swap that also
+    releases the original, in one transaction. With keep_originals the
+    original file and its blob reference are left in place. Peaks of the
+    original are copied to the new file, or computed again by `peaks`
+    when there were none yet.
+    """
+
+    name = "transcode"
+
+    def __init__(
+        self, storage: AudioStorageService, bitrate: str = "32k",
+        peaks: Optional[AudioJobWorker] = None, keep_originals: bool = False, **kwargs
+    ):
+        super().__init__(storage, **kwargs)
+        self.bitrate = bitrate
+        self.peaks = peaks
+        self.keep_originals = keep_originals
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_total = 0.0
+
+    def process(self, incident_id: int, audio_type: str) -> bool:
+        """Transcode one audio. Returns True when the incident was switched."""
+        old_path = self.current_audio_path(incident_id, audio_type)
+        if not old_path or old_path.endswith(f".{TRANSCODED_EXTENSION}"):
+            return False
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.storage.backend.staging_dir(), prefix=".transcode-", suffix=".ogg"
+        )
+        os.close(fd)
+        db = SessionLocal()
+        try:
+            with self.storage.backend.local_copy(old_path) as src_path:
+                bytes_in = os.path.getsize(src_path)
+                sha256, size, seconds = self.submit(
+                    transcode_to_opus, src_path, tmp_path, self.bitrate, self.ffmpeg, self.timeout
+                )
+            metadata = probe_file(tmp_path)
+            new_path = self.storage.blob_path(sha256, TRANSCODED_EXTENSION)
+
+            # Nueva referencia, cambio de ruta y liberación del original en
+            # una sola transacción. La fila del blob se toma antes de guardar
+            # el archivo: una liberación concurrente ya no puede borrarlo.
+            crud_audio_blob.acquire(
+                db, sha256=sha256, path=new_path, mime_type=TRANSCODED_MIME_TYPE, size=size
+            )
+            after_rollback(db, lambda: self.storage.discard_unreferenced(sha256, new_path))
+            self.storage.backend.put_file(tmp_path, new_path, TRANSCODED_MIME_TYPE)
+            swapped = crud_incident.swap_audio(
+                db, incident_id=incident_id, audio_type=audio_type,
+                old_path=old_path, new_path=new_path, new_sha256=sha256,
+                metadata=metadata,
+            )
+            if not swapped:
+                # El incidente cambió mientras tanto: se descarta el resultado
+                db.rollback()
+                return False
+
+            # La forma de onda es la misma: se conservan los picos ya calculados,
+            # o se piden para el archivo nuevo si el original aún no los tenía
+            if not self.storage.copy_peaks(old_path, new_path) and self.peaks is not None:
+                after_commit(db, lambda: self.peaks.enqueue(incident_id, audio_type))
+            # El original se borra (si nadie más lo usa) tras el commit
+            if not self.keep_originals:
+                self.storage.delete_audio_file(db, old_path, commit=False)
+            db.commit()
+        finally:
+            db.close()
+            self.storage._discard(tmp_path)
+
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += size
+            self.seconds_total += seconds
+        return True
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        with self._lock:
+            completed = self.completed
+            stats.update({
+                "bitrate": self.bitrate,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "avg_seconds": self.seconds_total / completed if completed else 0.0,
+            })
+        return stats
+
+
+transcoder = TranscodeWorker(
+    audio_storage,
+    workers=settings.TRANSCODE_WORKERS,
+    bitrate=settings.TRANSCODE_BITRATE,
+    peaks=peaks_worker,
+    ffmpeg=settings.TRANSCODE_FFMPEG,
+    timeout=settings.TRANSCODE_TIMEOUT,
+    enabled=settings.TRANSCODE_ENABLED,
+)
@@ -0,0 +1,246 @@
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+# Bytes del principio y del final del archivo que se conservan para leer
+# cabeceras (WAV/MP3/FLAC/OGG) y la última página OGG (duración).
+HEAD_SIZE = 256 * 1024
+TAIL_SIZE = 64 * 1024
+
+
+@dataclass
+class AudioMetadata:
+    """What the container headers say about an audio file"""
+    size: int
+    duration: Optional[float] = None  # seconds
+    codec: Optional[str] = None
+    sample_rate: Optional[int] = None  # Hz
+    bitrate: Optional[int] = None  # bits per second (average)
+
+
+class AudioHeaderReader:
+    """
+    Collects the head and tail of a stream while it is being written so
+    parse_audio_metadata() can run when the upload finishes, without a
+    second read and without decoding any audio.
+    """
+
+    def __init__(self):
+        self._head = bytearray()
+        self._tail = b""
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        if len(self._head) < HEAD_SIZE:
+            self._head += chunk[:HEAD_SIZE - len(self._head)]
+        self._tail = (self._tail + chunk)[-TAIL_SIZE:]
+        self.size += len(chunk)
+
+    def metadata(self) -> AudioMetadata:
+        return parse_audio_metadata(bytes(self._head), self._tail, self.size)
+
+
+def probe_file(path: str) -> AudioMetadata:
+    """parse_audio_metadata() for a file on disk (reads head and tail only)"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as audio_file:
+        head = audio_file.read(HEAD_SIZE)
+        audio_file.seek(max(0, size - TAIL_SIZE))
+        tail = audio_file.read(TAIL_SIZE)
+    return parse_audio_metadata(head, tail, size)
+
+
+def parse_audio_metadata(head: bytes, tail: bytes, size: int) -> AudioMetadata:
+    """
+    Read duration, codec, sample rate and bitrate from the headers of a
+    WAV, MP3, FLAC or OGG (Opus/Vorbis) file. Unknown or damaged formats
+    give a result with only the size filled in.
+    """
+    try:
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return _parse_wav(head, size)
+        if head[:4] == b"fLaC":
+            return _parse_flac(head, size)
+        if head[:4] == b"OggS":
+            return _parse_ogg(head, tail, size)
+        return _parse_mp3(head, tail, size)
+    except (struct.error, IndexError, ValueError, ZeroDivisionError):
+        return AudioMetadata(size=size)
+
+
+# WAV -----------------------------------------------------------------------
+
+_WAV_CODECS = {
+    0x0001: "pcm",
+    0x0003: "pcm_float",
+    0x0006: "alaw",
+    0x0007: "mulaw",
+    0x0011: "adpcm_ima",
+    0x0055: "mp3",
+}
+
+
+def _parse_wav(head: bytes, size: int) -> AudioMetadata:
+    offset = 12
+    codec = sample_rate = byte_rate = None
+    while offset + 8 <= len(head):
+        chunk_id = head[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", head, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            audio_format, _, sample_rate, byte_rate, _, bits = struct.unpack_from("<HHIIHH", head, body)
+            if audio_format == 0xFFFE and chunk_size >= 40:
+                # WAVE_FORMAT_EXTENSIBLE: el formato real está en el GUID
+                audio_format = struct.unpack_from("<H", head, body + 24)[0]
+            codec = _WAV_CODECS.get(audio_format, f"wav_0x{audio_format:04x}")
+            if codec == "pcm":
+                codec = f"pcm_s{bits}le" if bits > 8 else "pcm_u8"
+        elif chunk_id == b"data":
+            data_size = chunk_size
+            # Grabaciones en streaming dejan el tamaño en 0 o 0xFFFFFFFF
+            if data_size in (0, 0xFFFFFFFF) or body + data_size > size:
+                data_size = size - body
+            duration = data_size / byte_rate if byte_rate else None
+            return AudioMetadata(
+                size=size, duration=duration, codec=codec, sample_rate=sample_rate,
+                bitrate=byte_rate * 8 if byte_rate else None,
+            )
+        offset = body + chunk_size + (chunk_size & 1)
+    return AudioMetadata(size=size, codec=codec, sample_rate=sample_rate)
+
+
+# FLAC ----------------------------------------------------------------------
+
+def _parse_flac(head: bytes, size: int) -> AudioMetadata:
+    # El primer bloque de metadatos siempre es STREAMINFO
+    fields = int.from_bytes(head[18:26], "big")
+    sample_rate = fields >> 44
+    total_samples = fields & ((1 << 36) - 1)
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return AudioMetadata(
+        size=size, duration=duration, codec="flac", sample_rate=sample_rate or None,
+        bitrate=int(size * 8 / duration) if duration else None,
+    )
+
+
+# OGG -----------------------------------------------------------------------
+
+def _parse_ogg(head: bytes, tail: bytes, size: int) -> AudioMetadata:
+    serial = struct.unpack_from("<I", head, 14)[0]
+    segments = head[26]
+    packet = head[27 + segments:]
+    pre_skip = 0
+    if packet[:8] == b"OpusHead":
+        # Opus siempre decodifica a 48 kHz; granule_position cuenta en 48 kHz
+        codec, sample_rate = "opus", 48000
+        pre_skip = struct.unpack_from("<H", packet, 10)[0]
+    elif packet[:7] == b"\x01vorbis":
+        codec = "vorbis"
+        sample_rate = struct.unpack_from("<I", packet, 12)[0]
+    else:
+        return AudioMetadata(size=size, codec="ogg")
+
+    duration = None
+    granule = _last_ogg_granule(tail, serial)
+    if granule is not None and sample_rate:
+        duration = max(0, granule - pre_skip) / sample_rate
+    return AudioMetadata(
+        size=size, duration=duration, codec=codec, sample_rate=sample_rate,
+        bitrate=int(size * 8 / duration) if duration else None,
+    )
+
+
+def _last_ogg_granule(tail: bytes, serial: int) -> Optional[int]:
+    offset = tail.rfind(b"OggS")
+    while offset != -1:
+        if offset + 27 <= len(tail) and tail[offset + 4] == 0:
+            granule, page_serial = struct.unpack_from("<qI", tail, offset + 6)
+            if page_serial == serial and granule >= 0:
+                return granule
+        offset = tail.rfind(b"OggS", 0, offset)
+    return None
+
+
+# MP3 -----------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    # (MPEG-1, capa): kbps por índice
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    # MPEG-2 / 2.5
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _mp3_frame(head: bytes, offset: int):
+    """(frame length, bitrate, sample rate, samples per frame, version, layer, mono) or None"""
+    if offset + 4 > len(head) or head[offset] != 0xFF or (head[offset + 1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (head[offset + 1] >> 3) & 3
+    layer = 4 - ((head[offset + 1] >> 1) & 3)
+    bitrate_index = head[offset + 2] >> 4
+    rate_index = (head[offset + 2] >> 2) & 3
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    padding = (head[offset + 2] >> 1) & 1
+    mono = (head[offset + 3] >> 6) == 3
+    version = 1 if version_bits == 3 else 2
+    bitrate = _MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    if layer == 1:
+        samples, length = 384, (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version == 2:
+        samples, length = 576, 72 * bitrate // sample_rate + padding
+    else:
+        samples, length = 1152, 144 * bitrate // sample_rate + padding
+    return length, bitrate, sample_rate, samples, version, layer, mono
+
+
+def _parse_mp3(head: bytes, tail: bytes, size: int) -> AudioMetadata:
+    start = 0
+    if head[:3] == b"ID3":
+        tag_size = ((head[6] & 0x7F) << 21) | ((head[7] & 0x7F) << 14) | ((head[8] & 0x7F) << 7) | (head[9] & 0x7F)
+        start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+    # Primer frame válido: su sucesor también tiene que tener sincronía
+    offset = start
+    frame = None
+    while offset < len(head) - 4:
+        frame = _mp3_frame(head, offset)
+        if frame and (offset + frame[0] >= len(head) or _mp3_frame(head, offset + frame[0])):
+            break
+        frame = None
+        offset = head.find(b"\xff", offset + 1)
+        if offset == -1:
+            break
+    if frame is None:
+        return AudioMetadata(size=size)
+
+    length, bitrate, sample_rate, samples, version, layer, mono = frame
+    audio_bytes = size - offset - (128 if tail[-128:-125] == b"TAG" else 0)
+    codec = f"mp{layer}"
+
+    # Cabecera Xing/Info (VBR de LAME) o VBRI (Fraunhofer) con el total de frames
+    frames = None
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = offset + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 1:
+            frames = struct.unpack_from(">I", head, xing + 8)[0]
+    elif head[offset + 36:offset + 40] == b"VBRI":
+        frames = struct.unpack_from(">I", head, offset + 50)[0]
+
+    if frames:
+        duration = frames * samples / sample_rate
+        bitrate = int(audio_bytes * 8 / duration)
+    else:
+        duration = audio_bytes * 8 / bitrate
+    return AudioMetadata(
+        size=size, duration=duration, codec=codec, sample_rate=sample_rate, bitrate=bitrate
+    )
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, Sequence
+
+# Se acumulan filas hasta ~64 KB antes de enviarlas: menos escrituras al
+# socket sin que la memoria dependa de la cantidad de filas.
+CHUNK_SIZE = 64 * 1024
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    plain = _plain(value)
+    if plain is value:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return plain
+
+
+# encode() usa el encoder en C; json.dump() sobre un stream no
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def ndjson_chunks(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """One JSON object per line, encoded in CHUNK_SIZE blocks"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(_json_encoder.encode(row))
+        buffer.write("\n")
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def csv_chunks(rows: Iterable[Dict[str, Any]], fieldnames: Sequence[str]) -> Iterator[bytes]:
+    """CSV with a header row, encoded in CHUNK_SIZE blocks"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fieldnames)
+    for row in rows:
+        writer.writerow([_plain(row.get(field)) for field in fieldnames])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,33 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Build an opaque keyset cursor from the (created_at, id) of a row"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def next_cursor(items: Sequence[Any], limit: int) -> Optional[str]:
+    """
+    Cursor for the page following `items`, or None when this was the last page.
+    Works with ORM objects as well as row dicts.
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last["created_at"], last["id"])
+    return encode_cursor(last.created_at, last.id)
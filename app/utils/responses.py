@@ -0,0 +1,218 @@
+import hashlib
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple, Type
+
+import anyio
+import orjson
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# OPT_UTC_Z: las fechas UTC salen con "Z", igual que en Pydantic
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def model_list_response(
+    rows: Iterable[Any], model: Type[BaseModel], *,
+    headers: Optional[Mapping[str, str]] = None, **fixed: Any
+) -> Response:
+    """
+    JSON list of `model` from trusted rows (query result mappings or ORM
+    objects), encoded once with orjson. Returning a Response skips
+    FastAPI's validation against response_model, so only the fields of
+    `model` are copied; `fixed` sets a value for every row (e.g. the user's name).
+    Keep response_model on the route for the OpenAPI schema.
+    """
+    defaults = {
+        name: None if info.is_required() else info.get_default()
+        for name, info in model.model_fields.items()
+    }
+    content = []
+    for row in rows:
+        if isinstance(row, Mapping):
+            item = {name: row.get(name, default) for name, default in defaults.items()}
+        else:
+            item = {name: getattr(row, name, default) for name, default in defaults.items()}
+        item.update(fixed)
+        content.append(item)
+    return Response(
+        content=orjson.dumps(content, option=_ORJSON_OPTIONS),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def weak_etag(*parts: Any) -> str:
+    """Weak ETag from values that change whenever the representation does (ids, versions)"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def revalidation_headers(*parts: Any) -> Dict[str, str]:
+    """ETag of a resource; clients cache it but revalidate every time"""
+    return {"ETag": weak_etag(*parts), "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, headers: Mapping[str, str]) -> Optional[Response]:
+    """304 when the request's If-None-Match matches headers["ETag"], else None"""
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=dict(headers))
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class RangeFileResponse(Response):
+    """
+    File response with conditional GET (ETag / If-None-Match,
+    Last-Modified / If-Modified-Since) and single-range requests
+    (Range / If-Range -> 206 Partial Content, 416 when unsatisfiable).
+
+    The body is sent with the ASGI zero-copy extension when the server
+    offers it, otherwise in bounded chunks.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Mapping[str, str],
+        method: str = "GET",
+        media_type: Optional[str] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.path = path
+        self.send_body = method.upper() != "HEAD"
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+        response_headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+            **(headers or {}),
+        }
+        self.offset, self.length = 0, size
+        status_code = 200
+
+        if self._not_modified(request_headers, etag, stat.st_mtime):
+            status_code = 304
+            self.length = 0
+        else:
+            byte_range = self._requested_range(request_headers, etag, last_modified, size)
+            if byte_range == "unsatisfiable":
+                status_code = 416
+                response_headers["content-range"] = f"bytes */{size}"
+                self.length = 0
+            elif byte_range is not None:
+                start, end = byte_range
+                status_code = 206
+                self.offset, self.length = start, end - start + 1
+                response_headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        if status_code != 304:
+            response_headers["content-length"] = str(self.length)
+        super().__init__(status_code=status_code, headers=response_headers, media_type=media_type)
+
+    @staticmethod
+    def _not_modified(request_headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def _requested_range(
+        request_headers: Mapping[str, str], etag: str, last_modified: str, size: int
+    ):
+        range_header = request_headers.get("range")
+        if not range_header:
+            return None
+        # If-Range: only honour the range if the client's copy is current
+        if_range = request_headers.get("if-range")
+        if if_range and if_range.strip() not in (etag, last_modified):
+            return None
+
+        match = _RANGE_RE.match(range_header.strip())
+        if not match:
+            # Multiple or malformed ranges: ignore and send the whole file
+            return None
+        first, last = match.groups()
+        if first == "" and last == "":
+            return None
+        if first == "":
+            # Suffix range: last N bytes
+            suffix = int(last)
+            if suffix == 0:
+                return "unsatisfiable"
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or end < start:
+            return "unsatisfiable"
+        return start, end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
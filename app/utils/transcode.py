@@ -0,0 +1,41 @@
+import hashlib
+import subprocess
+import time
+from typing import Tuple
+
+# Corre en los procesos del pool de transcodificación: no debe importar
+# settings ni nada del resto de la app.
+
+
+def transcode_to_opus(
+    src_path: str, dst_path: str, bitrate: str, ffmpeg: str = "ffmpeg", timeout: float = 300.0
+) -> Tuple[str, int, float]:
+    """
+    Re-encode any ffmpeg-readable audio to Opus in an OGG container,
+    tuned for speech. Returns (sha256, size, seconds spent) of the output.
+    The output is bit-exact: the same input and bitrate always give the
+    same bytes, so transcoded copies of one blob share one blob too.
+    """
+    started_at = time.time()
+    subprocess.run(
+        [
+            ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", src_path,
+            "-vn", "-map_metadata", "-1",
+            # Sin bitexact el muxer OGG usa un serial de stream aleatorio y
+            # escribe la versión del encoder: cada salida tendría otro sha256
+            "-fflags", "+bitexact", "-flags:a", "+bitexact",
+            "-c:a", "libopus", "-b:a", bitrate, "-application", "voip",
+            "-f", "ogg", dst_path,
+        ],
+        check=True,
+        capture_output=True,
+        timeout=timeout,
+    )
+    digest = hashlib.sha256()
+    size = 0
+    with open(dst_path, "rb") as out_file:
+        for chunk in iter(lambda: out_file.read(64 * 1024), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size, time.time() - started_at
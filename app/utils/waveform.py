@@ -0,0 +1,54 @@
+import struct
+import subprocess
+
+import numpy as np
+
+# Corre en los procesos del pool de picos: no debe importar settings ni
+# nada del resto de la app.
+
+# Formato binario de audiowaveform (versión 1), que entienden peaks.js y
+# wavesurfer: cabecera de 20 bytes y pares (min, max) por píxel.
+PEAKS_VERSION = 1
+PEAKS_FLAG_8BIT = 1
+PEAKS_HEADER = struct.Struct("<iIiiI")  # version, flags, sample_rate, samples_per_pixel, length
+
+
+def compute_peaks(
+    src_path: str,
+    sample_rate: int = 8000,
+    samples_per_pixel: int = 80,
+    ffmpeg: str = "ffmpeg",
+    timeout: float = 300.0,
+) -> bytes:
+    """
+    Decode the audio to mono 16-bit PCM at `sample_rate` with ffmpeg and
+    reduce every `samples_per_pixel` samples to their (min, max), stored
+    as signed 8-bit pairs in the audiowaveform .dat layout.
+    """
+    decoded = subprocess.run(
+        [
+            ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-i", src_path,
+            "-vn", "-ac", "1", "-ar", str(sample_rate),
+            "-f", "s16le", "-c:a", "pcm_s16le", "pipe:1",
+        ],
+        check=True,
+        capture_output=True,
+        timeout=timeout,
+    ).stdout
+    samples = np.frombuffer(decoded, dtype="<i2")
+
+    pixels = -(-len(samples) // samples_per_pixel)  # ceil
+    # Rellenar con el último valor para no inventar picos en el último píxel
+    padded = np.empty(pixels * samples_per_pixel, dtype=np.int16)
+    padded[:len(samples)] = samples
+    padded[len(samples):] = samples[-1] if len(samples) else 0
+    frames = padded.reshape(pixels, samples_per_pixel)
+
+    peaks = np.empty((pixels, 2), dtype=np.int8)
+    # 16 -> 8 bits: desplazamiento aritmético, conserva el signo
+    peaks[:, 0] = frames.min(axis=1) >> 8
+    peaks[:, 1] = frames.max(axis=1) >> 8
+
+    header = PEAKS_HEADER.pack(PEAKS_VERSION, PEAKS_FLAG_8BIT, sample_rate, samples_per_pixel, pixels)
+    return header + peaks.tobytes()
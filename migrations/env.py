@@ -49,6 +49,8 @@ if config.config_file_name is not None:
 from app.core.database import Base
 from app.models.user import User
 from app.models.incident import Incident
+from app.models.audio_blob import AudioBlob
+from app.models.incident_stats import IncidentDailyStats
 
 # add your model's MetaData object here
 target_metadata = Base.metadata
@@ -0,0 +1,52 @@
+"""Indexes for incident list queries
+
+Revision ID: 002_incident_list_indexes
+Revises: 001_initial
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '002_incident_list_indexes'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        # Listado general: ORDER BY created_at DESC, id DESC
+        op.create_index(
+            'ix_incidents_created_at', 'incidents',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # Filtro por usuario (/incidents/?user_id=, /incidents/user/{id}, /users/me/incidents)
+        op.create_index(
+            'ix_incidents_user_id_created_at', 'incidents',
+            ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # Filtro por estado (/incidents/?status=)
+        op.create_index(
+            'ix_incidents_status_created_at', 'incidents',
+            ['status', sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+        # Índice parcial para incidentes sin resolver
+        op.create_index(
+            'ix_incidents_unresolved_created_at', 'incidents',
+            [sa.text('created_at DESC'), sa.text('id DESC')],
+            postgresql_where=sa.text('is_resolved = false'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_incidents_unresolved_created_at', table_name='incidents', postgresql_concurrently=True)
+        op.drop_index('ix_incidents_status_created_at', table_name='incidents', postgresql_concurrently=True)
+        op.drop_index('ix_incidents_user_id_created_at', table_name='incidents', postgresql_concurrently=True)
+        op.drop_index('ix_incidents_created_at', table_name='incidents', postgresql_concurrently=True)
@@ -0,0 +1,25 @@
+"""Add users.token_version
+
+Revision ID: 003_user_token_version
+Revises: 002_incident_list_indexes
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '003_user_token_version'
+down_revision = '002_incident_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('token_version', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
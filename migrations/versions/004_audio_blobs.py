@@ -0,0 +1,47 @@
+"""Content-addressed audio blobs
+
+Revision ID: 004_audio_blobs
+Revises: 003_user_token_version
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '004_audio_blobs'
+down_revision = '003_user_token_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('audio_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('mime_type', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+        sa.UniqueConstraint('path')
+    )
+    
+    # Los incidentes existentes conservan solo la ruta (sha256 NULL)
+    op.add_column('incidents', sa.Column('problem_audio_sha256', sa.String(length=64), nullable=True))
+    op.add_column('incidents', sa.Column('solution_audio_sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'fk_incidents_problem_audio_sha256', 'incidents', 'audio_blobs',
+        ['problem_audio_sha256'], ['sha256']
+    )
+    op.create_foreign_key(
+        'fk_incidents_solution_audio_sha256', 'incidents', 'audio_blobs',
+        ['solution_audio_sha256'], ['sha256']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_incidents_solution_audio_sha256', 'incidents', type_='foreignkey')
+    op.drop_constraint('fk_incidents_problem_audio_sha256', 'incidents', type_='foreignkey')
+    op.drop_column('incidents', 'solution_audio_sha256')
+    op.drop_column('incidents', 'problem_audio_sha256')
+    op.drop_table('audio_blobs')
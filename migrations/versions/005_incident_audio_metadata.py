@@ -0,0 +1,46 @@
+"""Audio metadata columns on incidents
+
+Revision ID: 005_incident_audio_metadata
+Revises: 004_audio_blobs
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '005_incident_audio_metadata'
+down_revision = '004_audio_blobs'
+branch_labels = None
+depends_on = None
+
+AUDIO_COLUMNS = [
+    ('duration', sa.Float()),
+    ('codec', sa.String(length=32)),
+    ('sample_rate', sa.Integer()),
+    ('bitrate', sa.Integer()),
+    ('size', sa.BigInteger()),
+]
+
+
+def upgrade() -> None:
+    # Columnas nulables: los incidentes existentes se completan con
+    # scripts/backfill_audio_metadata.py
+    for prefix in ('problem', 'solution'):
+        for name, type_ in AUDIO_COLUMNS:
+            op.add_column('incidents', sa.Column(f'{prefix}_audio_{name}', type_, nullable=True))
+    
+    # Filtro y orden por duración (/incidents/?min_duration=&sort=duration)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_incidents_problem_audio_duration', 'incidents',
+            ['problem_audio_duration', 'id'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_incidents_problem_audio_duration', table_name='incidents', postgresql_concurrently=True)
+    for prefix in ('solution', 'problem'):
+        for name, _ in reversed(AUDIO_COLUMNS):
+            op.drop_column('incidents', f'{prefix}_audio_{name}')
@@ -0,0 +1,70 @@
+"""Full-text search over incident title and observations
+
+Revision ID: 006_incident_search
+Revises: 005_incident_audio_metadata
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+
+revision = '006_incident_search'
+down_revision = '005_incident_audio_metadata'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Columna generada: PostgreSQL la mantiene sola en cada INSERT/UPDATE.
+        # Configuración 'simple' porque los textos mezclan español e inglés.
+        op.execute(
+            "ALTER TABLE incidents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(observations, '')), 'B')) STORED"
+        )
+        # CONCURRENTLY no puede correr dentro de una transacción
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY ix_incidents_search_vector "
+                "ON incidents USING GIN (search_vector)"
+            )
+    elif dialect == 'sqlite':
+        # FTS5 con contenido externo, sincronizada con triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE incidents_fts USING fts5("
+            "title, observations, content='incidents', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER incidents_fts_ai AFTER INSERT ON incidents BEGIN "
+            "INSERT INTO incidents_fts(rowid, title, observations) "
+            "VALUES (new.id, new.title, new.observations); END"
+        )
+        op.execute(
+            "CREATE TRIGGER incidents_fts_ad AFTER DELETE ON incidents BEGIN "
+            "INSERT INTO incidents_fts(incidents_fts, rowid, title, observations) "
+            "VALUES ('delete', old.id, old.title, old.observations); END"
+        )
+        op.execute(
+            "CREATE TRIGGER incidents_fts_au AFTER UPDATE OF title, observations ON incidents BEGIN "
+            "INSERT INTO incidents_fts(incidents_fts, rowid, title, observations) "
+            "VALUES ('delete', old.id, old.title, old.observations); "
+            "INSERT INTO incidents_fts(rowid, title, observations) "
+            "VALUES (new.id, new.title, new.observations); END"
+        )
+        # Indexar los incidentes existentes
+        op.execute("INSERT INTO incidents_fts(incidents_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_incidents_search_vector")
+        op.execute("ALTER TABLE incidents DROP COLUMN search_vector")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS incidents_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS incidents_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS incidents_fts_ai")
+        op.execute("DROP TABLE IF EXISTS incidents_fts")
@@ -0,0 +1,38 @@
+"""Incident statistics rollup
+
+Revision ID: 007_incident_daily_stats
+Revises: 006_incident_search
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '007_incident_daily_stats'
+down_revision = '006_incident_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Un contador por (día de creación, operador, estado actual)
+    op.create_table('incident_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('day', 'user_id', 'status')
+    )
+    
+    # Carga inicial; después la mantiene el CRUD de incidentes
+    # (o scripts/rebuild_incident_stats.py para recalcularla)
+    op.execute(
+        "INSERT INTO incident_daily_stats (day, user_id, status, count) "
+        "SELECT date(created_at), user_id, status, count(*) FROM incidents "
+        "GROUP BY date(created_at), user_id, status"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('incident_daily_stats')
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Completa los metadatos de audio (duración, codec, sample rate, bitrate,
+tamaño) de los incidentes creados antes de la migración 005.
+
+Solo lee las cabeceras: el principio y el final de cada archivo (lecturas
+por rango en S3), nunca decodifica el audio. Los archivos se procesan en
+paralelo con un pool de hilos, porque el trabajo es casi todo I/O; las
+escrituras se confirman por lote.
+
+Uso:
+    python scripts/backfill_audio_metadata.py
+    python scripts/backfill_audio_metadata.py --workers 16 --batch-size 1000
+    python scripts/backfill_audio_metadata.py --dry-run
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.crud.incident import CRUDIncident
+from app.services.storage import audio_storage
+
+crud_incident = CRUDIncident()
+
+
+def probe(job):
+    incident_id, audio_type, path = job
+    try:
+        return job, audio_storage.probe(path), None
+    except Exception as e:
+        return job, None, e
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8, help="Files read in parallel")
+    parser.add_argument("--batch-size", type=int, default=500, help="Incidents per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Print the metadata without saving it")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    updated = failed = 0
+    after_id = 0
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            while True:
+                jobs = crud_incident.get_missing_audio_metadata(db, after_id=after_id, limit=args.batch_size)
+                if not jobs:
+                    break
+                after_id = jobs[-1][0]
+
+                for (incident_id, audio_type, path), metadata, error in executor.map(probe, jobs):
+                    if error is not None:
+                        failed += 1
+                        print(f"  incidente {incident_id} ({audio_type}): {path}: {error}")
+                        continue
+                    if args.dry_run:
+                        print(f"  incidente {incident_id} ({audio_type}): {metadata}")
+                    elif crud_incident.set_audio_metadata(
+                        db, incident_id=incident_id, audio_type=audio_type,
+                        audio_path=path, metadata=metadata,
+                    ):
+                        updated += 1
+                if not args.dry_run:
+                    db.commit()
+                print(f"Hasta incidente {after_id}: {updated} actualizados, {failed} con error")
+    finally:
+        db.close()
+
+    print(f"Listo en {time.perf_counter() - started:.1f}s: {updated} actualizados, {failed} con error")
+
+
+if __name__ == "__main__":
+    main()
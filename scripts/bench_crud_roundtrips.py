@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compara los viajes a la base de las escrituras del CRUD.
+
+Crea, actualiza y borra N usuarios de prueba (email bench-*@example.com)
+en la base configurada en DATABASE_URL de tres formas:
+
+  antes     add/commit/refresh por fila, query + delete por fila
+  por fila  CRUDBase.create/update/remove con RETURNING
+  en lote   create_many/update_many/remove_many
+
+y cuenta las sentencias y los commits de cada una. Los usuarios de prueba
+se borran al terminar.
+
+Uso:
+    python scripts/bench_crud_roundtrips.py
+    python scripts/bench_crud_roundtrips.py --rows 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import delete, event
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, engine
+from app.crud.user import CRUDUser
+from app.models import incident  # noqa: F401  (registra Incident para las relaciones de User)
+from app.models.user import User
+
+EMAIL_PREFIX = "bench-"
+
+
+class RoundTrips:
+    """Count statements and commits sent to the engine"""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def _statement(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _commit(self, conn):
+        self.commits += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._statement)
+        event.remove(engine, "commit", self._commit)
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+
+def user_rows(rows: int, tag: str):
+    return [
+        {"email": f"{EMAIL_PREFIX}{tag}-{i}@example.com", "name": "Bench", "lastname": str(i), "hashed_password": "x"}
+        for i in range(rows)
+    ]
+
+
+def old_pattern(rows: int):
+    """El patrón anterior: expire_on_commit y un SELECT (refresh) por escritura"""
+    db = Session(bind=engine, autoflush=False)
+    try:
+        users = []
+        for data in user_rows(rows, "antes"):
+            user = User(**data)
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            users.append(user)
+        yield "create"
+        for user in users:
+            user.name = "Bench2"
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        yield "update"
+        for user in users:
+            obj = db.query(User).filter(User.id == user.id).first()
+            db.delete(obj)
+            db.commit()
+        yield "remove"
+    finally:
+        db.close()
+
+
+def per_row(rows: int):
+    crud_user = CRUDUser()
+    db = SessionLocal()
+    try:
+        users = [crud_user.create_with_data(db, obj_in=data) for data in user_rows(rows, "fila")]
+        yield "create"
+        for user in users:
+            crud_user.update(db, db_obj=user, obj_in={"name": "Bench2"})
+        yield "update"
+        for user in users:
+            crud_user.remove(db, id=user.id)
+        yield "remove"
+    finally:
+        db.close()
+
+
+def batched(rows: int):
+    crud_user = CRUDUser()
+    db = SessionLocal()
+    try:
+        users = crud_user.create_many(db, objs_in=user_rows(rows, "lote"))
+        yield "create"
+        ids = [user.id for user in users]
+        crud_user.update_many(db, ids=ids, obj_in={"name": "Bench2"})
+        yield "update"
+        crud_user.remove_many(db, ids=ids)
+        yield "remove"
+    finally:
+        db.close()
+
+
+def run(name: str, steps):
+    """Measure each step of a generator that yields after every phase"""
+    while True:
+        start = time.perf_counter()
+        with RoundTrips() as trips:
+            try:
+                phase = next(steps)
+            except StopIteration:
+                return
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {phase:<8} {trips.statements:>10} {trips.commits:>8} {trips.total:>8} {elapsed * 1000:>10.1f}")
+
+
+def cleanup():
+    db = SessionLocal()
+    try:
+        db.execute(delete(User).where(User.email.like(f"{EMAIL_PREFIX}%")))
+        db.commit()
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200, help="Rows per operation (default 200)")
+    args = parser.parse_args()
+
+    print(f"{engine.dialect.name}, {args.rows} filas por operación")
+    print(f"{'modo':<10} {'op':<8} {'sentencias':>10} {'commits':>8} {'viajes':>8} {'ms':>10}")
+    try:
+        run("antes", old_pattern(args.rows))
+        run("por fila", per_row(args.rows))
+        run("en lote", batched(args.rows))
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Mide el throughput del pool de transcodificación a Opus/OGG.
+
+Genera N archivos WAV sintéticos (voz simulada: tonos modulados + ruido),
+los transcodifica con el mismo código y el mismo tipo de pool que usa
+TranscodeWorker, y reporta archivos/s, segundos de audio por segundo y
+la relación de compresión para cada cantidad de workers.
+
+No toca la base de datos ni el almacenamiento configurado.
+
+Uso:
+    python scripts/bench_transcode.py
+    python scripts/bench_transcode.py --files 40 --seconds 60 --workers 1 2 4 --bitrate 24k
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.transcode import transcode_to_opus
+
+
+def write_wav(path: str, seconds: float, rate: int, seed: int) -> None:
+    rng = random.Random(seed)
+    base = rng.uniform(120, 260)
+    with wave.open(path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        frames = bytearray()
+        for i in range(int(seconds * rate)):
+            t = i / rate
+            envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * t)
+            sample = envelope * (
+                0.6 * math.sin(2 * math.pi * base * t)
+                + 0.3 * math.sin(2 * math.pi * base * 2.5 * t)
+            ) + rng.uniform(-0.05, 0.05)
+            frames += struct.pack("<h", int(max(-1.0, min(1.0, sample)) * 20000))
+        out.writeframes(bytes(frames))
+
+
+def run(sources, workdir: str, workers: int, bitrate: str, ffmpeg: str):
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        # Arranca los procesos antes de medir
+        list(executor.map(abs, range(workers)))
+        started = time.perf_counter()
+        futures = [
+            executor.submit(
+                transcode_to_opus, src, os.path.join(workdir, f"out-{workers}-{i}.ogg"), bitrate, ffmpeg
+            )
+            for i, src in enumerate(sources)
+        ]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+    finally:
+        executor.shutdown()
+    return elapsed, sum(size for _, size, _ in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=16, help="Number of input files")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Length of each input file")
+    parser.add_argument("--rate", type=int, default=44100, help="Sample rate of the input WAVs")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--bitrate", default="32k")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench-transcode-") as workdir:
+        print(f"Generando {args.files} WAV de {args.seconds:.0f}s a {args.rate} Hz...")
+        sources = []
+        for i in range(args.files):
+            path = os.path.join(workdir, f"in-{i}.wav")
+            write_wav(path, args.seconds, args.rate, seed=i)
+            sources.append(path)
+        bytes_in = sum(os.path.getsize(path) for path in sources)
+        audio_seconds = args.files * args.seconds
+
+        print(f"{'workers':>7} {'elapsed':>9} {'files/s':>8} {'audio x':>8} {'MB in/s':>8} {'ratio':>6}")
+        for workers in sorted(set(args.workers)):
+            elapsed, bytes_out = run(sources, workdir, workers, args.bitrate, args.ffmpeg)
+            print(
+                f"{workers:>7} {elapsed:>8.2f}s {args.files / elapsed:>8.2f} "
+                f"{audio_seconds / elapsed:>7.0f}x {bytes_in / elapsed / 1e6:>8.1f} "
+                f"{bytes_in / bytes_out:>5.1f}:1"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Imprime el plan de ejecución (EXPLAIN) de cada consulta de listado del CRUD.
+
+Ejecuta los métodos reales de CRUDIncident contra la base configurada en
+DATABASE_URL, captura el SQL que emiten y le pide el plan al motor.
+Sirve para detectar regresiones de índices (Seq Scan donde había Index Scan).
+
+Uso:
+    python scripts/explain_queries.py            # EXPLAIN
+    python scripts/explain_queries.py --analyze  # EXPLAIN ANALYZE (PostgreSQL)
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event, select
+
+from app.core.database import SessionLocal, engine
+from app.crud.incident import CRUDIncident
+from app.models.incident import Incident, IncidentStatus
+from app.utils.pagination import encode_cursor
+
+
+def capture_statements(fn):
+    """Run fn() and return the (statement, parameters) pairs it executed"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(db, statement, parameters, analyze: bool) -> str:
+    if engine.dialect.name == "postgresql":
+        prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    else:
+        prefix = "EXPLAIN QUERY PLAN "
+    raw = db.connection().connection.cursor()
+    try:
+        raw.execute(prefix + statement, parameters)
+        return "\n".join(" | ".join(str(col) for col in row) for row in raw.fetchall())
+    finally:
+        raw.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyze", action="store_true", help="Use EXPLAIN ANALYZE (executes the queries)")
+    args = parser.parse_args()
+
+    crud_incident = CRUDIncident()
+    db = SessionLocal()
+    try:
+        # Valores reales para que el planner no trabaje con una tabla vacía
+        sample = db.execute(
+            select(Incident.user_id, Incident.created_at, Incident.id)
+            .order_by(Incident.created_at.desc(), Incident.id.desc())
+            .limit(1)
+        ).first()
+        user_id = sample.user_id if sample else 1
+        cursor = encode_cursor(sample.created_at, sample.id) if sample else None
+
+        queries = {
+            "get_multi_with_user()": lambda: crud_incident.get_multi_with_user(db),
+            "get_multi_with_user(status=initiated)": lambda: crud_incident.get_multi_with_user(
+                db, status=IncidentStatus.initiated
+            ),
+            "get_multi_with_user(user_id)": lambda: crud_incident.get_multi_with_user(db, user_id=user_id),
+            "get_multi_with_user(cursor)": lambda: crud_incident.get_multi_with_user(db, cursor=cursor),
+            "get_multi_with_filters(status=unresolved)": lambda: crud_incident.get_multi_with_filters(
+                db, status=IncidentStatus.unresolved
+            ),
+            "get_multi_by_user(user_id)": lambda: crud_incident.get_multi_by_user(db, user_id=user_id),
+            "get_multi_by_user(user_id, cursor)": lambda: crud_incident.get_multi_by_user(
+                db, user_id=user_id, cursor=cursor
+            ),
+            "get(id)": lambda: crud_incident.get(db, id=sample.id if sample else 1),
+        }
+
+        for name, fn in queries.items():
+            for statement, parameters in capture_statements(fn):
+                print("=" * 80)
+                print(name)
+                print("-" * 80)
+                print(statement.strip())
+                print("-" * 80)
+                print(explain(db, statement, parameters, args.analyze))
+        print("=" * 80)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla incident_daily_stats (GET /incidents/stats) a partir
+de la tabla incidents.
+
+La API la mantiene al día en cada escritura; este script sirve para la
+carga inicial de datos importados por fuera de la API o para corregirla
+si alguna vez se desincroniza. Corre en una sola transacción: las
+estadísticas nunca quedan a medio calcular.
+
+Uso:
+    python scripts/rebuild_incident_stats.py
+    python scripts/rebuild_incident_stats.py --dry-run
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.database import SessionLocal
+from app.crud.incident_stats import CRUDIncidentStats
+
+crud_incident_stats = CRUDIncidentStats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Recompute and roll back")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        rows = crud_incident_stats.rebuild(db)
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    action = "calculadas (sin guardar)" if args.dry_run else "recalculadas"
+    print(f"{rows} filas de estadísticas {action} en {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
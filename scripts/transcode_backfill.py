@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Transcodifica a Opus/OGG el audio de los incidentes existentes.
+
+La API solo transcodifica las subidas nuevas; los incidentes anteriores
+quedan como están hasta correr este script a mano, una vez. La conversión
+es con pérdida: los originales NO se borran, conservan su archivo y su
+referencia en audio_blobs, y cada cambio se anota en un manifiesto CSV
+(incidente, tipo, ruta original, ruta nueva) para poder revisarlo o
+volver atrás.
+
+Uso:
+    python scripts/transcode_backfill.py --dry-run
+    python scripts/transcode_backfill.py --manifest transcode_backfill.csv
+    python scripts/transcode_backfill.py --workers 4 --limit 500
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.incident import CRUDIncident
+from app.services.storage import audio_storage
+from app.services.transcoding import TRANSCODED_EXTENSION, TranscodeWorker
+
+crud_incident = CRUDIncident()
+
+
+def pending_jobs(limit):
+    db = SessionLocal()
+    try:
+        after_id = 0
+        found = 0
+        while limit is None or found < limit:
+            jobs = crud_incident.get_audio_not_matching(
+                db, extension=TRANSCODED_EXTENSION, after_id=after_id, limit=500
+            )
+            if not jobs:
+                return
+            after_id = jobs[-1][0]
+            for job in jobs:
+                if limit is not None and found >= limit:
+                    return
+                found += 1
+                yield job
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.TRANSCODE_WORKERS, help="ffmpeg processes in parallel")
+    parser.add_argument("--limit", type=int, default=None, help="Transcode at most this many audio files")
+    parser.add_argument("--manifest", default="transcode_backfill.csv", help="CSV the changes are appended to")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the audio that would be transcoded")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        total = 0
+        for incident_id, audio_type in pending_jobs(args.limit):
+            total += 1
+            print(f"  incidente {incident_id} ({audio_type})")
+        print(f"{total} audios por transcodificar")
+        return
+
+    transcoder = TranscodeWorker(
+        audio_storage,
+        workers=args.workers,
+        bitrate=settings.TRANSCODE_BITRATE,
+        ffmpeg=settings.TRANSCODE_FFMPEG,
+        timeout=settings.TRANSCODE_TIMEOUT,
+        keep_originals=True,
+    )
+    transcoder.start()
+    if not transcoder.running:
+        sys.exit("No se pudo iniciar el transcodificador (¿ffmpeg instalado?)")
+
+    def run(job):
+        incident_id, audio_type = job
+        original = transcoder.current_audio_path(incident_id, audio_type)
+        try:
+            done = transcoder.process(incident_id, audio_type)
+        except Exception as e:
+            return job, original, None, e
+        new_path = transcoder.current_audio_path(incident_id, audio_type) if done else None
+        return job, original, new_path, None
+
+    converted = skipped = failed = 0
+    started = time.perf_counter()
+    try:
+        with open(args.manifest, "a", newline="") as manifest_file, \
+                ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            manifest = csv.writer(manifest_file)
+            for (incident_id, audio_type), original, new_path, error in executor.map(run, pending_jobs(args.limit)):
+                if error is not None:
+                    failed += 1
+                    print(f"  incidente {incident_id} ({audio_type}): {original}: {error}")
+                elif new_path is None:
+                    skipped += 1
+                else:
+                    converted += 1
+                    manifest.writerow([incident_id, audio_type, original, new_path])
+                    manifest_file.flush()
+    finally:
+        transcoder.stop()
+
+    print(
+        f"Listo en {time.perf_counter() - started:.1f}s: {converted} transcodificados, "
+        f"{skipped} sin cambios, {failed} con error. Manifiesto: {args.manifest}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import io
+import math
+import os
+import struct
+import tempfile
+import wave
+
+# La app lee la configuración al importarse: se fija antes de cualquier import
+# de app.*. Base SQLite propia de los tests, nunca la de DATABASE_URL.
+_TEST_DIR = tempfile.mkdtemp(prefix="agent-api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DIR}/test.db"
+os.environ["SECRET_KEY"] = "test-secret-key-" + "x" * 32
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["EMAIL_OUTBOX_ENABLED"] = "false"
+os.environ["TRANSCODE_ENABLED"] = "false"
+os.environ["PEAKS_ENABLED"] = "false"
+os.environ["ALLOWED_AUDIO_TYPES"] = '["audio/mpeg", "audio/wav", "audio/x-wav", "audio/ogg"]'
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.cache import principal_cache, result_cache
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import create_access_token
+from app.crud.incident import INCIDENT_PAGES
+from app.main import app
+from app.models import audio_blob, incident, incident_stats  # noqa: F401  (registra las tablas)
+from app.models.user import User, UserRole
+
+
+def make_wav(seconds: float = 0.5, rate: int = 8000, freq: float = 440.0) -> bytes:
+    """Mono 16-bit PCM sine; a different freq gives a different file"""
+    frames = b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * freq * i / rate)))
+        for i in range(int(seconds * rate))
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(frames)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Audio files go under static/ of the working directory: use a fresh one"""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static/audio/blobs")
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.drop_all(engine)
+    with engine.begin() as conn:
+        # Tabla FTS5 de la búsqueda: se crea con DDL propio, drop_all no la ve
+        conn.execute(text("DROP TABLE IF EXISTS incidents_fts"))
+    Base.metadata.create_all(engine)
+    principal_cache.clear()
+    result_cache.bump(INCIDENT_PAGES)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def users(db):
+    """One verified user per role, by role name"""
+    created = {}
+    for role in (UserRole.admin, UserRole.supervisor, UserRole.operator):
+        user = User(
+            email=f"{role.value}@example.com", name=role.value.title(), lastname="Test",
+            hashed_password="x", role=role, is_verified=True, is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        created[role.value] = user
+    return created
+
+
+@pytest.fixture
+def headers(users):
+    return {
+        role: {"Authorization": f"Bearer {create_access_token(user.id)}"}
+        for role, user in users.items()
+    }
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def create_incident(client, headers):
+    """POST /incidents/ as the operator; returns the response JSON"""
+    def create(title: str = "Incident", freq: float = 440.0):
+        response = client.post(
+            "/api/v1/incidents/",
+            data={"title": title},
+            files={"problem_audio": ("problem.wav", make_wav(freq=freq), "audio/wav")},
+            headers=headers["operator"],
+        )
+        assert response.status_code == 201, response.text
+        return response.json()
+    return create
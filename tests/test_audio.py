@@ -0,0 +1,183 @@
+import hashlib
+import os
+import shutil
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud.audio_blob import CRUDAudioBlob
+from app.api.v1.endpoints import incidents as incidents_endpoints
+from app.crud.incident import CRUDIncident
+from app.services.storage import audio_storage
+from app.services.transcoding import TranscodeWorker
+from app.utils.transcode import transcode_to_opus
+from .conftest import make_wav
+
+crud_audio_blob = CRUDAudioBlob()
+crud_incident = CRUDIncident()
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+
+
+def test_identical_uploads_share_one_blob_until_released(db, create_incident):
+    first = create_incident(title="First")
+    second = create_incident(title="Second")
+    other = create_incident(title="Other", freq=880.0)
+
+    path = first["problem_audio_path"]
+    assert second["problem_audio_path"] == path
+    assert other["problem_audio_path"] != path
+    assert os.path.isfile(path)
+    blob = crud_audio_blob.get_by_path(db, path)
+    assert blob.ref_count == 2
+
+    # La primera liberación deja el archivo para el otro incidente
+    assert audio_storage.delete_audio_file(db, path) is False
+    db.expire_all()
+    assert crud_audio_blob.get_by_path(db, path).ref_count == 1
+    assert os.path.isfile(path)
+
+    assert audio_storage.delete_audio_file(db, path) is True
+    db.expire_all()
+    assert crud_audio_blob.get_by_path(db, path) is None
+    assert not os.path.exists(path)
+    assert os.path.isfile(other["problem_audio_path"])
+
+
+class InlineTranscoder(TranscodeWorker):
+    """Runs ffmpeg in the test process instead of the process pool"""
+
+    def submit(self, fn, *args):
+        return fn(*args)
+
+
+@needs_ffmpeg
+def test_transcode_is_deterministic(workdir):
+    src = workdir / "in.wav"
+    src.write_bytes(make_wav())
+    first = transcode_to_opus(str(src), str(workdir / "a.ogg"), "32k")
+    second = transcode_to_opus(str(src), str(workdir / "b.ogg"), "32k")
+    assert first[:2] == second[:2]
+
+
+@needs_ffmpeg
+def test_transcoded_copies_keep_sharing_one_blob(db, create_incident):
+    incidents = [create_incident(title=f"Same audio {i}") for i in range(3)]
+    wav_path = incidents[0]["problem_audio_path"]
+    assert crud_audio_blob.get_by_path(db, wav_path).ref_count == 3
+
+    transcoder = InlineTranscoder(audio_storage)
+    for incident in incidents:
+        assert transcoder.process(incident["id"], "problem") is True
+
+    paths = {crud_incident.get(db, id=incident["id"]).problem_audio_path for incident in incidents}
+    assert len(paths) == 1
+    ogg_path = paths.pop()
+    assert ogg_path.endswith(".ogg")
+    db.expire_all()
+    assert crud_audio_blob.get_by_path(db, ogg_path).ref_count == 3
+    # El WAV original se soltó con la última referencia
+    assert crud_audio_blob.get_by_path(db, wav_path) is None
+    assert not os.path.exists(wav_path)
+
+
+class RecordingWorker:
+    """Stands in for peaks_worker and records the jobs it is given"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def enqueue(self, incident_id, audio_type):
+        self.jobs.append((incident_id, audio_type))
+
+
+@needs_ffmpeg
+def test_transcode_copies_peaks_or_requests_them(db, create_incident):
+    without_peaks = create_incident(title="Without peaks")
+    with_peaks = create_incident(title="With peaks", freq=660.0)
+    with open(audio_storage.peaks_path(with_peaks["problem_audio_path"]), "wb") as peaks_file:
+        peaks_file.write(b"peaks")
+
+    peaks = RecordingWorker()
+    transcoder = InlineTranscoder(audio_storage, peaks=peaks)
+    assert transcoder.process(without_peaks["id"], "problem") is True
+    assert transcoder.process(with_peaks["id"], "problem") is True
+
+    # Sin picos previos se piden para el .ogg; con picos se copian
+    assert peaks.jobs == [(without_peaks["id"], "problem")]
+    new_path = crud_incident.get(db, id=with_peaks["id"]).problem_audio_path
+    with open(audio_storage.peaks_path(new_path), "rb") as peaks_file:
+        assert peaks_file.read() == b"peaks"
+    assert not os.path.exists(audio_storage.peaks_path(with_peaks["problem_audio_path"]))
+
+
+def test_uploads_are_staged_outside_the_public_tree(create_incident):
+    staging = os.path.abspath(audio_storage.backend.staging_dir())
+    assert os.path.commonpath([staging, os.path.abspath("static")]) != os.path.abspath("static")
+
+    incident = create_incident()
+    assert os.path.isfile(incident["problem_audio_path"])
+    # Nada a medio escribir queda en staging ni bajo static/
+    assert os.listdir(staging) == []
+    leftovers = [name for _, _, names in os.walk("static") for name in names if name.endswith(".part")]
+    assert leftovers == []
+
+
+def test_release_unlinks_the_file_only_after_commit(db, create_incident):
+    path = create_incident()["problem_audio_path"]
+    blob = crud_audio_blob.get_by_path(db, path)
+
+    assert audio_storage.delete_audio_file(db, path, commit=False) is True
+    assert os.path.isfile(path)
+    db.rollback()
+    assert os.path.isfile(path)
+    assert crud_audio_blob.get_by_path(db, path).ref_count == 1
+
+    # Liberado y vuelto a tomar antes del commit: el archivo se queda
+    assert audio_storage.delete_audio_file(db, path, commit=False) is True
+    crud_audio_blob.acquire(db, sha256=blob.sha256, path=path, mime_type=blob.mime_type, size=blob.size)
+    db.commit()
+    assert os.path.isfile(path)
+    assert audio_storage.discard_unreferenced(blob.sha256, path) is False
+
+    assert audio_storage.delete_audio_file(db, path) is True
+    assert not os.path.exists(path)
+    db.expire_all()
+    assert crud_audio_blob.get_by_path(db, path) is None
+
+
+def test_upload_of_a_rolled_back_request_is_discarded(client, db, headers, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise HTTPException(status_code=409, detail="Conflict")
+
+    monkeypatch.setattr(incidents_endpoints.async_crud_incident, "create_with_data", fail)
+    audio = make_wav(freq=123.0)
+    path = audio_storage.blob_path(hashlib.sha256(audio).hexdigest(), "wav")
+    response = client.post(
+        "/api/v1/incidents/",
+        data={"title": "Rolled back"},
+        files={"problem_audio": ("problem.wav", audio, "audio/wav")},
+        headers=headers["operator"],
+    )
+    assert response.status_code == 409
+
+    # La limpieza corre en un hilo aparte tras el rollback
+    deadline = time.monotonic() + 5
+    while os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not os.path.exists(path)
+    assert crud_audio_blob.get_by_path(db, path) is None
+
+
+@needs_ffmpeg
+def test_backfill_transcode_keeps_the_original(db, create_incident):
+    incident = create_incident()
+    wav_path = incident["problem_audio_path"]
+
+    transcoder = InlineTranscoder(audio_storage, keep_originals=True)
+    assert transcoder.process(incident["id"], "problem") is True
+
+    assert crud_incident.get(db, id=incident["id"]).problem_audio_path.endswith(".ogg")
+    assert os.path.isfile(wav_path)
+    assert crud_audio_blob.get_by_path(db, wav_path).ref_count == 1
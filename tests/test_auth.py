@@ -0,0 +1,85 @@
+from argon2 import PasswordHasher
+
+from app.core.cache import principal_cache
+from app.core.security import create_access_token, password_needs_rehash, verify_password
+from app.models.user import User, UserRole
+
+
+def test_metrics_require_admin(client, headers):
+    assert client.get("/metrics").status_code in (401, 403)
+    assert client.get("/metrics", headers=headers["supervisor"]).status_code == 403
+    response = client.get("/metrics", headers=headers["admin"])
+    assert response.status_code == 200
+    assert "principal_cache" in response.json()
+
+
+def _warm(client, headers):
+    """One authenticated request so the principal is cached"""
+    return client.get("/api/v1/users/me/incidents", headers=headers).status_code
+
+
+def test_role_change_is_seen_by_the_next_request(client, users, headers):
+    operator = users["operator"]
+    assert _warm(client, headers["operator"]) == 200
+    assert principal_cache.get(operator.id)["role"] == UserRole.operator
+    assert client.get("/api/v1/incidents/", headers=headers["operator"]).status_code == 403
+
+    response = client.put(f"/api/v1/users/{operator.id}", json={"role": "supervisor"}, headers=headers["admin"])
+    assert response.status_code == 200, response.text
+    assert client.get("/api/v1/incidents/", headers=headers["operator"]).status_code == 200
+
+
+def test_deleted_user_is_rejected_by_the_next_request(client, users, headers):
+    assert _warm(client, headers["operator"]) == 200
+
+    response = client.delete(f"/api/v1/users/{users['operator'].id}", headers=headers["supervisor"])
+    assert response.status_code == 200, response.text
+    assert _warm(client, headers["operator"]) == 401
+
+
+def test_verified_email_is_seen_by_the_next_request(client, db):
+    user = User(
+        email="new@example.com", name="New", lastname="Test", hashed_password="x",
+        is_active=True, is_verified=False, verification_code="123456",
+    )
+    db.add(user)
+    db.commit()
+    user_headers = {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    assert _warm(client, user_headers) == 403
+
+    response = client.post("/api/v1/auth/verify-email", json={"email": user.email, "code": "123456"})
+    assert response.status_code == 200, response.text
+    assert _warm(client, user_headers) == 200
+
+
+def test_password_reset_drops_the_cached_principal(client, users, headers):
+    operator = users["operator"]
+    assert _warm(client, headers["operator"]) == 200
+    assert principal_cache.get(operator.id) is not None
+
+    token = create_access_token(operator.id)
+    body = {"token": token, "new_password": "NewPassw0rd!"}
+    response = client.post("/api/v1/auth/reset-password", json=body)
+    assert response.status_code == 200, response.text
+    assert principal_cache.get(operator.id) is None
+
+    login = client.post("/api/v1/auth/login", data={"username": operator.email, "password": "NewPassw0rd!"})
+    assert login.status_code == 200, login.text
+
+
+def test_login_upgrades_an_outdated_hash(client, db):
+    old_hash = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1).hash("Passw0rd!")
+    assert password_needs_rehash(old_hash)
+    user = User(
+        email="old@example.com", name="Old", lastname="Hash", hashed_password=old_hash,
+        is_active=True, is_verified=True,
+    )
+    db.add(user)
+    db.commit()
+
+    response = client.post("/api/v1/auth/login", data={"username": user.email, "password": "Passw0rd!"})
+    assert response.status_code == 200, response.text
+    db.refresh(user)
+    assert user.hashed_password != old_hash
+    assert not password_needs_rehash(user.hashed_password)
+    assert verify_password("Passw0rd!", user.hashed_password)
@@ -0,0 +1,37 @@
+import pytest
+
+from app.core.cache import LocalResultBackend, RedisResultBackend, ResultCache
+
+
+@pytest.fixture(params=["local", "redis"])
+def backend(request):
+    if request.param == "local":
+        return LocalResultBackend(maxsize=10, ttl=60)
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisResultBackend(fakeredis.FakeRedis(), ttl=60)
+
+
+def test_result_cache_serves_until_bumped(backend):
+    cache = ResultCache(backend)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [{"id": len(calls)}]
+
+    assert cache.get_or_set("pages", "key", compute) == [{"id": 1}]
+    assert cache.get_or_set("pages", "key", compute) == [{"id": 1}]
+    cache.bump("pages")
+    assert cache.get_or_set("pages", "key", compute) == [{"id": 2}]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+
+
+def test_result_cache_falls_back_when_the_backend_fails():
+    class Unavailable(LocalResultBackend):
+        def generation(self, namespace):
+            raise ConnectionError("down")
+
+    cache = ResultCache(Unavailable(maxsize=10, ttl=60))
+    assert cache.get_or_set("pages", "key", lambda: ["fresh"]) == ["fresh"]
+    assert cache.stats()["errors"] == 1
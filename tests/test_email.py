@@ -0,0 +1,129 @@
+import socket
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from app.services.email import EmailOutbox
+
+pytest.importorskip("aiosmtpd")
+from aiosmtpd.controller import Controller  # noqa: E402
+
+
+class RecordingHandler:
+    """Local SMTP server: counts connections and can refuse the first messages"""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.connections = 0
+        self.attempts = []
+        self.messages = []
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts.append(time.monotonic())
+        if len(self.attempts) <= self.fail_first:
+            return "451 4.3.0 Try again later"
+        self.messages.append(envelope.rcpt_tos[0])
+        return "250 OK"
+
+
+class BatchRecordingOutbox(EmailOutbox):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def _send_batch(self, batch, final=False):
+        self.batches.append(len(batch))
+        super()._send_batch(batch, final=final)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    servers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        servers.append(controller)
+        return controller
+
+    yield start
+    for controller in servers:
+        controller.stop()
+
+
+def _message(i):
+    msg = EmailMessage()
+    msg["From"] = "noreply@agent-api.com"
+    msg["To"] = f"user{i}@example.com"
+    msg["Subject"] = f"Message {i}"
+    msg.set_content("body")
+    return msg
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate():
+        time.sleep(0.02)
+    return predicate()
+
+
+def test_outbox_sends_batches_over_one_connection(smtp_server):
+    handler = RecordingHandler()
+    server = smtp_server(handler)
+    outbox = BatchRecordingOutbox(server.hostname, server.port, batch_size=3)
+
+    # Encolados antes de arrancar: el worker los toma de a batch_size
+    for i in range(7):
+        outbox.enqueue(_message(i))
+    outbox.start()
+    assert _wait_for(lambda: outbox.sent == 7)
+    outbox.stop()
+
+    assert handler.messages == [f"user{i}@example.com" for i in range(7)]
+    assert outbox.batches == [3, 3, 1]
+    assert handler.connections == 1
+    assert outbox.stats()["failed"] == 0
+
+
+def test_outbox_retries_with_exponential_backoff(smtp_server):
+    handler = RecordingHandler(fail_first=2)
+    server = smtp_server(handler)
+    outbox = EmailOutbox(server.hostname, server.port, retry_base_delay=0.2, max_attempts=5)
+
+    outbox.start()
+    outbox.enqueue(_message(0))
+    assert _wait_for(lambda: outbox.sent == 1)
+    outbox.stop()
+
+    assert handler.messages == ["user0@example.com"]
+    assert (outbox.retried, outbox.failed) == (2, 0)
+    # Reintentos a 0.2 s y luego 0.4 s; tras cada fallo se abre otra conexión
+    first_wait, second_wait = (b - a for a, b in zip(handler.attempts, handler.attempts[1:]))
+    assert 0.2 <= first_wait < 0.4 <= second_wait
+    assert handler.connections == 3
+
+
+def test_outbox_gives_up_after_max_attempts(smtp_server):
+    handler = RecordingHandler(fail_first=100)
+    server = smtp_server(handler)
+    outbox = EmailOutbox(server.hostname, server.port, retry_base_delay=0.05, max_attempts=3)
+
+    outbox.start()
+    outbox.enqueue(_message(0))
+    assert _wait_for(lambda: outbox.failed == 1)
+    outbox.stop()
+
+    assert len(handler.attempts) == 3
+    assert (outbox.sent, outbox.retried) == (0, 2)
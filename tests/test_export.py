@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from app.crud.incident import CRUDIncident
+from app.models.incident import IncidentStatus
+from app.schemas.incident import IncidentWithUser
+from app.utils.export import CHUNK_SIZE, csv_chunks, ndjson_chunks
+
+crud_incident = CRUDIncident()
+FIELDS = list(IncidentWithUser.model_fields)
+
+
+def _create(db, users, count):
+    return [
+        crud_incident.create_with_data(db, obj_in={
+            "title": f"Incident {i}", "observations": "línea, con \"comillas\"",
+            "problem_audio_path": f"{i}.wav", "user_id": users["operator"].id,
+        }).id
+        for i in range(count)
+    ]
+
+
+def test_export_ndjson_and_csv(client, db, users, headers):
+    ids = _create(db, users, 3)
+    crud_incident.update_status(db, db_obj=crud_incident.get(db, id=ids[0]), status=IncidentStatus.resolved, is_resolved=True)
+
+    response = client.get("/api/v1/incidents/export", headers=headers["supervisor"])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith('.ndjson"')
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["id"] for item in items] == ids[::-1]
+    assert set(items[0]) == set(FIELDS)
+    assert items[0]["user_name"] == "Operator"
+
+    response = client.get(
+        "/api/v1/incidents/export", params={"format": "csv", "status": "resolved"}, headers=headers["supervisor"]
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == FIELDS
+    record = dict(zip(rows[0], rows[1]))
+    assert len(rows) == 2
+    assert (record["id"], record["status"]) == (str(ids[0]), "resolved")
+    assert record["observations"] == "línea, con \"comillas\""
+
+    assert client.get("/api/v1/incidents/export", headers=headers["operator"]).status_code == 403
+
+
+def test_export_reads_rows_in_batches(db, users):
+    ids = _create(db, users, 5)
+    rows = crud_incident.iter_with_user(db, batch_size=2)
+    assert next(rows)["id"] == ids[-1]
+    assert [row["id"] for row in rows] == ids[-2::-1]
+
+
+def _counted(rows, consumed):
+    for row in rows:
+        consumed.append(row)
+        yield row
+
+
+def test_chunks_are_bounded_and_lazy():
+    row = {
+        "id": 1, "title": "x" * 200, "status": IncidentStatus.initiated,
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    }
+    total = 2000
+
+    consumed = []
+    chunks = ndjson_chunks(_counted((dict(row, id=i) for i in range(total)), consumed))
+    first = next(chunks)
+    # El primer bloque sale sin haber leído todas las filas
+    assert CHUNK_SIZE <= len(first) < CHUNK_SIZE + 1024
+    assert len(consumed) < total
+    lines = (first + b"".join(chunks)).decode().splitlines()
+    assert len(lines) == total
+    assert json.loads(lines[-1]) == {
+        "id": total - 1, "title": "x" * 200, "status": "initiated", "created_at": "2024-01-02T03:04:05+00:00",
+    }
+
+    consumed = []
+    chunks = csv_chunks(_counted((dict(row, id=i) for i in range(total)), consumed), fieldnames=["id", "title", "status"])
+    sizes = [len(chunk) for chunk in chunks]
+    assert len(sizes) > 1 and all(size < CHUNK_SIZE + 1024 for size in sizes)
+    assert len(consumed) == total
@@ -0,0 +1,205 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.core.cache import result_cache
+from app.core.database import SessionLocal, engine
+from app.crud.incident import INCIDENT_PAGES, CRUDIncident, crud_incident_stats
+from app.models.incident import IncidentStatus
+
+crud_incident = CRUDIncident()
+
+
+def _walk(client, path, headers, limit):
+    """Follow X-Next-Cursor until the last page; returns the ids in order"""
+    ids, cursor = [], None
+    for _ in range(50):
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+    raise AssertionError(f"{path} kept returning a next cursor: {ids}")
+
+
+def test_cursor_walk_returns_every_incident_once(client, headers, users, create_incident):
+    # Creados en el mismo segundo: created_at empata y desempata el id
+    created = [create_incident(title=f"Incident {i}", freq=300 + i)["id"] for i in range(5)]
+
+    for path, role in (
+        ("/api/v1/incidents/", "supervisor"),
+        (f"/api/v1/incidents/user/{users['operator'].id}", "supervisor"),
+        ("/api/v1/users/me/incidents", "operator"),
+    ):
+        ids = _walk(client, path, headers[role], limit=2)
+        assert ids == sorted(created, reverse=True), path
+
+
+def _summary(db):
+    today = date.today()
+    return crud_incident_stats.get_summary(db, date_from=today - timedelta(days=1), date_to=today + timedelta(days=1))
+
+
+def test_status_changes_keep_rollup_equal_to_rebuild(db, users, create_incident):
+    ids = [create_incident(title=f"Incident {i}", freq=300 + i)["id"] for i in range(3)]
+
+    # Dos sesiones con el mismo incidente cargado: la segunda escribe con un
+    # db_obj cuyo estado en memoria ya no es el de la base
+    other = SessionLocal()
+    try:
+        stale = crud_incident.get(other, id=ids[0])
+        crud_incident.update_status(db, db_obj=crud_incident.get(db, id=ids[0]), status=IncidentStatus.resolved, is_resolved=True)
+        crud_incident.update_status(other, db_obj=stale, status=IncidentStatus.unresolved, is_resolved=False)
+
+        stale = crud_incident.get(other, id=ids[1])
+        crud_incident.update_status(db, db_obj=crud_incident.get(db, id=ids[1]), status=IncidentStatus.unresolved, is_resolved=False)
+        crud_incident.add_solution_audio(other, db_obj=stale, solution_audio_path="solution.wav", is_resolved=True)
+    finally:
+        other.close()
+    crud_incident.update_status(db, db_obj=crud_incident.get(db, id=ids[2]), status=IncidentStatus.initiated, is_resolved=False)
+
+    maintained = _summary(db)
+    assert maintained["totals"] == {"initiated": 1, "resolved": 1, "unresolved": 1, "total": 3}
+    crud_incident_stats.rebuild(db)
+    db.commit()
+    assert _summary(db) == maintained
+
+
+def test_bulk_status_moves_rollup_counts(client, db, users, headers, create_incident):
+    operator_ids = [create_incident(title=f"Operator {i}", freq=300 + i)["id"] for i in range(3)]
+    # Solo los operadores crean incidentes por la API: uno de otro rol va directo
+    admin_id = crud_incident.create_with_data(
+        db, obj_in={"title": "Admin", "problem_audio_path": "admin.wav", "user_id": users["admin"].id}
+    ).id
+
+    def bulk(role, **body):
+        response = client.patch("/api/v1/incidents/bulk-status", json=body, headers=headers[role])
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    # Supervisores: solo incidentes de operadores; los inexistentes se omiten
+    result = bulk("supervisor", status="resolved", ids=operator_ids + [admin_id, 999])
+    assert result == {"status": "resolved", "updated": 3, "ids": operator_ids}
+    assert bulk("supervisor", status="resolved", ids=operator_ids)["updated"] == 0
+    result = bulk("admin", status="unresolved", filter={"status": "resolved", "user_id": users["operator"].id})
+    assert result["ids"] == operator_ids
+
+    summary = _summary(db)
+    assert summary["totals"] == {"initiated": 1, "resolved": 0, "unresolved": 3, "total": 4}
+    by_operator = {entry["user_id"]: entry for entry in summary["by_operator"]}
+    assert by_operator[users["operator"].id]["unresolved"] == 3
+    assert by_operator[users["admin"].id]["initiated"] == 1
+    crud_incident_stats.rebuild(db)
+    db.commit()
+    assert _summary(db) == summary
+
+
+def test_incident_pages_are_cached_until_a_write(client, db, users, headers, create_incident):
+    first = create_incident(title="First")
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    def list_titles():
+        statements.clear()
+        response = client.get("/api/v1/incidents/", headers=headers["supervisor"])
+        assert response.status_code == 200
+        return [item["title"] for item in response.json()]
+
+    def incident_queries():
+        return [sql for sql in statements if "FROM incidents" in sql]
+
+    before = result_cache.stats()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        # Versiones de la página y filas: dos consultas, luego ninguna
+        assert list_titles() == ["First"]
+        assert len(incident_queries()) == 2
+        assert list_titles() == ["First"]
+        assert incident_queries() == []
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert result_cache.stats()["hits"] == before["hits"] + 2
+
+    # Cada escritura invalida las páginas: la siguiente lectura ve el cambio
+    create_incident(title="Second", freq=550)
+    assert list_titles() == ["Second", "First"]
+
+    client.patch("/api/v1/incidents/bulk-status", json={"status": "unresolved", "ids": [first["id"]]}, headers=headers["admin"])
+    statuses = {item["id"]: item["status"] for item in client.get("/api/v1/incidents/", headers=headers["supervisor"]).json()}
+    assert statuses[first["id"]] == "unresolved"
+
+    client.put(f"/api/v1/users/{users['operator'].id}", json={"name": "Renamed"}, headers=headers["admin"])
+    names = {item["user_name"] for item in client.get("/api/v1/incidents/", headers=headers["supervisor"]).json()}
+    assert names == {"Renamed"}
+
+    # Una escritura que no se confirma no invalida nada
+    invalidations = result_cache.stats()["invalidations"]
+    crud_incident.create_with_data(
+        db, obj_in={"title": "Rolled back", "problem_audio_path": "x.wav", "user_id": users["operator"].id},
+        commit=False,
+    )
+    db.rollback()
+    assert result_cache.stats()["invalidations"] == invalidations
+
+
+def test_search_ranks_title_matches_first(client, db, users, headers):
+    def create(title, observations=None):
+        return crud_incident.create_with_data(db, obj_in={
+            "title": title, "observations": observations,
+            "problem_audio_path": f"{title}.wav", "user_id": users["operator"].id,
+        }).id
+
+    in_observations = create("Network down", "router needs a reboot")
+    in_title = create("Router reboot")
+    unrelated = create("Printer jam", "paper stuck")
+
+    def search(q, **params):
+        response = client.get("/api/v1/incidents/search", params={"q": q, **params}, headers=headers["supervisor"])
+        assert response.status_code == 200, response.text
+        return [item["id"] for item in response.json()]
+
+    # El título pesa más que las observaciones; sin operadores FTS del usuario
+    assert search("router") == [in_title, in_observations]
+    assert search("Router REBOOT") == [in_title, in_observations]
+    assert search('"router" OR printer*') == []
+    assert search("...") == []
+    assert search("router", status="resolved") == []
+
+    # Los triggers mantienen el índice al editar el título
+    crud_incident.update(db, db_obj=crud_incident.get(db, id=unrelated), obj_in={"title": "Router fan"})
+    assert unrelated in search("router")
+    assert search("printer") == []
+
+
+def test_incident_list_revalidates_without_loading_rows(client, headers, create_incident):
+    create_incident(title="First")
+    response = client.get("/api/v1/incidents/", headers=headers["supervisor"])
+    etag = response.headers["ETag"]
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # Sin la página en caché: el 304 sale de la consulta de versiones
+    result_cache.bump(INCIDENT_PAGES)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        cached = client.get("/api/v1/incidents/", headers={**headers["supervisor"], "If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert cached.status_code == 304
+    incident_queries = [sql for sql in statements if "FROM incidents" in sql]
+    assert len(incident_queries) == 1
+    assert "incidents.title" not in incident_queries[0]
+
+    create_incident(title="Second", freq=550.0)
+    response = client.get("/api/v1/incidents/", headers={**headers["supervisor"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [item["title"] for item in response.json()] == ["Second", "First"]
@@ -0,0 +1,109 @@
+import anyio
+import pytest
+
+from app.utils.responses import RangeFileResponse
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def audio_file(workdir):
+    path = workdir / "audio.bin"
+    path.write_bytes(DATA)
+    return str(path)
+
+
+def _send(response, extensions=None):
+    """Run the response as ASGI; returns (start message, body messages)"""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "extensions": extensions or {}}
+    anyio.run(response, scope, receive, send)
+    return messages[0], messages[1:]
+
+
+def _body(messages):
+    return b"".join(message.get("body", b"") for message in messages)
+
+
+def test_range_gives_partial_content(audio_file):
+    response = RangeFileResponse(audio_file, {"range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+    assert response.headers["content-length"] == "100"
+    assert _body(_send(response)[1]) == DATA[100:200]
+
+    # Rango abierto y sufijo
+    assert _body(_send(RangeFileResponse(audio_file, {"range": "bytes=10000-"}))[1]) == DATA[10000:]
+    assert _body(_send(RangeFileResponse(audio_file, {"range": "bytes=-40"}))[1]) == DATA[-40:]
+
+
+def test_multiple_ranges_send_the_whole_file(audio_file):
+    response = RangeFileResponse(audio_file, {"range": "bytes=0-9,20-29"})
+    assert response.status_code == 200
+    assert "content-range" not in response.headers
+    assert _body(_send(response)[1]) == DATA
+
+
+def test_if_range_mismatch_sends_the_whole_file(audio_file):
+    etag = RangeFileResponse(audio_file, {}).headers["etag"]
+    assert RangeFileResponse(audio_file, {"range": "bytes=0-9", "if-range": etag}).status_code == 206
+
+    response = RangeFileResponse(audio_file, {"range": "bytes=0-9", "if-range": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(DATA))
+
+
+@pytest.mark.parametrize("range_header", [f"bytes={len(DATA)}-", "bytes=-0", "bytes=50-10"])
+def test_unsatisfiable_range_is_416(audio_file, range_header):
+    response = RangeFileResponse(audio_file, {"range": range_header})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+    assert _body(_send(response)[1]) == b""
+
+
+def test_matching_etag_is_304(audio_file):
+    etag = RangeFileResponse(audio_file, {}).headers["etag"]
+    response = RangeFileResponse(audio_file, {"if-none-match": f'"other", {etag}', "range": "bytes=0-9"})
+    assert response.status_code == 304
+    assert "content-length" not in response.headers
+    assert _body(_send(response)[1]) == b""
+    assert RangeFileResponse(audio_file, {"if-none-match": '"other"'}).status_code == 200
+
+
+def test_chunked_fallback_sends_bounded_chunks(audio_file):
+    response = RangeFileResponse(audio_file, {"range": "bytes=5-5004"})
+    response.chunk_size = 1024
+    start, messages = _send(response)
+
+    assert start["status"] == 206
+    assert [len(message["body"]) for message in messages] == [1024] * 4 + [904]
+    assert [message["more_body"] for message in messages] == [True] * 4 + [False]
+    assert _body(messages) == DATA[5:5005]
+
+
+def test_zerocopy_is_used_when_the_server_offers_it(audio_file):
+    response = RangeFileResponse(audio_file, {"range": "bytes=5-5004"})
+    _, messages = _send(response, extensions={"http.response.zerocopy": {}})
+    assert len(messages) == 1
+    assert messages[0]["type"] == "http.response.zerocopy"
+    assert (messages[0]["offset"], messages[0]["count"]) == (5, 5000)
+
+
+def test_stream_endpoint_serves_ranges(client, headers, create_incident):
+    incident = create_incident()
+    url = f"/api/v1/incidents/{incident['id']}/audio/problem/stream"
+    with open(incident["problem_audio_path"], "rb") as stored:
+        data = stored.read()
+
+    response = client.get(url, headers={**headers["operator"], "Range": "bytes=0-43"})
+    assert response.status_code == 206
+    assert response.content == data[:44]
+    etag = response.headers["etag"]
+    assert client.get(url, headers={**headers["operator"], "If-None-Match": etag}).status_code == 304
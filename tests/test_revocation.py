@@ -0,0 +1,79 @@
+import time
+import uuid
+
+import pytest
+
+from app.core.revocation import RedisRevocationBackend, RevocationStore
+from app.core.security import create_access_token
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_logged_out_token_is_rejected(client, users):
+    token = create_access_token(users["operator"].id)
+    assert client.get("/api/v1/auth/me", headers=_bearer(token)).status_code == 200
+
+    assert client.post("/api/v1/auth/logout", headers=_bearer(token)).status_code == 200
+    assert client.get("/api/v1/auth/me", headers=_bearer(token)).status_code == 401
+    # Otro token del mismo usuario sigue valiendo
+    assert client.get("/api/v1/auth/me", headers=_bearer(create_access_token(users["operator"].id))).status_code == 200
+
+
+def test_reset_token_is_single_use(client, users):
+    body = {"token": create_access_token(users["operator"].id), "new_password": "NewPassw0rd!"}
+    assert client.post("/api/v1/auth/reset-password", json=body).status_code == 200
+    assert client.post("/api/v1/auth/reset-password", json=body).status_code == 400
+
+
+def test_unrevoked_tokens_pass_the_bloom_filter():
+    store = RevocationStore(capacity=1000)
+    revoked = [uuid.uuid4().hex for _ in range(100)]
+    for jti in revoked:
+        store.revoke(jti, time.time() + 60)
+
+    assert all(store.is_revoked(jti) for jti in revoked)
+    others = [uuid.uuid4().hex for _ in range(1000)]
+    assert not any(store.is_revoked(jti) for jti in others)
+    # La mayoría se descarta en el filtro sin mirar el conjunto
+    assert sum(jti in store._bloom for jti in others) < 20
+    # Los ya vencidos no se guardan
+    store.revoke("expired", time.time() - 1)
+    assert not store.is_revoked("expired")
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def test_revocation_is_shared_between_stores():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+
+    def store():
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        revocations = RevocationStore(backend=RedisRevocationBackend(client), capacity=1000)
+        revocations.start()
+        return revocations
+
+    first, second = store(), store()
+    try:
+        first.revoke("shared-jti", time.time() + 60)
+        # Otro worker se entera por pub/sub...
+        assert _wait_for(lambda: second.is_revoked("shared-jti"))
+        # ...y uno que arranca después lo carga de Redis
+        late = store()
+        try:
+            assert late.is_revoked("shared-jti")
+            assert not late.is_revoked("other-jti")
+        finally:
+            late.stop()
+    finally:
+        first.stop()
+        second.stop()
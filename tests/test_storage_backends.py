@@ -0,0 +1,82 @@
+import base64
+import hashlib
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.services.storage_backends import S3StorageBackend
+
+boto3 = pytest.importorskip("boto3")
+from botocore.config import Config  # noqa: E402
+from botocore.stub import Stubber  # noqa: E402
+
+SHA256 = hashlib.sha256(b"audio").hexdigest()
+KEY = f"audio/blobs/{SHA256[:2]}/{SHA256[2:4]}/{SHA256}.ogg"
+
+
+@pytest.fixture
+def s3():
+    client = boto3.client(
+        "s3", region_name="us-east-1", endpoint_url="http://minio:9000",
+        aws_access_key_id="test", aws_secret_access_key="test",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+    with Stubber(client) as stubber:
+        yield S3StorageBackend("agent-audio", client=client), stubber
+        stubber.assert_no_pending_responses()
+
+
+def test_presigned_put_signs_type_length_and_checksum(s3):
+    backend, _ = s3
+    target = backend.presigned_put(KEY, content_type="audio/ogg", size=5, sha256=SHA256, expires_in=900)
+
+    checksum = base64.b64encode(hashlib.sha256(b"audio").digest()).decode()
+    assert target["method"] == "PUT"
+    assert target["headers"] == {
+        "Content-Type": "audio/ogg", "Content-Length": "5", "x-amz-checksum-sha256": checksum,
+    }
+    url = urlparse(target["url"])
+    assert url.path == f"/agent-audio/{KEY}"
+    query = parse_qs(url.query)
+    assert query["X-Amz-Expires"] == ["900"]
+    # Los encabezados forman parte de la firma: S3 rechaza otro cuerpo
+    signed = query["X-Amz-SignedHeaders"][0].split(";")
+    assert {"content-type", "content-length", "x-amz-checksum-sha256"} <= set(signed)
+
+
+def test_presigned_get_url(s3):
+    backend, _ = s3
+    url = urlparse(backend.presigned_get_url(KEY, 60, content_type="audio/ogg"))
+    query = parse_qs(url.query)
+    assert url.path == f"/agent-audio/{KEY}"
+    assert query["X-Amz-Expires"] == ["60"]
+    assert query["response-content-type"] == ["audio/ogg"]
+    assert "X-Amz-Signature" in query
+
+
+def test_head_and_delete(s3):
+    backend, stubber = s3
+    stubber.add_response(
+        "head_object", {"ContentLength": 5, "ContentType": "audio/ogg"},
+        {"Bucket": "agent-audio", "Key": KEY},
+    )
+    stubber.add_client_error("head_object", service_error_code="404", http_status_code=404)
+    stubber.add_response("delete_object", {}, {"Bucket": "agent-audio", "Key": KEY})
+    stubber.add_client_error("delete_object", service_error_code="AccessDenied", http_status_code=403)
+
+    assert backend.head(KEY) == {"size": 5, "content_type": "audio/ogg"}
+    assert backend.head(KEY) is None
+    assert backend.delete(KEY) is True
+    assert backend.delete(KEY) is False
+
+
+def test_copy_reports_a_missing_source(s3):
+    backend, stubber = s3
+    stubber.add_response(
+        "copy_object", {},
+        {"Bucket": "agent-audio", "Key": "dst", "CopySource": {"Bucket": "agent-audio", "Key": "src"}},
+    )
+    stubber.add_client_error("copy_object", service_error_code="NoSuchKey", http_status_code=404)
+
+    assert backend.copy("src", "dst") is True
+    assert backend.copy("src", "dst") is False
@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event, update
+
+from app.core.database import engine
+from app.crud.user import CRUDUser
+from app.models.user import User, UserRole
+
+crud_user = CRUDUser()
+
+
+def _user_data(i):
+    return {"email": f"user{i}@example.com", "name": f"User {i}", "lastname": "Test", "hashed_password": "x"}
+
+
+def test_create_many_returns_rows_in_order_with_server_defaults(db):
+    users = crud_user.create_many(db, objs_in=[_user_data(i) for i in range(3)])
+
+    assert [user.email for user in users] == [f"user{i}@example.com" for i in range(3)]
+    assert all(user.id and user.created_at for user in users)
+    # Defaults de la columna y del servidor vienen en el RETURNING
+    assert [user.role for user in users] == [UserRole.operator] * 3
+    assert [user.token_version for user in users] == [0, 0, 0]
+
+
+def test_writes_refresh_objects_already_in_the_session(db):
+    first, second = crud_user.create_many(db, objs_in=[_user_data(0), _user_data(1)])
+
+    updated = crud_user.update(db, db_obj=first, obj_in={"name": "Renamed"})
+    assert updated is first
+    assert first.name == "Renamed"
+    assert first.updated_at is not None
+
+    # Los objetos que ya estaban en la sesión se actualizan en el lugar
+    loaded = db.get(User, second.id)
+    returned = crud_user.update_many(db, ids=[first.id, second.id, 999], obj_in={"lastname": "Batch"})
+    assert {user.id for user in returned} == {first.id, second.id}
+    assert loaded.lastname == "Batch"
+    assert first.lastname == "Batch"
+
+    removed = crud_user.remove_many(db, ids=[first.id])
+    assert [user.email for user in removed] == ["user0@example.com"]
+    assert first not in db
+    assert crud_user.get(db, id=first.id) is None
+    assert crud_user.get(db, id=second.id) is second
+
+
+@pytest.fixture
+def statements():
+    """SQL run while the fixture is active"""
+    recorded = []
+
+    def record(conn, cursor, statement, *args):
+        recorded.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _revalidate(client, url, headers, statements, full_column):
+    """First GET, then the same GET with If-None-Match: returns the ETag"""
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    statements.clear()
+    cached = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+    # El 304 se decide con la consulta de versiones, sin cargar las filas
+    assert not [sql for sql in statements if full_column in sql]
+    return etag
+
+
+def test_users_endpoints_answer_304_from_versions(client, db, users, headers, statements):
+    operator = users["operator"]
+    # Creado antes: SQLite guarda segundos y la versión es coalesce(updated_at, created_at)
+    db.execute(
+        update(User).where(User.id == operator.id)
+        .values(created_at=datetime(2024, 1, 1, tzinfo=timezone.utc), updated_at=None)
+    )
+    db.commit()
+    etags = {
+        url: _revalidate(client, url, headers["admin"], statements, "users.hashed_password")
+        for url in ("/api/v1/users/", f"/api/v1/users/{operator.id}")
+    }
+
+    response = client.put(f"/api/v1/users/{operator.id}", json={"name": "Renamed"}, headers=headers["admin"])
+    assert response.status_code == 200
+    for url, etag in etags.items():
+        response = client.get(url, headers={**headers["admin"], "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_my_incidents_answer_304_until_an_incident_changes(client, users, headers, statements, create_incident):
+    url = "/api/v1/users/me/incidents"
+    create_incident(title="First")
+    etag = _revalidate(client, url, headers["operator"], statements, "incidents.title")
+
+    create_incident(title="Second", freq=550.0)
+    response = client.get(url, headers={**headers["operator"], "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Second", "First"]
+    assert response.headers["ETag"] != etag